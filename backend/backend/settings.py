@@ -81,6 +81,83 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Processes serving this deployment (gunicorn workers plus the run_jobs
+# worker). Above 1 the default and sessions caches must be shared between them
+# (e.g. FileBasedCache on one host, RedisCache across hosts); courses.apps
+# refuses to start with LocMemCache.
+SERVER_PROCESSES = int(os.environ.get("DJANGO_SERVER_PROCESSES", "1"))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "coursehub"),
+    },
+    # Per-process state that must stay local, e.g. throttling buckets (courses.throttles).
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "coursehub-local",
+    },
+    # Session reads (SESSION_CACHE_ALIAS); must be shared when SERVER_PROCESSES > 1.
+    "sessions": {
+        "BACKEND": os.environ.get("DJANGO_SESSION_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_SESSION_CACHE_LOCATION", "coursehub-sessions"),
+    },
+}
+
+AUTHENTICATION_BACKENDS = [
+    # Serves the per-request session user (with its profile) from CACHES.
+    "courses.backends.CachedProfileBackend",
+    # Keeps sessions created before the cached backend was introduced valid.
+    "django.contrib.auth.backends.ModelBackend",
+]
+
+# Lifetimes (seconds) of the signed bearer tokens issued by auth/token/.
+ACCESS_TOKEN_LIFETIME = int(os.environ.get("ACCESS_TOKEN_LIFETIME", "300"))
+REFRESH_TOKEN_LIFETIME = int(os.environ.get("REFRESH_TOKEN_LIFETIME", "86400"))
+
+# Cached session users are dropped on every user/profile write. With a
+# per-process cache (LocMemCache), other processes may serve a stale role for
+# up to this many seconds; use a shared cache to avoid that.
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", "300"))
+
+# Serialized course trees are invalidated on every content write; the timeout only bounds memory.
+COURSE_TREE_CACHE_TIMEOUT = int(os.environ.get("COURSE_TREE_CACHE_TIMEOUT", "3600"))
+
+# Rendered certificate PDFs are stored once and served from here; any Django
+# storage class works (e.g. an S3 backend with its own OPTIONS).
+CERTIFICATE_STORAGE = {
+    "BACKEND": os.environ.get("CERTIFICATE_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"),
+    "OPTIONS": {"location": os.environ.get("CERTIFICATE_STORAGE_LOCATION", str(BASE_DIR / "media" / "certificates"))},
+}
+CERTIFICATE_CACHE_MAX_AGE = int(os.environ.get("CERTIFICATE_CACHE_MAX_AGE", "86400"))
+# Seconds a process keeps its copy of the revoked certificate numbers used by
+# token verification (courses.verification) before reloading it.
+CERTIFICATE_REVOCATION_REFRESH = int(os.environ.get("CERTIFICATE_REVOCATION_REFRESH", "60"))
+# Public verification by certificate number: answers are cached per number
+# (dropped on revocation and deletion); the Bloom filter of issued numbers
+# used to reject unknown ones without a query is rebuilt this often.
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = int(os.environ.get("CERTIFICATE_VERIFY_CACHE_TIMEOUT", "300"))
+CERTIFICATE_FILTER_REFRESH = int(os.environ.get("CERTIFICATE_FILTER_REFRESH", "21600"))
+# Token buckets of courses.throttles, per client IP: (burst capacity, refill per second).
+TOKEN_BUCKETS = {
+    "certificate_verification": (
+        int(os.environ.get("CERTIFICATE_VERIFY_BURST", "30")),
+        float(os.environ.get("CERTIFICATE_VERIFY_RATE", "1")),
+    ),
+}
+
+# Background jobs (courses.jobs), executed by `python manage.py run_jobs`.
+# Maximum number of jobs running at once per queue, across all workers.
+JOB_CONCURRENCY = {
+    "default": int(os.environ.get("JOB_CONCURRENCY_DEFAULT", "2")),
+    "certificates": int(os.environ.get("JOB_CONCURRENCY_CERTIFICATES", "4")),
+    "imports": int(os.environ.get("JOB_CONCURRENCY_IMPORTS", "1")),
+}
+# Seconds before the first retry of a failed job; doubles on every attempt.
+JOB_RETRY_DELAY = int(os.environ.get("JOB_RETRY_DELAY", "10"))
+# Running jobs older than this are assumed orphaned by a dead worker and requeued.
+JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", "600"))
+
 # Helper function to ensure URLs have proper scheme
 def ensure_scheme(url):
     """Ensure URL has a scheme (http:// or https://)"""
@@ -128,7 +205,8 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        # JSONRenderer-compatible; uses orjson when installed.
+        "courses.renderers.FastJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
@@ -138,7 +216,17 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
+        # Optional `Authorization: Bearer` tokens from auth/token/; see courses.tokens.
+        "courses.authentication.SignedTokenAuthentication",
     ],
+    # Opt-in per request with ?page_size= / ?cursor=; see courses.pagination.
+    "DEFAULT_PAGINATION_CLASS": "courses.pagination.OptionalCursorPagination",
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", "50")),
+    # Reverse proxies in front of the app, each appending to X-Forwarded-For.
+    # Throttles identify clients by the address the outermost one saw; with
+    # 0, by REMOTE_ADDR. Never leave unset: DRF would then trust the whole,
+    # client-supplied header.
+    "NUM_PROXIES": int(os.environ.get("API_NUM_PROXIES", "0")),
 }
 
 # Session settings for authentication
@@ -146,6 +234,13 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'None' if not DEBUG else 'Lax'  # 'None' for cross-origin in production
 SESSION_COOKIE_SECURE = not DEBUG  # True in production with HTTPS
 SESSION_COOKIE_AGE = 86400  # 1 day
+# Write-through: sessions are saved to the database and read from the cache.
+SESSION_ENGINE = os.environ.get("DJANGO_SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+SESSION_CACHE_ALIAS = "sessions"
+# Seconds between purges of expired sessions by the run_jobs worker (a
+# "sessions.purge" job, see courses.jobs); 0 disables them, e.g. when
+# clearsessions runs from cron.
+SESSION_PURGE_INTERVAL = int(os.environ.get("SESSION_PURGE_INTERVAL", "3600"))
 
 # Security settings for production
 if not DEBUG:
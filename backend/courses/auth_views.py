@@ -1,15 +1,24 @@
+from datetime import datetime, time
+
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.validators import ASCIIUsernameValidator
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from .authentication import SignedTokenAuthentication
 from .models import UserProfile, Role
+from .pagination import OptionalCursorPagination
+from .tokens import REFRESH, InvalidToken, issue_tokens, read_token, revoke_tokens
 
 
 @api_view(['POST'])
@@ -71,8 +80,9 @@ def register_view(request):
     # Create user profile
     profile = UserProfile.objects.create(user=user, role=role, admin_secret_code=admin_secret_code if role == Role.ADMIN else None)
     
-    # Automatically log in the user after registration
-    login(request, user)
+    # Automatically log in the user after registration. The user was not
+    # authenticated by a backend, so name the one that should load it later.
+    login(request, user, backend='courses.backends.CachedProfileBackend')
     
     return Response({
         'message': 'User registered successfully',
@@ -139,10 +149,56 @@ def login_view(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_obtain_view(request):
+    """Exchange username and password for a bearer access/refresh token pair"""
+    username = request.data.get('username')
+    password = request.data.get('password')
+    
+    if not username or not password:
+        return Response(
+            {'error': 'Username and password are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    user = authenticate(request, username=username, password=password)
+    if user is None:
+        return Response(
+            {'error': 'Invalid username or password'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    # Ensure profile exists for legacy users, as in login_view
+    profile, _ = UserProfile.objects.get_or_create(
+        user=user, defaults={'role': Role.ADMIN if user.is_staff else Role.STUDENT}
+    )
+    return Response(issue_tokens(profile))
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh_view(request):
+    """Issue a fresh token pair for a valid, unrevoked refresh token"""
+    try:
+        payload = read_token(REFRESH, request.data.get('refresh') or '')
+    except InvalidToken as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # Unlike access tokens, refresh tokens are checked against the database
+    profile = UserProfile.objects.select_related('user').filter(user_id=payload['uid']).first()
+    if profile is None or not profile.user.is_active or profile.token_generation != payload['gen']:
+        return Response({'error': 'Token has been revoked.'}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response(issue_tokens(profile))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
     """Logout user"""
+    if isinstance(request.successful_authenticator, SignedTokenAuthentication):
+        # Bearer clients have no session; revoke their tokens instead
+        revoke_tokens(request.user)
     logout(request)
     return Response({'message': 'Logout successful'})
 
@@ -177,6 +233,83 @@ def csrf_token(request):
     return Response({'csrfToken': get_token(request)})
 
 
+# `?ordering=` values of the user listing; each sorts on an indexed column and
+# ends on a unique one so cursor pagination stays stable.
+USER_ORDERINGS = {
+    "id": ("id",),
+    "-id": ("-id",),
+    "username": ("username",),
+    "-username": ("-username",),
+    "date_joined": ("date_joined", "id"),
+    "-date_joined": ("-date_joined", "-id"),
+}
+
+BOOLEAN_PARAMS = {"true": True, "1": True, "false": False, "0": False}
+
+
+def filter_users(params):
+    """Apply the user listing's query parameters; returns ``(queryset, error)``.
+
+    - ``search``: case-insensitive prefix of username, email, first or last name
+    - ``role``: one or more comma-separated roles
+    - ``is_staff``: ``true`` / ``false``
+    - ``joined_after`` / ``joined_before``: ISO dates or datetimes, inclusive
+    - ``ordering``: one of USER_ORDERINGS
+    """
+    users = User.objects.select_related("profile")
+
+    ordering = params.get("ordering") or "id"
+    if ordering not in USER_ORDERINGS:
+        return None, f"ordering must be one of: {', '.join(USER_ORDERINGS)}"
+    users = users.order_by(*USER_ORDERINGS[ordering])
+
+    search = (params.get("search") or "").strip()
+    if search:
+        users = users.filter(
+            Q(username__istartswith=search)
+            | Q(email__istartswith=search)
+            | Q(first_name__istartswith=search)
+            | Q(last_name__istartswith=search)
+        )
+
+    if params.get("role"):
+        roles = [role.strip() for role in params["role"].split(",") if role.strip()]
+        if any(role not in (Role.ADMIN, Role.TEACHER, Role.STUDENT) for role in roles):
+            return None, "role must be admin, teacher or student"
+        users = users.filter(profile__role__in=roles)
+
+    if params.get("is_staff"):
+        is_staff = BOOLEAN_PARAMS.get(params["is_staff"].lower())
+        if is_staff is None:
+            return None, "is_staff must be true or false"
+        users = users.filter(is_staff=is_staff)
+
+    for param, lookup in (("joined_after", "date_joined__gte"), ("joined_before", "date_joined__lte")):
+        if params.get(param):
+            value = _parse_bound(params[param], end=param == "joined_before")
+            if value is None:
+                return None, f"{param} must be an ISO date or datetime"
+            users = users.filter(**{lookup: value})
+
+    return users, None
+
+
+def _parse_bound(value, end=False):
+    """Parse an ISO datetime, or a date meaning its first (or, with `end`, last) instant."""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.max if end else time.min)
+    except ValueError:
+        return None
+    if settings.USE_TZ and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def users_view(request):
@@ -185,9 +318,14 @@ def users_view(request):
         return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method == "GET":
-        users = User.objects.all().order_by("id")
+        users, error = filter_users(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = OptionalCursorPagination()
+        paginator.ordering = USER_ORDERINGS[request.query_params.get("ordering") or "id"]
+        page = paginator.paginate_queryset(users, request)
         data = []
-        for u in users:
+        for u in (users if page is None else page):
             profile = getattr(u, "profile", None)
             data.append(
                 {
@@ -200,6 +338,8 @@ def users_view(request):
                     "role": profile.role if profile else None,
                 }
             )
+        if page is not None:
+            return paginator.get_paginated_response(data)
         return Response(data)
 
     # POST - create
@@ -347,6 +487,7 @@ def user_detail_view(request, user_id: int):
         user.last_name = data.get("last_name") or ""
 
     # Role and staff flag
+    previous_role = profile.role
     incoming_role = data.get("role") or profile.role
     if incoming_role not in [Role.ADMIN, Role.TEACHER, Role.STUDENT]:
         incoming_role = profile.role
@@ -362,13 +503,18 @@ def user_detail_view(request, user_id: int):
         user.is_staff = user.is_staff and incoming_role != Role.STUDENT if user.is_staff else False
 
     # Password update (optional)
-    if "password" in data and data.get("password"):
+    password_changed = "password" in data and bool(data.get("password"))
+    if password_changed:
         try:
             validate_password(data.get("password"))
         except ValidationError as e:
             return Response({"error": " ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
         user.set_password(data.get("password"))
 
+    # New password or role: tokens issued before no longer apply
+    if password_changed or incoming_role != previous_role:
+        profile.token_generation += 1
+
     # Admin secret code management
     admin_code = data.get("admin_secret_code")
     if incoming_role == Role.ADMIN:
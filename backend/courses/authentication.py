@@ -0,0 +1,39 @@
+"""DRF authentication for the signed bearer tokens of ``courses.tokens``."""
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .backends import CachedProfileBackend
+from .tokens import ACCESS, InvalidToken, read_token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <access token>``; no session and no CSRF token needed.
+
+    The user and profile come from ``CachedProfileBackend``'s cache, so a
+    request costs no query once the user is cached. Tokens whose generation
+    or role no longer match the profile are rejected.
+    """
+
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Invalid token header.")
+        try:
+            payload = read_token(ACCESS, header[1].decode())
+        except (InvalidToken, UnicodeError) as exc:
+            raise AuthenticationFailed(str(exc) or "Invalid token.")
+
+        user = CachedProfileBackend().get_user(payload["uid"])
+        if user is None:
+            raise AuthenticationFailed("User inactive or deleted.")
+        profile = getattr(user, "profile", None)
+        if profile is None or payload["gen"] != profile.token_generation or payload.get("role") != profile.role:
+            raise AuthenticationFailed("Token has been revoked.")
+        return user, payload
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
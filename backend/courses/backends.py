@@ -0,0 +1,42 @@
+"""Authentication backend that resolves the session user and profile from a cache.
+
+Django's AuthenticationMiddleware calls ``get_user()`` on every request, and
+nearly every view then reads ``user.profile.role``: two queries per request
+for data that rarely changes. This backend loads both in one query and keeps
+the result in the default cache; ``courses.signals`` drops the entry whenever
+the user or the profile is saved or deleted.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def _timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    """Drop the cached user and profile of ``user_id``."""
+    cache.delete(_user_key(user_id))
+
+
+class CachedProfileBackend(ModelBackend):
+    """ModelBackend whose ``get_user`` returns the user with ``profile`` preloaded."""
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            user = UserModel._default_manager.select_related("profile").filter(pk=user_id).first()
+            if user is None:
+                return None
+            # Touch the relation so a missing profile is cached as such too.
+            getattr(user, "profile", None)
+            cache.set(key, user, _timeout())
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,478 @@
+"""Query-count and latency benchmark for the API, driven by synthetic data.
+
+`build_dataset` fills the (test) database with a dataset sized by `Scale`;
+`run_benchmark` then calls every route in `courses/urls.py` as an admin, a
+teacher, a student and an anonymous user, and records query counts,
+p50/p95 latency and peak Python memory per endpoint and role. The report is a
+plain dict ready to be dumped as JSON and compared across commits (see the
+`benchmark_api` management command).
+"""
+import logging
+import statistics
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .certificates import ensure_certificate_pdf
+from .models import (
+    ClassEnrollment,
+    Course,
+    CourseCompletionCertificate,
+    CourseProgress,
+    Exercise,
+    Job,
+    JobStatus,
+    KeyTakeaway,
+    Lesson,
+    Module,
+    Resource,
+    Role,
+    TeacherClass,
+    Topic,
+    UserProfile,
+)
+from .tokens import REFRESH, make_token
+
+PASSWORD = "Bench@12345"
+ROLES = ("admin", "teacher", "student", "anonymous")
+
+
+@dataclass
+class Scale:
+    classes: int = 2
+    students: int = 20
+    courses: int = 2
+    modules: int = 3
+    lessons: int = 4
+    topic_depth: int = 2
+    topic_fanout: int = 2
+    takeaways: int = 3
+
+    def multiplied(self, factor):
+        """Scale every dimension except topic depth by `factor`."""
+        values = {name: max(1, round(value * factor)) for name, value in asdict(self).items()}
+        values["topic_depth"] = self.topic_depth
+        return Scale(**values)
+
+
+# Re-imported on every call: the first one creates the course, later ones
+# match it by title and rewrite the same rows.
+IMPORT_DOCUMENT = {
+    "title": "Benchmark import",
+    "teacherClassId": "{teacher_class}",
+    "modules": [
+        {
+            "title": "Imported module",
+            "lessons": [
+                {
+                    "title": "Imported lesson",
+                    "topics": [{"title": "Imported topic", "children": [{"title": "Imported subtopic"}]}],
+                    "takeaways": [{"content": "Imported takeaway"}],
+                }
+            ],
+        }
+    ],
+}
+
+# (name, method, path, payload). Paths are formatted with the ids returned by
+# build_dataset; `{seq}` is a per-call counter for endpoints that need unique input
+# and `{disposable}` the row DISPOSABLE_ROWS made for the call. Rows created by a
+# call are deleted after it (see CREATED_MODELS) and bulk deletes target ids that
+# do not exist, so every run sees the same data.
+ENDPOINTS = [
+    ("auth.csrf", "get", "/api/auth/csrf/", None),
+    ("auth.check", "get", "/api/auth/check/", None),
+    ("auth.register", "post", "/api/auth/register/", {"username": "bench_new_{seq}", "password": PASSWORD}),
+    ("auth.login", "post", "/api/auth/login/", {"username": "bench_teacher", "password": PASSWORD}),
+    ("auth.token", "post", "/api/auth/token/", {"username": "bench_teacher", "password": PASSWORD}),
+    ("auth.token_refresh", "post", "/api/auth/token/refresh/", {"refresh": "{refresh_token}"}),
+    ("auth.logout", "post", "/api/auth/logout/", None),
+    ("auth.users.list", "get", "/api/auth/users/", None),
+    ("auth.users.create", "post", "/api/auth/users/", {"username": "bench_user_{seq}", "password_auth_enabled": False}),
+    ("auth.users.detail", "get", "/api/auth/users/{student_user}/", None),
+    ("auth.users.update", "patch", "/api/auth/users/{student_user}/", {"first_name": "Bench"}),
+    ("auth.users.destroy", "delete", "/api/auth/users/{disposable}/", None),
+    ("auth.users.bulk_delete", "post", "/api/auth/users/bulk-delete/", {"ids": [0]}),
+    ("courses.list", "get", "/api/courses/", None),
+    ("courses.list.outline", "get", "/api/courses/?view=outline", None),
+    ("courses.list.page", "get", "/api/courses/?page_size=10", None),
+    ("courses.detail", "get", "/api/courses/{course}/", None),
+    ("courses.lesson", "get", "/api/courses/{course}/lessons/{lesson}/", None),
+    ("courses.create", "post", "/api/courses/", {"title": "Benchmark course {seq}", "teacherClassId": "{teacher_class}"}),
+    ("courses.update", "patch", "/api/courses/{course}/", {"description": "Benchmark course"}),
+    ("courses.destroy", "delete", "/api/courses/{disposable}/", None),
+    ("courses.bulk_delete", "post", "/api/courses/bulk-delete/", {"ids": ["{missing}"]}),
+    ("courses.progress", "post", "/api/courses/{course}/progress/", {"obtained_score": 8, "total_score": 10, "is_completed": True}),
+    ("courses.generate_certificate", "post", "/api/courses/{course}/generate-certificate/", None),
+    ("courses.certificate_info", "get", "/api/courses/{course}/certificate-info/", None),
+    ("courses.certificate_pdf", "get", "/api/courses/{certified_course}/certificate-pdf/", None),
+    ("courses.revoke_certificate", "post", "/api/courses/{course}/revoke-certificate/", {"certificateNumber": "{revocable_certificate}"}),
+    ("courses.verify_certificate", "get", "/api/courses/verify-certificate/?certificate_number={certificate}", None),
+    ("courses.export", "get", "/api/courses/{course}/export/", None),
+    ("courses.import", "post", "/api/courses/import/", IMPORT_DOCUMENT),
+    ("modules.list", "get", "/api/modules/", None),
+    ("modules.detail", "get", "/api/modules/{module}/", None),
+    ("modules.create", "post", "/api/modules/", {"courseId": "{course}", "title": "Benchmark module {seq}"}),
+    ("modules.update", "patch", "/api/modules/{module}/", {"description": "Benchmark module"}),
+    ("modules.destroy", "delete", "/api/modules/{disposable}/", None),
+    ("modules.bulk_delete", "post", "/api/modules/bulk-delete/", {"ids": ["{missing}"]}),
+    ("lessons.list", "get", "/api/lessons/", None),
+    ("lessons.detail", "get", "/api/lessons/{lesson}/", None),
+    ("lessons.create", "post", "/api/lessons/", {"moduleId": "{module}", "title": "Benchmark lesson {seq}"}),
+    ("lessons.update", "patch", "/api/lessons/{lesson}/", {"content": "Benchmark lesson"}),
+    ("lessons.destroy", "delete", "/api/lessons/{disposable}/", None),
+    ("lessons.bulk_delete", "post", "/api/lessons/bulk-delete/", {"ids": ["{missing}"]}),
+    ("topics.list", "get", "/api/topics/", None),
+    ("topics.detail", "get", "/api/topics/{topic}/", None),
+    ("topics.create", "post", "/api/topics/", {"lessonId": "{lesson}", "title": "Benchmark topic {seq}"}),
+    ("topics.update", "patch", "/api/topics/{topic}/", {"content": "Benchmark topic"}),
+    ("topics.destroy", "delete", "/api/topics/{disposable}/", None),
+    ("topics.bulk_delete", "post", "/api/topics/bulk-delete/", {"ids": ["{missing}"]}),
+    ("takeaways.list", "get", "/api/takeaways/", None),
+    ("takeaways.detail", "get", "/api/takeaways/{takeaway}/", None),
+    ("takeaways.create", "post", "/api/takeaways/", {"lessonId": "{lesson}", "content": "Benchmark takeaway {seq}"}),
+    ("takeaways.update", "patch", "/api/takeaways/{takeaway}/", {"content": "Benchmark takeaway"}),
+    ("takeaways.destroy", "delete", "/api/takeaways/{disposable}/", None),
+    ("exercises.list", "get", "/api/exercises/", None),
+    ("exercises.detail", "get", "/api/exercises/{exercise}/", None),
+    ("exercises.create", "post", "/api/exercises/", {"lessonId": "{lesson}", "title": "Benchmark exercise {seq}", "description": "Benchmark exercise"}),
+    ("exercises.update", "patch", "/api/exercises/{exercise}/", {"description": "Benchmark exercise"}),
+    ("exercises.destroy", "delete", "/api/exercises/{disposable}/", None),
+    ("resources.list", "get", "/api/resources/", None),
+    ("resources.detail", "get", "/api/resources/{resource}/", None),
+    ("resources.create", "post", "/api/resources/", {"lessonId": "{lesson}", "title": "Benchmark resource {seq}", "url": "https://example.com/"}),
+    ("resources.update", "patch", "/api/resources/{resource}/", {"description": "Benchmark resource"}),
+    ("resources.destroy", "delete", "/api/resources/{disposable}/", None),
+    ("classes.list", "get", "/api/classes/", None),
+    ("classes.detail", "get", "/api/classes/{teacher_class}/", None),
+    ("classes.create", "post", "/api/classes/", {"name": "Benchmark class {seq}"}),
+    ("classes.update", "patch", "/api/classes/{teacher_class}/", {"description": "Benchmark class"}),
+    ("classes.destroy", "delete", "/api/classes/{disposable}/", None),
+    ("classes.issue_certificates", "post", "/api/classes/{teacher_class}/issue-certificates/", {"courseId": "{certified_course}"}),
+    ("classes.enroll", "post", "/api/classes/enroll/", {"class_code": "{class_code}"}),
+    ("enrollments.list", "get", "/api/enrollments/", None),
+    ("enrollments.detail", "get", "/api/enrollments/{enrollment}/", None),
+    ("jobs.list", "get", "/api/jobs/", None),
+    ("jobs.detail", "get", "/api/jobs/{job}/", None),
+]
+
+# Endpoints that change the client's session; they get a fresh login per call.
+SESSION_ENDPOINTS = {"auth.register", "auth.login", "auth.logout"}
+
+# Row to delete for each destroy endpoint, made from the dataset ids and the
+# call counter before every call; whatever the call left is deleted after it.
+DISPOSABLE_ROWS = {
+    "auth.users.destroy": lambda ids, seq: User.objects.create(username=f"bench_disposable_{seq}", password="!"),
+    "courses.destroy": lambda ids, seq: Course.objects.create(teacher_class_id=ids["teacher_class"], title=f"Disposable {seq}"),
+    "modules.destroy": lambda ids, seq: Module.objects.create(course_id=ids["course"], title=f"Disposable {seq}"),
+    "lessons.destroy": lambda ids, seq: Lesson.objects.create(module_id=ids["module"], title=f"Disposable {seq}"),
+    "topics.destroy": lambda ids, seq: Topic.objects.create(lesson_id=ids["lesson"], title=f"Disposable {seq}"),
+    "takeaways.destroy": lambda ids, seq: KeyTakeaway.objects.create(lesson_id=ids["lesson"], content=f"Disposable {seq}"),
+    "exercises.destroy": lambda ids, seq: Exercise.objects.create(lesson_id=ids["lesson"], title=f"Disposable {seq}"),
+    "resources.destroy": lambda ids, seq: Resource.objects.create(
+        lesson_id=ids["lesson"], title=f"Disposable {seq}", url="https://example.com/"
+    ),
+    "classes.destroy": lambda ids, seq: TeacherClass.objects.create(
+        teacher_id=ids["teacher_user"], name=f"Disposable {seq}", class_code=f"BD{seq:06d}"
+    ),
+}
+
+# Model of the row each create endpoint adds; it is deleted after the call.
+CREATED_MODELS = {
+    "courses.create": Course,
+    "modules.create": Module,
+    "lessons.create": Lesson,
+    "topics.create": Topic,
+    "takeaways.create": KeyTakeaway,
+    "exercises.create": Exercise,
+    "resources.create": Resource,
+    "classes.create": TeacherClass,
+}
+
+
+def _make_user(username, role):
+    user = User.objects.create_user(username=username, password=PASSWORD, is_staff=role == Role.ADMIN)
+    UserProfile.objects.create(user=user, role=role)
+    return user
+
+
+def build_dataset(scale):
+    """Populate the database for `scale` and return the ids used by ENDPOINTS."""
+    users = {
+        "admin": _make_user("bench_admin", Role.ADMIN),
+        "teacher": _make_user("bench_teacher", Role.TEACHER),
+        "student": _make_user("bench_student", Role.STUDENT),
+    }
+
+    students = User.objects.bulk_create(
+        User(username=f"bench_student_{i}", password="!") for i in range(scale.students)
+    )
+    UserProfile.objects.bulk_create(UserProfile(user=student, role=Role.STUDENT) for student in students)
+
+    classes = TeacherClass.objects.bulk_create(
+        TeacherClass(teacher=users["teacher"], name=f"Class {i}", class_code=f"BN{i:06d}") for i in range(scale.classes)
+    )
+    enrollments = ClassEnrollment.objects.bulk_create(
+        ClassEnrollment(student=student, teacher_class=teacher_class)
+        for teacher_class in classes
+        for student in [users["student"], *students]
+    )
+
+    courses = Course.objects.bulk_create(
+        Course(teacher_class=teacher_class, title=f"{teacher_class.name} course {i}", description="Synthetic course")
+        for teacher_class in classes
+        for i in range(scale.courses)
+    )
+    modules = Module.objects.bulk_create(
+        Module(course=course, owner_teacher=users["teacher"], title=f"Module {i}", description="Synthetic module", order=i)
+        for course in courses
+        for i in range(scale.modules)
+    )
+    # bulk_create skips save(), so the denormalized ownership keys are set here.
+    owned = {"owner_teacher": users["teacher"]}
+    lessons = Lesson.objects.bulk_create(
+        Lesson(module=module, course_id=module.course_id, title=f"Lesson {i}", content="<p>Synthetic lesson body</p>" * 20, order=i, **owned)
+        for module in modules
+        for i in range(scale.lessons)
+    )
+
+    topics = []
+    parents = [(lesson, None) for lesson in lessons]
+    for depth in range(scale.topic_depth):
+        level = Topic.objects.bulk_create(
+            Topic(
+                lesson=lesson,
+                parent=parent,
+                course_id=lesson.course_id,
+                title=f"Topic {depth}.{i}",
+                content="<p>Synthetic topic body</p>" * 10,
+                order=i,
+                **owned,
+            )
+            for lesson, parent in parents
+            for i in range(scale.topic_fanout)
+        )
+        topics.extend(level)
+        parents = [(topic.lesson, topic) for topic in level]
+
+    owners = [{"lesson": lesson, "course_id": lesson.course_id, **owned} for lesson in lessons] + [
+        {"topic": topic, "course_id": topic.course_id, **owned} for topic in topics
+    ]
+    takeaways = KeyTakeaway.objects.bulk_create(
+        KeyTakeaway(content=f"Takeaway {i}", order=i, **owner) for owner in owners for i in range(scale.takeaways)
+    )
+    exercises = Exercise.objects.bulk_create(
+        Exercise(title=f"Exercise {i}", description="Synthetic exercise", order=i, **owner)
+        for owner in owners
+        for i in range(scale.takeaways)
+    )
+    resources = Resource.objects.bulk_create(
+        Resource(title=f"Resource {i}", url="https://example.com/", order=i, **owner)
+        for owner in owners
+        for i in range(scale.takeaways)
+    )
+
+    course = courses[0]
+    CourseProgress.objects.create(student=users["student"], course=course, obtained_score=5, total_score=10)
+    certificate = CourseCompletionCertificate.objects.create(
+        student=users["student"], course=course, certificate_number="CH-20250101-BENCH1"
+    )
+    # Revoked again on every call, so the certificate verified above stays valid.
+    revocable = CourseCompletionCertificate.objects.create(
+        student=students[0], course=course, certificate_number="CH-20250101-BENCH3"
+    )
+    # What a client polls after asking for a PDF that was not rendered yet.
+    job = Job.objects.create(
+        kind="certificate.render",
+        payload={"certificate_id": str(certificate.id)},
+        key=f"certificate:{certificate.id}",
+        queue="certificates",
+        status=JobStatus.SUCCEEDED,
+        attempts=1,
+        result={"certificateNumber": certificate.certificate_number, "downloadUrl": f"/api/courses/{course.id}/certificate-pdf/"},
+        created_by=users["student"],
+    )
+    # A course of its own whose progress no endpoint touches, so the stored
+    # PDF stays fresh and downloads measure the stored-file path.
+    certified = Course.objects.create(teacher_class=classes[0], title="Certified course", description="Synthetic course")
+    certified_progress = CourseProgress.objects.create(
+        student=users["student"], course=certified, obtained_score=9, total_score=10, is_completed=True
+    )
+    ensure_certificate_pdf(
+        CourseCompletionCertificate.objects.create(
+            student=users["student"], course=certified, certificate_number="CH-20250101-BENCH2"
+        ),
+        certified_progress,
+    )
+
+    return {
+        "users": users,
+        "ids": {
+            "course": course.id,
+            "module": modules[0].id,
+            "lesson": lessons[0].id,
+            "topic": topics[0].id if topics else uuid.uuid4(),
+            "takeaway": takeaways[0].id if takeaways else uuid.uuid4(),
+            "exercise": exercises[0].id if exercises else uuid.uuid4(),
+            "resource": resources[0].id if resources else uuid.uuid4(),
+            "certified_course": certified.id,
+            "teacher_class": classes[0].id,
+            "class_code": classes[0].class_code,
+            "enrollment": enrollments[0].id,
+            "student_user": users["student"].id,
+            "teacher_user": users["teacher"].id,
+            "refresh_token": make_token(REFRESH, users["student"].profile),
+            "certificate": certificate.certificate_number,
+            "revocable_certificate": revocable.certificate_number,
+            "job": job.id,
+            "missing": uuid.uuid4(),
+        },
+        "counts": {
+            "users": User.objects.count(),
+            "classes": len(classes),
+            "enrollments": len(enrollments),
+            "courses": len(courses) + 1,
+            "modules": len(modules),
+            "lessons": len(lessons),
+            "topics": len(topics),
+            "takeaways": len(takeaways),
+            "exercises": len(exercises),
+            "resources": len(resources),
+        },
+    }
+
+
+def _fill(value, ids, seq):
+    if isinstance(value, str):
+        return value.format(seq=seq, **ids)
+    if isinstance(value, list):
+        return [_fill(item, ids, seq) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, ids, seq) for key, item in value.items()}
+    return value
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _call(client, method, url, data):
+    response = getattr(client, method)(url, data, format="json")
+    if response.streaming:
+        # Streamed bodies are produced while they are read; time that too.
+        b"".join(response.streaming_content)
+    return response
+
+
+def _prepare(name, ids, seq):
+    """Ids for one call of `name`, with a fresh `disposable` row for destroy endpoints."""
+    make_row = DISPOSABLE_ROWS.get(name)
+    if make_row is None:
+        return ids, None
+    row = make_row(ids, seq)
+    return {**ids, "disposable": row.pk}, row
+
+
+def _clean_up(name, row, response):
+    """Delete what a call of `name` left behind: its disposable row and anything it created."""
+    if row is not None:
+        type(row).objects.filter(pk=row.pk).delete()
+    model = CREATED_MODELS.get(name)
+    if model is not None and response.status_code == 201:
+        model.objects.filter(pk=response.data["id"]).delete()
+
+
+def run_benchmark(dataset, repeat=10, cold_cache=False, endpoints=None, roles=ROLES):
+    """Call every endpoint `repeat` times per role and return one result dict per pair."""
+    # 4xx responses are expected for some roles; keep them out of the output.
+    request_logger = logging.getLogger("django.request")
+    previous_level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        return _run(dataset, repeat, cold_cache, endpoints, roles)
+    finally:
+        request_logger.setLevel(previous_level)
+
+
+def _run(dataset, repeat, cold_cache, endpoints, roles):
+    users, ids = dataset["users"], dataset["ids"]
+    selected = [endpoint for endpoint in ENDPOINTS if not endpoints or endpoint[0] in endpoints]
+    seq = 0
+    results = []
+
+    def client_for(role):
+        client = APIClient()
+        if role in users:
+            client.force_login(users[role])
+        return client
+
+    for role in roles:
+        for name, method, path, payload in selected:
+            # Start every endpoint with full throttling buckets (see courses.throttles).
+            caches["local"].clear()
+            client = client_for(role)
+            timings, queries, status_code = [], None, None
+            for _ in range(repeat):
+                seq += 1
+                if name in SESSION_ENDPOINTS:
+                    client = client_for(role)
+                call_ids, row = _prepare(name, ids, seq)
+                if cold_cache:
+                    cache.clear()
+                url, data = _fill(path, call_ids, seq), _fill(payload, call_ids, seq)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = _call(client, method, url, data)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = len(ctx.captured_queries) if queries is None else max(queries, len(ctx.captured_queries))
+                status_code = response.status_code
+                _clean_up(name, row, response)
+
+            # Memory is measured on a separate call: tracemalloc skews timings.
+            seq += 1
+            if name in SESSION_ENDPOINTS:
+                client = client_for(role)
+            call_ids, row = _prepare(name, ids, seq)
+            tracemalloc.start()
+            response = _call(client, method, _fill(path, call_ids, seq), _fill(payload, call_ids, seq))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _clean_up(name, row, response)
+
+            results.append(
+                {
+                    "endpoint": name,
+                    "role": role,
+                    "method": method.upper(),
+                    "path": path,
+                    "status": status_code,
+                    "queries": queries,
+                    "first_ms": round(timings[0], 3),
+                    "p50_ms": round(statistics.median(timings), 3),
+                    "p95_ms": round(_percentile(timings, 0.95), 3),
+                    "peak_kb": round(peak / 1024, 1),
+                }
+            )
+    return results
+
+
+def compare_reports(baseline, current):
+    """Return rows whose query count grew or whose p50 grew by more than 20%."""
+    previous = {(row["endpoint"], row["role"]): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        before = previous.get((row["endpoint"], row["role"]))
+        if before is None:
+            continue
+        if row["queries"] > before["queries"] or row["p50_ms"] > before["p50_ms"] * 1.2:
+            regressions.append({"endpoint": row["endpoint"], "role": row["role"], "before": before, "after": row})
+    return regressions
@@ -0,0 +1,133 @@
+"""Issuing the certificates of a whole class at once.
+
+``issue_class_certificates`` creates the missing certificate rows of every
+enrolled student who completed a course of the class with one bulk INSERT.
+``certificate_zip_chunks`` then yields a ZIP archive of their PDFs while
+they are produced: stored, up-to-date PDFs are read back from storage, the
+others are rendered one at a time in the calling process and stored for
+later downloads. Only one PDF is held in memory at any time; no processes
+are started from the request worker.
+"""
+import zipfile
+
+from django.utils.text import get_valid_filename
+
+from .certificates import (
+    PDF_FIELDS,
+    certificate_storage,
+    new_certificate_number,
+    pdf_is_stale,
+    render_certificate_pdf,
+    store_certificate_pdf,
+)
+from .models import CourseCompletionCertificate, CourseProgress
+from .verification import record_issued
+
+# Attempts at inserting rows whose random numbers collided with existing ones.
+MAX_NUMBER_ATTEMPTS = 5
+
+
+def issue_class_certificates(teacher_class, course_id=None):
+    """Certificates of every enrolled student with a completed course of ``teacher_class``.
+
+    Returns ``(pairs, created)``: ``(certificate, progress)`` tuples with the
+    student, course and instructor loaded, and how many rows were inserted.
+    """
+    completed = CourseProgress.objects.filter(
+        course__teacher_class=teacher_class,
+        is_completed=True,
+        student__enrollments__teacher_class=teacher_class,
+    )
+    if course_id:
+        completed = completed.filter(course_id=course_id)
+    progress = {(row.student_id, row.course_id): row for row in completed}
+    if not progress:
+        return [], 0
+
+    certificates = CourseCompletionCertificate.objects.filter(
+        course__teacher_class=teacher_class,
+        student_id__in={student_id for student_id, _ in progress},
+    )
+    existing = set(certificates.values_list("student_id", "course_id"))
+    issued_before = existing & progress.keys()
+    for _ in range(MAX_NUMBER_ATTEMPTS):
+        missing = [pair for pair in progress if pair not in existing]
+        if not missing:
+            break
+        # Rows that hit a taken certificate number are skipped, then retried.
+        CourseCompletionCertificate.objects.bulk_create(
+            [
+                CourseCompletionCertificate(student_id=student_id, course_id=course_id, certificate_number=new_certificate_number())
+                for student_id, course_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+        existing = set(certificates.values_list("student_id", "course_id"))
+
+    pairs = [
+        (cert, progress[cert.student_id, cert.course_id])
+        for cert in certificates.select_related("student", "course__teacher_class__teacher").order_by(
+            "course__title", "student__username"
+        )
+        if (cert.student_id, cert.course_id) in progress
+    ]
+    # bulk_create sends no post_save, so do what its receiver does for new rows.
+    created = [cert.certificate_number for cert, _ in pairs if (cert.student_id, cert.course_id) not in issued_before]
+    record_issued(*created)
+    return pairs, len(created)
+
+
+def archive_name(cert):
+    folder = get_valid_filename(cert.course.title) or str(cert.course_id)
+    return f"{folder}/{get_valid_filename(cert.student.username)}-{cert.certificate_number}.pdf"
+
+
+class _ChunkBuffer:
+    """Write-only file for ``ZipFile`` whose contents are drained by the caller."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def certificate_zip_chunks(pairs):
+    """Yield a ZIP archive of the PDFs of ``pairs`` piece by piece."""
+    storage = certificate_storage()
+    stale = [(cert, progress) for cert, progress in pairs if pdf_is_stale(cert, progress, storage)]
+    stale_ids = {cert.id for cert, _ in stale}
+    buffer = _ChunkBuffer()
+    rendered = []
+    try:
+        # PDFs are already compressed; deflating them again only costs time.
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for cert, _ in pairs:
+                if cert.id not in stale_ids:
+                    with storage.open(cert.pdf_file, "rb") as stored:
+                        archive.writestr(archive_name(cert), stored.read())
+                    yield buffer.drain()
+            for cert, progress in stale:
+                pdf = render_certificate_pdf(cert, progress)
+                store_certificate_pdf(cert, pdf, storage)
+                rendered.append(cert)
+                archive.writestr(archive_name(cert), pdf)
+                yield buffer.drain()
+        yield buffer.drain()
+    finally:
+        if rendered:
+            CourseCompletionCertificate.objects.bulk_update(rendered, PDF_FIELDS)
@@ -0,0 +1,288 @@
+"""Rendering, storage and delivery of course certificate PDFs.
+
+A certificate's PDF is rendered once and kept in the storage configured by
+``CERTIFICATE_STORAGE`` (the local filesystem by default), along with its
+SHA-256. Later downloads stream the stored file with ETag/Last-Modified
+validators and single-range ``Range`` support instead of re-rendering.
+The PDF shows the student's score, so it is re-rendered when the student's
+progress changed after the stored copy was made. The stored file is
+removed once the deletion or revocation of its certificate commits.
+
+Rendering draws the static part of the page (border, headings, signature
+line) into a form XObject and places it under the certificate's own names,
+dates, number and score, using only reportlab's public canvas API.
+"""
+import hashlib
+import re
+import secrets
+import string
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+CHUNK_SIZE = 64 * 1024
+
+CERTIFICATE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def certificate_storage():
+    config = getattr(settings, "CERTIFICATE_STORAGE", {})
+    backend = config.get("BACKEND", "django.core.files.storage.FileSystemStorage")
+    return import_string(backend)(**config.get("OPTIONS", {}))
+
+
+def new_certificate_number():
+    """Unique-with-high-probability number: CH-YYYYMMDD-XXXXXX (random)."""
+    date_part = timezone.now().strftime("%Y%m%d")
+    rand_part = "".join(secrets.choice(CERTIFICATE_ALPHABET) for _ in range(6))
+    return f"CH-{date_part}-{rand_part}"
+
+
+def person_name(user):
+    return (user.first_name + " " + user.last_name).strip() or user.username
+
+
+def _draw_background(c, width, height):
+    """The parts of the page that are the same on every certificate."""
+    from reportlab.lib import colors
+
+    # Border
+    margin = 36
+    c.setStrokeColor(colors.HexColor("#6B46C1"))  # purple
+    c.setLineWidth(3)
+    c.rect(margin, margin, width - 2 * margin, height - 2 * margin)
+
+    # Title
+    c.setFont("Helvetica-Bold", 28)
+    c.setFillColor(colors.HexColor("#1F2937"))
+    c.drawCentredString(width / 2, height - 150, "Certificate of Completion")
+
+    # Subtitle
+    c.setFont("Helvetica", 14)
+    c.setFillColor(colors.HexColor("#374151"))
+    c.drawCentredString(width / 2, height - 180, "This certifies that")
+
+    # Course title line
+    c.drawCentredString(width / 2, height - 260, "has successfully completed the course")
+
+    # Signature line
+    c.setStrokeColor(colors.HexColor("#9CA3AF"))
+    c.setLineWidth(1)
+    c.line(width / 2 - 150, 120, width / 2 + 150, 120)
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.HexColor("#6B7280"))
+    c.drawCentredString(width / 2, 100, "Authorized Signature")
+
+
+def _draw_details(c, cert, progress, width, height):
+    """The per-certificate text; sets its own font and colour before each part."""
+    from reportlab.lib import colors
+
+    course = cert.course
+
+    # Student Name
+    c.setFont("Helvetica-Bold", 22)
+    c.setFillColor(colors.HexColor("#111827"))
+    c.drawCentredString(width / 2, height - 220, person_name(cert.student))
+
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(width / 2, height - 290, course.title)
+
+    # Additional details
+    teacher_name = ""
+    if course.teacher_class and course.teacher_class.teacher:
+        teacher_name = person_name(course.teacher_class.teacher)
+
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.HexColor("#6B7280"))
+    y = height - 340
+    if teacher_name:
+        c.drawCentredString(width / 2, y, f"Instructor: {teacher_name}")
+        y -= 20
+
+    c.drawCentredString(width / 2, y, f"Issued on: {cert.issued_at.strftime('%Y-%m-%d')}")
+    y -= 20
+    c.drawCentredString(width / 2, y, f"Certificate No: {cert.certificate_number}")
+    y -= 20
+
+    # Show score only if progress has been tracked
+    if progress and progress.total_score > 0:
+        c.drawCentredString(width / 2, y, f"Score: {progress.obtained_score:.1f} / {progress.total_score:.1f} ({progress.percentage:.1f}%)")
+        y -= 20
+
+
+BACKGROUND_FORM = "certificateBackground"
+
+
+def _new_canvas(buffer):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    return canvas.Canvas(buffer, pagesize=A4)
+
+
+def render_certificate_pdf(cert, progress):
+    """Return the PDF bytes of ``cert``: its own text over the background form.
+
+    The static page is drawn once into a form XObject and placed with
+    ``doForm``, so the page stream only carries the certificate's details.
+    """
+    from reportlab.lib.pagesizes import A4
+
+    width, height = A4
+    buffer = BytesIO()
+    c = _new_canvas(buffer)
+    c.beginForm(BACKGROUND_FORM)
+    _draw_background(c, width, height)
+    c.endForm()
+    c.doForm(BACKGROUND_FORM)
+    _draw_details(c, cert, progress, width, height)
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def render_certificate_pdf_direct(cert, progress):
+    """Same page drawn entirely with canvas calls; the baseline of ``benchmark_certificates``."""
+    from reportlab.lib.pagesizes import A4
+
+    width, height = A4
+    buffer = BytesIO()
+    c = _new_canvas(buffer)
+    _draw_background(c, width, height)
+    _draw_details(c, cert, progress, width, height)
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def pdf_is_stale(cert, progress, storage):
+    if not cert.pdf_file or not cert.pdf_rendered_at:
+        return True
+    if progress is not None and progress.updated_at > cert.pdf_rendered_at:
+        return True
+    return not storage.exists(cert.pdf_file)
+
+
+PDF_FIELDS = ["pdf_file", "pdf_sha256", "pdf_rendered_at"]
+
+
+def store_certificate_pdf(cert, pdf, storage):
+    """Save ``pdf`` as the file of ``cert`` and set its PDF fields (not saved to the DB)."""
+    name = f"{cert.certificate_number}.pdf"
+    if storage.exists(name):
+        storage.delete(name)
+    cert.pdf_file = storage.save(name, ContentFile(pdf))
+    cert.pdf_sha256 = hashlib.sha256(pdf).hexdigest()
+    cert.pdf_rendered_at = timezone.now()
+
+
+def discard_certificate_pdfs(*names):
+    """Remove the stored PDFs ``names`` once the current transaction commits.
+
+    A rollback keeps them, so a surviving row never points at a missing file.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: _delete_stored(names))
+
+
+def _delete_stored(names):
+    storage = certificate_storage()
+    for name in names:
+        storage.delete(name)
+
+
+def ensure_certificate_pdf(cert, progress, storage=None):
+    """Render and store the PDF of ``cert`` unless an up-to-date copy exists.
+
+    Returns the storage it lives in; ``cert.pdf_file`` / ``cert.pdf_sha256``
+    describe the stored file.
+    """
+    storage = storage or certificate_storage()
+    if not pdf_is_stale(cert, progress, storage):
+        return storage
+
+    store_certificate_pdf(cert, render_certificate_pdf(cert, progress), storage)
+    cert.save(update_fields=PDF_FIELDS)
+    return storage
+
+
+def _byte_range(header, size):
+    """``(start, end)`` inclusive for a single ``bytes=`` range, None to send the whole file.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _stream(fileobj, start, length):
+    with fileobj:
+        fileobj.seek(start)
+        while length > 0:
+            chunk = fileobj.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def certificate_file_response(request, cert, storage):
+    """Serve the stored PDF of ``cert`` with validators, 304s and Range support."""
+    etag = f'"{cert.pdf_sha256}"'
+    last_modified = int(cert.pdf_rendered_at.timestamp())
+    conditional = request.method in ("GET", "HEAD")
+    if conditional:
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    size = storage.size(cert.pdf_file)
+    byte_range = None
+    if conditional and request.META.get("HTTP_RANGE"):
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if not if_range or if_range == etag:
+            try:
+                byte_range = _byte_range(request.META["HTTP_RANGE"], size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _stream(storage.open(cert.pdf_file, "rb"), start, length),
+        status=206 if byte_range else 200,
+        content_type="application/pdf",
+    )
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(length)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Content-Disposition"] = f"attachment; filename=\"certificate_{cert.certificate_number}.pdf\""
+    patch_cache_control(response, private=True, max_age=getattr(settings, "CERTIFICATE_CACHE_MAX_AGE", 86400))
+    return response
@@ -0,0 +1,297 @@
+"""Whole-course import and export.
+
+The exchanged document has the shape of a course detail response
+(``CourseSerializer`` / ``flat_course``), so an export can be imported again
+as is. Import validates the whole tree first, then upserts every level with
+one bulk INSERT ... ON CONFLICT per table inside a transaction and drops the
+rows of the course that the document no longer contains.
+
+Rows are matched on stable keys so that importing the same document twice
+only rewrites the same rows: the ``id`` of each node when given, otherwise an id derived from the
+parent's id, the node kind and its position. A document without a course
+``id`` updates the course with the same title in the same class.
+"""
+import uuid
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .deletion import prune_course, under_courses
+from .flat_serializers import flat_course_header, flat_module
+from .models import Course, Exercise, KeyTakeaway, Lesson, Module, Resource, Topic
+from .prefetch import prefetch_lookups
+from .renderers import FastJSONRenderer
+from .tree_cache import invalidate_course_tree
+
+MAX_TOPIC_DEPTH = 32
+
+HERO_MEDIA_TYPES = ["image", "video"]
+
+
+class ImportItemSerializer(serializers.Serializer):
+    id = serializers.UUIDField(required=False, allow_null=True)
+    order = serializers.IntegerField(min_value=0, required=False)
+
+
+class ImportTakeawaySerializer(ImportItemSerializer):
+    content = serializers.CharField(trim_whitespace=False)
+
+
+class ImportExerciseSerializer(ImportItemSerializer):
+    title = serializers.CharField(max_length=255, allow_blank=True)
+    description = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
+
+class ImportResourceSerializer(ImportItemSerializer):
+    title = serializers.CharField(max_length=255, allow_blank=True)
+    description = serializers.CharField(allow_blank=True, required=False, default="", trim_whitespace=False)
+    url = serializers.URLField(max_length=500)
+
+
+class ImportContentSerializer(ImportItemSerializer):
+    """Fields shared by lessons and topics."""
+
+    title = serializers.CharField(max_length=255)
+    content = serializers.CharField(allow_blank=True, required=False, default="", trim_whitespace=False)
+    heroMediaType = serializers.ChoiceField(HERO_MEDIA_TYPES, required=False, allow_null=True, allow_blank=True)
+    heroMediaUrl = serializers.URLField(max_length=500, required=False, allow_null=True, allow_blank=True)
+    takeaways = ImportTakeawaySerializer(many=True, required=False, default=list)
+    exercises = ImportExerciseSerializer(many=True, required=False, default=list)
+    resources = ImportResourceSerializer(many=True, required=False, default=list)
+
+
+class ImportTopicSerializer(ImportContentSerializer):
+    parentId = serializers.UUIDField(required=False, allow_null=True)
+    children = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+
+    def validate_children(self, value):
+        depth = self.context.get("topic_depth", 1)
+        if value and depth >= MAX_TOPIC_DEPTH:
+            raise serializers.ValidationError(f"Topics can be nested at most {MAX_TOPIC_DEPTH} levels deep.")
+        children = ImportTopicSerializer(data=value, many=True, context={**self.context, "topic_depth": depth + 1})
+        children.is_valid(raise_exception=True)
+        return children.validated_data
+
+
+class ImportLessonSerializer(ImportContentSerializer):
+    topics = ImportTopicSerializer(many=True, required=False, default=list)
+
+
+class ImportModuleSerializer(ImportItemSerializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, required=False, default="")
+    lessons = ImportLessonSerializer(many=True, required=False, default=list)
+
+
+class CourseImportSerializer(serializers.Serializer):
+    id = serializers.UUIDField(required=False, allow_null=True)
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, required=False, default="")
+    teacherClassId = serializers.UUIDField(required=False, allow_null=True)
+    modules = ImportModuleSerializer(many=True, required=False, default=list)
+
+
+def _stable_id(node, parent_id, kind, index):
+    if node.get("id"):
+        return node["id"]
+    return uuid.uuid5(parent_id, f"{kind}:{index}")
+
+
+def _order(node, index):
+    return node.get("order", index)
+
+
+class _TreeRows:
+    """Model instances for every node of an import document, keyed by id."""
+
+    def __init__(self, course):
+        self.keys = {"course_id": course.id, "owner_teacher_id": course.teacher_class.teacher_id}
+        self.rows = {model: {} for model in (Module, Lesson, Topic, KeyTakeaway, Exercise, Resource)}
+
+    def add(self, obj):
+        # Last occurrence wins, so a topic listed both at the top level of its
+        # lesson and under its parent's children is stored once.
+        self.rows[type(obj)][obj.id] = obj
+
+    def add_items(self, node, parent_field, parent_id):
+        for index, item in enumerate(node["takeaways"]):
+            self.add(KeyTakeaway(
+                id=_stable_id(item, parent_id, "takeaway", index),
+                content=item["content"],
+                order=_order(item, index),
+                **{f"{parent_field}_id": parent_id},
+                **self.keys,
+            ))
+        for index, item in enumerate(node["exercises"]):
+            self.add(Exercise(
+                id=_stable_id(item, parent_id, "exercise", index),
+                title=item["title"],
+                description=item["description"],
+                order=_order(item, index),
+                **{f"{parent_field}_id": parent_id},
+                **self.keys,
+            ))
+        for index, item in enumerate(node["resources"]):
+            self.add(Resource(
+                id=_stable_id(item, parent_id, "resource", index),
+                title=item["title"],
+                description=item["description"],
+                url=item["url"],
+                order=_order(item, index),
+                **{f"{parent_field}_id": parent_id},
+                **self.keys,
+            ))
+
+    def add_topics(self, topics, lesson_id, parent_id):
+        for index, node in enumerate(topics):
+            topic_id = _stable_id(node, parent_id or lesson_id, "topic", index)
+            # Top-level entries may point at their parent through parentId.
+            parent = parent_id if parent_id is not None else node.get("parentId")
+            self.add(Topic(
+                id=topic_id,
+                lesson_id=lesson_id,
+                parent_id=parent,
+                title=node["title"],
+                content=node["content"],
+                hero_media_type=node.get("heroMediaType") or None,
+                hero_media_url=node.get("heroMediaUrl") or None,
+                order=_order(node, index),
+                **self.keys,
+            ))
+            self.add_items(node, "topic", topic_id)
+            self.add_topics(node["children"], lesson_id, topic_id)
+
+    def add_modules(self, modules):
+        course_id = self.keys["course_id"]
+        for index, node in enumerate(modules):
+            module_id = _stable_id(node, course_id, "module", index)
+            self.add(Module(
+                id=module_id,
+                course_id=course_id,
+                owner_teacher_id=self.keys["owner_teacher_id"],
+                title=node["title"],
+                description=node["description"],
+                order=_order(node, index),
+            ))
+            for lesson_index, lesson in enumerate(node["lessons"]):
+                lesson_id = _stable_id(lesson, module_id, "lesson", lesson_index)
+                self.add(Lesson(
+                    id=lesson_id,
+                    module_id=module_id,
+                    title=lesson["title"],
+                    content=lesson["content"],
+                    hero_media_type=lesson.get("heroMediaType") or None,
+                    hero_media_url=lesson.get("heroMediaUrl") or None,
+                    order=_order(lesson, lesson_index),
+                    **self.keys,
+                ))
+                self.add_items(lesson, "lesson", lesson_id)
+                self.add_topics(lesson["topics"], lesson_id, None)
+
+    def validate_topic_parents(self):
+        topics = self.rows[Topic]
+        for topic in topics.values():
+            parent = topics.get(topic.parent_id) if topic.parent_id else None
+            if topic.parent_id and (parent is None or parent.lesson_id != topic.lesson_id):
+                raise serializers.ValidationError(
+                    {"topics": f"Topic {topic.id} has a parentId outside of its lesson in this document."}
+                )
+
+    def foreign_ids(self):
+        """Ids of the document that already belong to another course (by their parents)."""
+        course_id = self.keys["course_id"]
+        found = []
+        for model, rows in self.rows.items():
+            if rows:
+                existing = model.objects.filter(id__in=list(rows)).exclude(under_courses(model, [course_id]))
+                found += existing.values_list("id", flat=True)
+        return found
+
+
+# Keys of the import summary, per model.
+COUNT_NAMES = {
+    Module: "modules",
+    Lesson: "lessons",
+    Topic: "topics",
+    KeyTakeaway: "takeaways",
+    Exercise: "exercises",
+    Resource: "resources",
+}
+
+# Columns written on conflict; everything but the primary key and created_at.
+UPSERT_FIELDS = {
+    Module: ["course", "owner_teacher", "title", "description", "order", "updated_at"],
+    Lesson: ["module", "course", "owner_teacher", "title", "content", "hero_media_type", "hero_media_url", "order", "updated_at"],
+    Topic: ["lesson", "parent", "course", "owner_teacher", "title", "content", "hero_media_type", "hero_media_url", "order", "updated_at"],
+    KeyTakeaway: ["lesson", "topic", "course", "owner_teacher", "content", "order", "updated_at"],
+    Exercise: ["lesson", "topic", "course", "owner_teacher", "title", "description", "order", "updated_at"],
+    Resource: ["lesson", "topic", "course", "owner_teacher", "title", "description", "url", "order", "updated_at"],
+}
+
+
+def import_course(data, course):
+    """Upsert the validated document ``data`` into ``course`` (saved, with its class).
+
+    Returns ``{relation: rows written}`` plus the number of rows deleted
+    because they were missing from the document.
+    """
+    tree = _TreeRows(course)
+    tree.add_modules(data["modules"])
+    tree.validate_topic_parents()
+    foreign = tree.foreign_ids()
+    if foreign:
+        raise serializers.ValidationError({"ids": [f"{pk} belongs to another course." for pk in foreign[:20]]})
+
+    counts = {}
+    with transaction.atomic():
+        for model, rows in tree.rows.items():
+            model.objects.bulk_create(
+                rows.values(),
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=UPSERT_FIELDS[model],
+            )
+            counts[COUNT_NAMES[model]] = len(rows)
+        counts["deleted"] = prune_course(course.id, {model: list(rows) for model, rows in tree.rows.items()})
+        invalidate_course_tree(course.id)
+    return counts
+
+
+def save_course_import(data, course, teacher_class):
+    """Create or update ``course`` (None for a new one) from ``data`` and import its tree.
+
+    Returns ``(course, created, counts)``; ``counts`` as for ``import_course``.
+    """
+    created = course is None
+    with transaction.atomic():
+        if created:
+            course = Course(id=data["id"]) if data.get("id") else Course()
+        course.teacher_class = teacher_class
+        course.title = data["title"]
+        course.description = data["description"]
+        course.save()
+        counts = import_course(data, course)
+    return course, created, counts
+
+
+def export_course_chunks(course, modules_per_query=1):
+    """Yield the JSON document of ``course`` in pieces, a few modules at a time.
+
+    Only ``modules_per_query`` module trees are held in memory at once; each
+    chunk is loaded with the prefetch plan of the module viewset.
+    """
+    renderer = FastJSONRenderer()
+    header = renderer.render(flat_course_header(course))
+    yield header[:-1] + b',"modules":['
+
+    module_ids = list(Module.objects.filter(course=course).values_list("id", flat=True))
+    lookups = prefetch_lookups("module")
+    first = True
+    for start in range(0, len(module_ids), modules_per_query):
+        chunk = module_ids[start:start + modules_per_query]
+        modules = {module.id: module for module in Module.objects.filter(id__in=chunk).prefetch_related(*lookups)}
+        for module_id in chunk:
+            if module_id in modules:
+                yield (b"" if first else b",") + renderer.render(flat_module(modules[module_id]))
+                first = False
+    yield b"]}"
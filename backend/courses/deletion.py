@@ -0,0 +1,133 @@
+"""Set-based deletion of course subtrees.
+
+``QuerySet.delete()`` goes through Django's Collector, which loads every
+descendant row into memory (to cascade and to send ``post_delete``) before
+deleting. The helpers below delete a subtree leaf-first with one DELETE per
+table instead, filtering on parent ids. Rows reach their course through the
+parent chain; the denormalized ``course`` key is only trusted as an extra
+match, so a row whose key is NULL or stale cannot survive its parent (and
+fail the foreign key check). They bypass ``post_delete`` signals, so the
+affected course trees are invalidated here explicitly.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .certificates import discard_certificate_pdfs
+from .models import (
+    Course,
+    CourseCompletionCertificate,
+    CourseProgress,
+    Exercise,
+    KeyTakeaway,
+    Lesson,
+    Module,
+    Resource,
+    Topic,
+)
+from .tree_cache import invalidate_course_tree
+from .verification import forget_verification
+
+ITEM_MODELS = (KeyTakeaway, Exercise, Resource)
+
+# How the rows of each content model reach their course through parent keys.
+COURSE_PATHS = {
+    Module: ("course_id",),
+    Lesson: ("module__course_id",),
+    Topic: ("lesson__module__course_id",),
+    **{model: ("lesson__module__course_id", "topic__lesson__module__course_id") for model in ITEM_MODELS},
+}
+
+
+def _raw_delete(queryset):
+    # Single DELETE ... WHERE, no Collector: callers delete children first.
+    # Django returns None instead of 0 when the filter cannot match (e.g. ``__in=[]``).
+    return queryset._raw_delete(queryset.db) or 0
+
+
+def _topic_subtree_ids(topic_ids):
+    """``topic_ids`` plus every descendant, one query per tree level."""
+    found = set(topic_ids)
+    frontier = found
+    while frontier:
+        frontier = set(Topic.objects.filter(parent_id__in=frontier).values_list("id", flat=True)) - found
+        found |= frontier
+    return found
+
+
+def under_courses(model, ids):
+    """Q matching the rows of ``model`` whose parent chain ends in one of the courses ``ids``."""
+    condition = Q()
+    for path in COURSE_PATHS[model]:
+        condition |= Q(**{f"{path}__in": ids})
+    return condition
+
+
+def _subtree_querysets(level, ids):
+    """Querysets covering the subtree under ``ids``, children before parents."""
+    if level == "course":
+        return [
+            *(
+                # Rows pointing at a deleted course must go too, wherever they hang.
+                model.objects.filter(under_courses(model, ids) | Q(course_id__in=ids))
+                for model in (*ITEM_MODELS, Topic, Lesson, Module)
+            ),
+            CourseCompletionCertificate.objects.filter(course_id__in=ids),
+            CourseProgress.objects.filter(course_id__in=ids),
+            Course.objects.filter(id__in=ids),
+        ]
+    if level == "module":
+        return [
+            *(
+                model.objects.filter(Q(lesson__module_id__in=ids) | Q(topic__lesson__module_id__in=ids))
+                for model in ITEM_MODELS
+            ),
+            Topic.objects.filter(lesson__module_id__in=ids),
+            Lesson.objects.filter(module_id__in=ids),
+            Module.objects.filter(id__in=ids),
+        ]
+    if level == "lesson":
+        return [
+            *(model.objects.filter(Q(lesson_id__in=ids) | Q(topic__lesson_id__in=ids)) for model in ITEM_MODELS),
+            Topic.objects.filter(lesson_id__in=ids),
+            Lesson.objects.filter(id__in=ids),
+        ]
+    if level == "topic":
+        ids = _topic_subtree_ids(ids)
+        return [
+            *(model.objects.filter(topic_id__in=ids) for model in ITEM_MODELS),
+            Topic.objects.filter(id__in=ids),
+        ]
+    raise ValueError(f"Unknown level: {level}")
+
+
+def delete_subtrees(level, ids, course_ids):
+    """Delete the ``level`` rows in ``ids`` and everything below them.
+
+    ``course_ids`` are the courses the rows belong to; their cached trees are
+    invalidated once the deletion commits. Returns the number of rows deleted
+    across all tables, like ``QuerySet.delete()``.
+    """
+    with transaction.atomic():
+        # Certificates only go with their course; their cached verifications and stored PDFs must go too.
+        certificates = []
+        if level == "course":
+            certificates = list(CourseCompletionCertificate.objects.filter(course_id__in=ids).values_list("certificate_number", "pdf_file"))
+        deleted = sum(_raw_delete(queryset) for queryset in _subtree_querysets(level, list(ids)))
+        for course_id in set(course_ids):
+            invalidate_course_tree(course_id)
+        forget_verification(*(number for number, _ in certificates))
+        discard_certificate_pdfs(*(pdf_file for _, pdf_file in certificates))
+    return deleted
+
+
+def prune_course(course_id, keep):
+    """Delete the content rows of ``course_id`` whose ids are not in ``keep[model]``.
+
+    Used by the course import to drop rows missing from the imported document.
+    Runs leaf-first like ``delete_subtrees``; the caller invalidates the tree.
+    """
+    deleted = 0
+    for model in (*ITEM_MODELS, Topic, Lesson, Module):
+        queryset = model.objects.filter(under_courses(model, [course_id])).exclude(id__in=keep.get(model, ()))
+        deleted += _raw_delete(queryset)
+    return deleted
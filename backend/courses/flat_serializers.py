@@ -0,0 +1,140 @@
+"""Flattened, read-only equivalents of the nested course serializers.
+
+`CourseSerializer` walks every field of every node through DRF's generic
+`to_representation`, which dominates the cost of building a course tree.
+These functions produce the same dicts (same keys, order and values) with
+plain attribute access. They must be kept in step with `serializers.py`;
+`FlatSerializerTest` compares both outputs byte for byte.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .serializers import build_topic_children
+
+
+def _datetime(value):
+    # Mirrors DRF's DateTimeField.to_representation with the ISO-8601 default.
+    if not value:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _str_or_none(value):
+    return None if value is None else str(value)
+
+
+def flat_takeaway(obj):
+    return {
+        "id": str(obj.id),
+        "content": str(obj.content),
+        "order": int(obj.order),
+        "lessonId": obj.lesson_id,
+        "topicId": obj.topic_id,
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_exercise(obj):
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "description": str(obj.description),
+        "order": int(obj.order),
+        "lessonId": obj.lesson_id,
+        "topicId": obj.topic_id,
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_resource(obj):
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "description": str(obj.description),
+        "url": str(obj.url),
+        "order": int(obj.order),
+        "lessonId": obj.lesson_id,
+        "topicId": obj.topic_id,
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_topic(obj, tree):
+    """Serialize a topic; `tree` maps parent ids to children (see build_topic_children)."""
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "content": str(obj.content),
+        "order": int(obj.order),
+        "lessonId": obj.lesson_id,
+        "parentId": obj.parent_id,
+        "heroMediaType": _str_or_none(obj.hero_media_type),
+        "heroMediaUrl": _str_or_none(obj.hero_media_url),
+        "children": [flat_topic(child, tree) for child in tree.get(obj.id, ())],
+        "takeaways": [flat_takeaway(item) for item in obj.takeaways.all()],
+        "exercises": [flat_exercise(item) for item in obj.exercises.all()],
+        "resources": [flat_resource(item) for item in obj.resources.all()],
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_lesson(obj):
+    topics = obj.topics.all()
+    tree = build_topic_children(topics)
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "content": str(obj.content),
+        "heroMediaType": _str_or_none(obj.hero_media_type),
+        "heroMediaUrl": _str_or_none(obj.hero_media_url),
+        "order": int(obj.order),
+        "moduleId": obj.module_id,
+        "topics": [flat_topic(topic, tree) for topic in topics],
+        "takeaways": [flat_takeaway(item) for item in obj.takeaways.all()],
+        "exercises": [flat_exercise(item) for item in obj.exercises.all()],
+        "resources": [flat_resource(item) for item in obj.resources.all()],
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_module(obj):
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "description": str(obj.description),
+        "order": int(obj.order),
+        "courseId": obj.course_id,
+        "lessons": [flat_lesson(lesson) for lesson in obj.lessons.all()],
+        "createdAt": _datetime(obj.created_at),
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_course_header(obj):
+    """The fields of `flat_course` that precede `modules`."""
+    return {
+        "id": str(obj.id),
+        "title": str(obj.title),
+        "description": str(obj.description),
+        "teacherClassId": obj.teacher_class_id,
+        "createdAt": obj.created_at.isoformat() if obj.created_at else None,
+        "updatedAt": _datetime(obj.updated_at),
+    }
+
+
+def flat_course(obj):
+    """Same output as `CourseSerializer(obj).data` for a read-only course tree."""
+    return {
+        **flat_course_header(obj),
+        "modules": [flat_module(module) for module in obj.modules.all()],
+    }
@@ -0,0 +1,224 @@
+"""Database-backed background jobs.
+
+Work that is too slow for a request worker (rendering certificates, large
+deletes and imports) is stored as a ``Job`` row and executed by
+``python manage.py run_jobs``; no broker is needed. Handlers are registered
+per job kind with ``job_handler`` and receive the job's JSON payload; what
+they return is stored as the job's result.
+
+Workers claim the most urgent due job (highest ``priority``, then oldest)
+with a conditional UPDATE, so several workers can share the table. Each
+queue runs at most ``JOB_CONCURRENCY[queue]`` jobs at once across all
+workers; the limit is checked just before claiming, so two workers racing
+for the last slot can briefly exceed it by one. Failed jobs are retried
+with exponential backoff until ``max_attempts``; jobs left running by a
+dead worker are requeued after ``JOB_LOCK_TIMEOUT`` seconds.
+
+Housekeeping runs as jobs too: ``schedule_periodic`` (called by the worker
+loop) queues a purge of expired sessions every SESSION_PURGE_INTERVAL
+seconds, so no user request pays for it.
+"""
+import logging
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count, F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Course, CourseCompletionCertificate, CourseProgress, Job, JobStatus, TeacherClass
+
+logger = logging.getLogger(__name__)
+
+# Errors that a retry cannot fix; the job fails at once.
+PERMANENT_ERRORS = (ObjectDoesNotExist, serializers.ValidationError)
+
+PENDING = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    func: object
+    queue: str
+    priority: int
+    max_attempts: int
+
+
+HANDLERS = {}
+
+
+def job_handler(kind, queue="default", priority=0, max_attempts=3):
+    """Register the decorated function as the handler of ``kind`` jobs."""
+    def register(func):
+        HANDLERS[kind] = JobHandler(func, queue, priority, max_attempts)
+        return func
+    return register
+
+
+def enqueue(kind, payload, user=None, key="", priority=None):
+    """Queue a ``kind`` job, or return the pending job with the same ``key``."""
+    handler = HANDLERS[kind]
+    if key:
+        pending = Job.objects.filter(key=key, status__in=PENDING).first()
+        if pending is not None:
+            return pending
+    return Job.objects.create(
+        kind=kind,
+        queue=handler.queue,
+        key=key,
+        payload=payload,
+        priority=handler.priority if priority is None else priority,
+        max_attempts=handler.max_attempts,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def job_url(job):
+    return reverse("job-detail", args=[job.id])
+
+
+def _concurrency(queue):
+    limits = settings.JOB_CONCURRENCY
+    return limits.get(queue, limits.get("default", 1))
+
+
+def requeue_stale(now=None):
+    """Put back jobs whose worker stopped reporting; returns how many."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=JobStatus.RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=JobStatus.FAILED, finished_at=now, last_error="Worker timed out."
+    )
+    return failed + stale.update(status=JobStatus.QUEUED, locked_by="", run_after=now)
+
+
+def claim_next(worker, queues=None):
+    """Mark the most urgent due job as running for ``worker`` and return it (or None)."""
+    now = timezone.now()
+    running = dict(
+        Job.objects.filter(status=JobStatus.RUNNING).values_list("queue").annotate(Count("id")).order_by()
+    )
+    full = [queue for queue, count in running.items() if count >= _concurrency(queue)]
+    due = Job.objects.filter(status=JobStatus.QUEUED, run_after__lte=now).exclude(queue__in=full)
+    if queues:
+        due = due.filter(queue__in=queues)
+    for job_id in due.order_by("-priority", "run_after", "created_at").values_list("id", flat=True)[:10]:
+        claimed = Job.objects.filter(id=job_id, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, locked_by=worker, started_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome.
+
+    The outcome is only written while the job is still this run's claim: a
+    job that ``requeue_stale`` put back (and another worker may have claimed
+    again, bumping ``attempts``) belongs to its new run.
+    """
+    handler = HANDLERS.get(job.kind)
+    now = timezone.now()
+    outcome = {"locked_by": "", "updated_at": now}
+    try:
+        if handler is None:
+            raise LookupError(f"No handler for job kind {job.kind!r}")
+        result = handler.func(job.payload)
+    except Exception as exc:
+        outcome["last_error"] = "".join(traceback.format_exception_only(exc)).strip()
+        retry = not isinstance(exc, (*PERMANENT_ERRORS, LookupError)) and job.attempts < job.max_attempts
+        if retry:
+            outcome["status"] = JobStatus.QUEUED
+            outcome["run_after"] = now + timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            outcome["status"] = JobStatus.FAILED
+            outcome["finished_at"] = now
+        logger.warning("Job %s (%s) failed on attempt %s: %s", job.id, job.kind, job.attempts, outcome["last_error"])
+    else:
+        outcome.update(status=JobStatus.SUCCEEDED, result=result, finished_at=now)
+    recorded = Job.objects.filter(id=job.id, status=JobStatus.RUNNING, attempts=job.attempts).update(**outcome)
+    if not recorded:
+        logger.warning("Job %s (%s) was requeued while running; discarding the outcome of attempt %s.", job.id, job.kind, job.attempts)
+        job.refresh_from_db()
+        return job
+    for name, value in outcome.items():
+        setattr(job, name, value)
+    return job
+
+
+PURGE_LOCK_KEY = "session-purge-lock"
+
+
+def schedule_periodic():
+    """Queue the housekeeping jobs that are due; returns how many were queued.
+
+    A cache lock per interval makes one worker queue them when several share
+    the (shared) cache; the job key keeps a single one pending.
+    """
+    interval = getattr(settings, "SESSION_PURGE_INTERVAL", 3600)
+    if interval and cache.add(PURGE_LOCK_KEY, True, interval):
+        enqueue("sessions.purge", {}, key="sessions.purge")
+        return 1
+    return 0
+
+
+def run_pending(worker="inline", queues=None, limit=None):
+    """Run due jobs until none is left (or ``limit`` ran); returns how many ran."""
+    ran = 0
+    requeue_stale()
+    while limit is None or ran < limit:
+        job = claim_next(worker, queues)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+@job_handler("certificate.render", queue="certificates", priority=10)
+def render_certificate(payload):
+    from .certificates import ensure_certificate_pdf
+
+    cert = CourseCompletionCertificate.objects.select_related("student", "course__teacher_class__teacher").get(
+        id=payload["certificate_id"]
+    )
+    progress = CourseProgress.objects.filter(student_id=cert.student_id, course_id=cert.course_id).first()
+    ensure_certificate_pdf(cert, progress)
+    return {
+        "certificateNumber": cert.certificate_number,
+        "downloadUrl": reverse("course-certificate-pdf", args=[cert.course_id]),
+    }
+
+
+@job_handler("sessions.purge", priority=-10, max_attempts=1)
+def purge_sessions(payload):
+    # One DELETE of the expired rows for the database-backed engines.
+    import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+    return {}
+
+
+@job_handler("content.delete", priority=0)
+def delete_content(payload):
+    from .deletion import delete_subtrees
+
+    return {"deleted": delete_subtrees(payload["level"], payload["ids"], payload["course_ids"])}
+
+
+@job_handler("course.import", queue="imports", priority=5)
+def import_course_document(payload):
+    from .course_io import CourseImportSerializer, save_course_import
+
+    serializer = CourseImportSerializer(data=payload["document"])
+    serializer.is_valid(raise_exception=True)
+    course = Course.objects.filter(id=payload["course_id"]).first() if payload["course_id"] else None
+    teacher_class = TeacherClass.objects.get(id=payload["teacher_class_id"])
+    course, created, counts = save_course_import(serializer.validated_data, course, teacher_class)
+    return {"id": str(course.id), "created": created, **counts}
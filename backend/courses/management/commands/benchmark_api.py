@@ -0,0 +1,93 @@
+import json
+import platform
+import subprocess
+import tempfile
+from dataclasses import asdict, fields
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from courses.benchmark import ROLES, Scale, build_dataset, compare_reports, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark every API endpoint on a synthetic dataset in a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiply every dataset dimension except topic depth")
+        for field in fields(Scale):
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, dest=field.name, help=f"Override {field.name}")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed calls per endpoint and role")
+        parser.add_argument("--cold-cache", action="store_true", help="Clear the cache before every call")
+        parser.add_argument("--endpoint", action="append", help="Only run this endpoint (repeatable)")
+        parser.add_argument("--role", action="append", choices=ROLES, help="Only run as this role (repeatable)")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+        parser.add_argument("--baseline", help="Earlier report; fail if query counts or p50 latency regressed")
+
+    def handle(self, *args, **options):
+        scale = Scale().multiplied(options["scale"])
+        overrides = {field.name: options[field.name] for field in fields(Scale) if options[field.name] is not None}
+        scale = Scale(**{**asdict(scale), **overrides})
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Certificate PDFs rendered by the run are thrown away with the database.
+        media = tempfile.TemporaryDirectory()
+        try:
+            with override_settings(CERTIFICATE_STORAGE={"OPTIONS": {"location": media.name}}):
+                dataset = build_dataset(scale)
+                results = run_benchmark(
+                    dataset,
+                    repeat=options["repeat"],
+                    cold_cache=options["cold_cache"],
+                    endpoints=options["endpoint"],
+                    roles=options["role"] or ROLES,
+                )
+        finally:
+            media.cleanup()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "commit": self.git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+                "cold_cache": options["cold_cache"],
+                "scale": asdict(scale),
+                "rows": dataset["counts"],
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Report for {len(results)} endpoint/role pairs written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                regressions = compare_reports(json.load(fh), report)
+            for row in regressions:
+                before, after = row["before"], row["after"]
+                self.stderr.write(
+                    f"{row['endpoint']} [{row['role']}]: queries {before['queries']} -> {after['queries']}, "
+                    f"p50 {before['p50_ms']} -> {after['p50_ms']} ms"
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against {options['baseline']}")
+
+    def git_commit(self):
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,73 @@
+import base64
+import re
+import tempfile
+import time
+import zlib
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from courses.bulk_certificates import certificate_zip_chunks
+from courses.certificates import render_certificate_pdf, render_certificate_pdf_direct
+from courses.models import Course, CourseCompletionCertificate, CourseProgress, TeacherClass
+
+STREAM_RE = re.compile(rb"stream\r?\n(.*?)~>endstream", re.S)
+TEXT_RE = re.compile(r"\((.*?)\) Tj")
+
+
+def page_text(pdf):
+    """Sorted strings drawn anywhere in a certificate PDF (page and forms), for comparisons.
+
+    Relies on how reportlab encodes content streams (ASCII85 over Flate), so
+    it is only meant for this benchmark and the tests.
+    """
+    strings = []
+    for stream in STREAM_RE.findall(pdf):
+        content = zlib.decompress(base64.a85decode(stream.replace(b"\n", b""))).decode("latin-1")
+        strings += TEXT_RE.findall(content)
+    return sorted(strings)
+
+
+def sample_certificate(number="CH-20260101-ABC123"):
+    """An unsaved certificate with every optional line filled in."""
+    teacher = User(username="teacher", first_name="Ada", last_name="Lovelace")
+    course = Course(title="Introduction to Analytical Engines", teacher_class=TeacherClass(teacher=teacher, name="Class"))
+    student = User(username="student", first_name="Charles", last_name="Babbage")
+    cert = CourseCompletionCertificate(
+        student=student, course=course, certificate_number=number, issued_at=timezone.now()
+    )
+    return cert, CourseProgress(student=student, course=course, obtained_score=42, total_score=50)
+
+
+class Command(BaseCommand):
+    help = "Compare certificate rendering paths (full page vs background form) and time a class-wide ZIP"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=500, help="Timed renders per path")
+        parser.add_argument("--cohort", type=int, default=300, help="Certificates of the class-wide issuance timing")
+
+    def handle(self, *args, **options):
+        cert, progress = sample_certificate()
+
+        direct, templated = render_certificate_pdf_direct(cert, progress), render_certificate_pdf(cert, progress)
+        if page_text(direct) != page_text(templated):
+            raise CommandError("The certificate drawn over the background form does not contain the same text as the direct one.")
+        self.stdout.write(self.style.SUCCESS(f"Same text on both pages ({len(direct)} / {len(templated)} bytes)"))
+
+        timings = {}
+        for name, render in (("direct", render_certificate_pdf_direct), ("form", render_certificate_pdf)):
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                render(cert, progress)
+            timings[name] = (time.perf_counter() - started) / options["repeat"] * 1000
+            self.stdout.write(f"{name:>8}: {timings[name]:.3f} ms per certificate ({1000 / timings[name]:.0f}/s)")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {timings['direct'] / timings['form']:.2f}x"))
+
+        # Class-wide issuance: render, store and zip a cohort, as issue-certificates does.
+        cohort = [sample_certificate(f"CH-20260101-{i:06d}") for i in range(options["cohort"])]
+        with tempfile.TemporaryDirectory() as media, override_settings(CERTIFICATE_STORAGE={"OPTIONS": {"location": media}}):
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in certificate_zip_chunks(cohort))
+            self.stdout.write(f"     zip: {time.perf_counter() - started:.2f} s for {len(cohort)} certificates ({size} bytes)")
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from courses.flat_serializers import flat_course
+from courses.models import Course
+from courses.renderers import FastJSONRenderer
+from courses.serializers import CourseSerializer
+from courses.tree_cache import COURSE_TREE_PREFETCH
+
+
+class Command(BaseCommand):
+    help = "Compare CourseSerializer + JSONRenderer with flat_course + FastJSONRenderer on the stored courses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per path")
+        parser.add_argument("--course", help="Only benchmark this course id")
+
+    def handle(self, *args, **options):
+        courses = Course.objects.prefetch_related(*COURSE_TREE_PREFETCH)
+        if options["course"]:
+            courses = courses.filter(id=options["course"])
+        courses = list(courses)
+        if not courses:
+            raise CommandError("No courses to benchmark; seed some data first.")
+
+        def baseline():
+            return JSONRenderer().render(CourseSerializer(courses, many=True).data)
+
+        def fast():
+            return FastJSONRenderer().render([flat_course(course) for course in courses])
+
+        expected, actual = baseline(), fast()
+        if expected != actual:
+            raise CommandError("Rendered output differs from CourseSerializer + JSONRenderer.")
+        self.stdout.write(self.style.SUCCESS(f"Output identical: {len(actual)} bytes for {len(courses)} courses"))
+
+        timings = {}
+        for name, render in (("baseline", baseline), ("fast", fast)):
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                render()
+            timings[name] = (time.perf_counter() - started) / options["repeat"] * 1000
+            self.stdout.write(f"{name:>8}: {timings[name]:.2f} ms per render")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {timings['baseline'] / timings['fast']:.1f}x"))
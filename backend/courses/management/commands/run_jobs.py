@@ -0,0 +1,40 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.jobs import claim_next, requeue_stale, run_job, schedule_periodic
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (certificate rendering, large deletes and imports)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", action="append", dest="queues", help="Only run jobs of this queue (repeatable)")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is due instead of waiting for more")
+        parser.add_argument("--max-jobs", type=int, help="Exit after running this many jobs")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when no job is due")
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        ran = 0
+        last_sweep = 0.0
+        try:
+            while options["max_jobs"] is None or ran < options["max_jobs"]:
+                if time.monotonic() - last_sweep > 60:
+                    requeue_stale()
+                    schedule_periodic()
+                    last_sweep = time.monotonic()
+                job = claim_next(worker, options["queues"])
+                if job is None:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                job = run_job(job)
+                ran += 1
+                self.stdout.write(f"{job.kind} {job.id}: {job.status}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)"))
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_ownership(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Module = apps.get_model('courses', 'Module')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Topic = apps.get_model('courses', 'Topic')
+
+    def keys_of(model, ref):
+        parent = model.objects.filter(pk=OuterRef(ref))
+        return {
+            'course_id': Subquery(parent.values('course_id')[:1]),
+            'owner_teacher_id': Subquery(parent.values('owner_teacher_id')[:1]),
+        }
+
+    # Top-down, so each level copies from an already backfilled parent.
+    Module.objects.update(
+        owner_teacher_id=Subquery(
+            Course.objects.filter(pk=OuterRef('course_id')).values('teacher_class__teacher_id')[:1]
+        )
+    )
+    Lesson.objects.update(**keys_of(Module, 'module_id'))
+    Topic.objects.update(**keys_of(Lesson, 'lesson_id'))
+    for name in ('KeyTakeaway', 'Exercise', 'Resource'):
+        model = apps.get_model('courses', name)
+        model.objects.filter(lesson__isnull=False).update(**keys_of(Lesson, 'lesson_id'))
+        model.objects.filter(lesson__isnull=True).update(**keys_of(Topic, 'topic_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_courseprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='keytakeaway',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='keytakeaway',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='owner_teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_ownership, migrations.RunPython.noop),
+    ]
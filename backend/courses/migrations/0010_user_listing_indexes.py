@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+# auth_user columns searched by case-insensitive prefix in the user listing.
+PREFIX_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+
+
+def _index_statements(apps, schema_editor):
+    table = schema_editor.quote_name(apps.get_model('auth', 'User')._meta.db_table)
+    vendor = schema_editor.connection.vendor
+    exists = 'IF NOT EXISTS ' if vendor in ('postgresql', 'sqlite') else ''
+    for column in PREFIX_COLUMNS:
+        name = schema_editor.quote_name(f'courses_user_{column}_prefix')
+        if vendor == 'postgresql':
+            # Matches the UPPER(col::text) LIKE UPPER('x%') that istartswith generates.
+            expression = f'UPPER({column}::text) text_pattern_ops'
+        elif vendor == 'sqlite':
+            expression = f'{column} COLLATE NOCASE'
+        else:
+            expression = column
+        yield name, f'CREATE INDEX {exists}{name} ON {table} ({expression})'
+    name = schema_editor.quote_name('courses_user_date_joined')
+    yield name, f'CREATE INDEX {exists}{name} ON {table} (date_joined)'
+
+
+def create_user_indexes(apps, schema_editor):
+    for _, sql in _index_statements(apps, schema_editor):
+        schema_editor.execute(sql)
+
+
+def drop_user_indexes(apps, schema_editor):
+    table = schema_editor.quote_name(apps.get_model('auth', 'User')._meta.db_table)
+    on_table = f' ON {table}' if schema_editor.connection.vendor == 'mysql' else ''
+    for name, _ in _index_statements(apps, schema_editor):
+        schema_editor.execute(f'DROP INDEX {name}{on_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_content_ownership_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='role',
+            field=models.CharField(choices=[('admin', 'Admin'), ('teacher', 'Teacher'), ('student', 'Student')], db_index=True, default='student', max_length=10),
+        ),
+        migrations.RunPython(create_user_indexes, drop_user_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_job_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecompletioncertificate',
+            name='revoked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='coursecompletioncertificate',
+            index=models.Index(condition=models.Q(('revoked_at__isnull', False)), fields=['certificate_number'], name='certificate_revoked_idx'),
+        ),
+    ]
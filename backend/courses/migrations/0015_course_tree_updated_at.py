@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_certificate_revocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='tree_updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
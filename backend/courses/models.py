@@ -1,6 +1,97 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def content_models():
+    """Content models carrying a ``course`` and denormalized ``owner_teacher`` key."""
+    return (Module, Lesson, Topic, KeyTakeaway, Exercise, Resource)
+
+
+def _saves_any(update_fields, names):
+    """Whether a save with ``update_fields`` writes any of the foreign keys ``names``."""
+    if update_fields is None:
+        return True
+    return any(name in update_fields or f"{name}_id" in update_fields for name in names)
+
+
+def _remember_keys(instance, names, update_fields=None):
+    """Record the foreign keys ``names`` as stored, for ``_key_changed``."""
+    instance._stored_keys = {
+        **getattr(instance, "_stored_keys", {}),
+        **{
+            name: instance.__dict__[f"{name}_id"]
+            for name in names
+            if f"{name}_id" in instance.__dict__ and _saves_any(update_fields, [name])
+        },
+    }
+
+
+def _key_changed(instance, name, kwargs):
+    """Whether saving an existing ``instance`` changes its stored foreign key ``name``.
+
+    Compared with the value recorded when the row was loaded or last saved;
+    only instances built in memory or loaded without the key are looked up
+    with one query. A save whose ``update_fields`` leaves the key alone does
+    not change it.
+    """
+    if instance._state.adding or not _saves_any(kwargs.get("update_fields"), [name]):
+        return False
+    stored = getattr(instance, "_stored_keys", {})
+    if name in stored:
+        previous = stored[name]
+    else:
+        previous = type(instance).objects.filter(pk=instance.pk).values_list(f"{name}_id", flat=True).first()
+    return previous != getattr(instance, f"{name}_id")
+
+
+def _parent_keys(instance, name):
+    """``(course_id, owner_teacher_id)`` of the parent row in the foreign key ``name``.
+
+    Taken from the parent instance when it is already loaded, otherwise read
+    with one query.
+    """
+    field = instance._meta.get_field(name)
+    parent_id = getattr(instance, field.attname)
+    if parent_id is None:
+        return None, None
+    parent = field.get_cached_value(instance, None)
+    if parent is not None and parent.pk == parent_id:
+        return parent.course_id, parent.owner_teacher_id
+    keys = field.related_model.objects.filter(pk=parent_id).values_list("course_id", "owner_teacher_id")
+    return keys.first() or (None, None)
+
+
+def _inherit_ownership(instance, parent_fields, kwargs):
+    """Copy ``(course_id, owner_teacher_id)`` from the parent row onto ``instance``.
+
+    ``parent_fields`` are the foreign keys the parent may hang off, tried in
+    order. A save whose ``update_fields`` leaves all of them alone keeps the
+    current keys without looking anything up.
+
+    Records the course the row was under as ``_previous_course_id`` for
+    ``courses.signals``. Returns True when an existing row ends up under
+    another course or owner, i.e. its descendants have to be updated as well.
+    """
+    instance._previous_course_id = None
+    if not _saves_any(kwargs.get("update_fields"), parent_fields):
+        return False
+    if kwargs.get("update_fields") is not None:
+        kwargs["update_fields"] = {*kwargs["update_fields"], "course", "owner_teacher"}
+    previous = (instance.course_id, instance.owner_teacher_id)
+    name = next((name for name in parent_fields if getattr(instance, f"{name}_id") is not None), parent_fields[0])
+    instance.course_id, instance.owner_teacher_id = _parent_keys(instance, name)
+    if instance._state.adding:
+        return False
+    instance._previous_course_id = previous[0]
+    return previous != (instance.course_id, instance.owner_teacher_id)
+
+
+def _push_ownership(querysets, course_id, owner_teacher_id):
+    for queryset in querysets:
+        queryset.update(course_id=course_id, owner_teacher_id=owner_teacher_id)
 
 
 class Role:
@@ -19,8 +110,10 @@ class Role:
 class UserProfile(models.Model):
     """Extended user profile with role information."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
-    role = models.CharField(max_length=10, choices=Role.CHOICES, default=Role.STUDENT)
+    role = models.CharField(max_length=10, choices=Role.CHOICES, default=Role.STUDENT, db_index=True)
     admin_secret_code = models.CharField(max_length=4, unique=True, null=True, blank=True)
+    # Bumped to revoke every bearer token issued to the user (see courses.tokens).
+    token_generation = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -49,6 +142,20 @@ class TeacherClass(models.Model):
     def __str__(self):
         return f"{self.name} ({self.class_code}) - {self.teacher.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        _remember_keys(instance, ["teacher"])
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = _key_changed(self, "teacher", kwargs)
+        super().save(*args, **kwargs)
+        _remember_keys(self, ["teacher"], kwargs.get("update_fields"))
+        if moved:
+            for model in content_models():
+                model.objects.filter(course__teacher_class_id=self.pk).update(owner_teacher_id=self.teacher_id)
+
 
 class ClassEnrollment(models.Model):
     """Student enrollment in a teacher's class."""
@@ -72,6 +179,8 @@ class Course(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Last write anywhere in the course tree (see tree_cache.invalidate_course_tree).
+    tree_updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["title"]
@@ -79,6 +188,22 @@ class Course(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        _remember_keys(instance, ["teacher_class"])
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = _key_changed(self, "teacher_class", kwargs)
+        super().save(*args, **kwargs)
+        _remember_keys(self, ["teacher_class"], kwargs.get("update_fields"))
+        if moved:
+            # The new class's teacher now owns every row of the course tree.
+            owner_id = TeacherClass.objects.filter(pk=self.teacher_class_id).values_list("teacher_id", flat=True).first()
+            for model in content_models():
+                model.objects.filter(course_id=self.pk).update(owner_teacher_id=owner_id)
+
 
 class Module(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -88,6 +213,8 @@ class Module(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized course.teacher_class.teacher, kept in sync by save().
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "title"]
@@ -95,6 +222,44 @@ class Module(models.Model):
     def __str__(self) -> str:
         return f"{self.title} ({self.course})"
 
+    def course_owner_id(self):
+        """Teacher of the course's class, from the loaded course when there is one."""
+        course = Module.course.field.get_cached_value(self, None)
+        if course is None or course.pk != self.course_id:
+            return Course.objects.filter(pk=self.course_id).values_list("teacher_class__teacher_id", flat=True).first()
+        if course.teacher_class_id is None:
+            return None
+        teacher_class = Course.teacher_class.field.get_cached_value(course, None)
+        if teacher_class is not None and teacher_class.pk == course.teacher_class_id:
+            return teacher_class.teacher_id
+        return TeacherClass.objects.filter(pk=course.teacher_class_id).values_list("teacher_id", flat=True).first()
+
+    def save(self, *args, **kwargs):
+        previous = None
+        self._previous_course_id = None
+        # The owner only follows the course; saves that leave it alone keep both.
+        if _saves_any(kwargs.get("update_fields"), ("course",)):
+            if not self._state.adding:
+                previous = Module.objects.filter(pk=self.pk).values_list("course_id", "owner_teacher_id").first()
+                self._previous_course_id = previous[0] if previous else None
+            self.owner_teacher_id = self.course_owner_id()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "owner_teacher"}
+        super().save(*args, **kwargs)
+        if previous is not None and previous != (self.course_id, self.owner_teacher_id):
+            _push_ownership(
+                [
+                    Lesson.objects.filter(module_id=self.pk),
+                    Topic.objects.filter(lesson__module_id=self.pk),
+                    *(
+                        model.objects.filter(Q(lesson__module_id=self.pk) | Q(topic__lesson__module_id=self.pk))
+                        for model in (KeyTakeaway, Exercise, Resource)
+                    ),
+                ],
+                self.course_id,
+                self.owner_teacher_id,
+            )
+
 
 class Lesson(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -117,6 +282,10 @@ class Lesson(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the parent chain so ownership checks and course-wide
+    # filters need no joins; kept in sync by save() on this row and its parents.
+    course = models.ForeignKey(Course, related_name="+", on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "title"]
@@ -124,6 +293,22 @@ class Lesson(models.Model):
     def __str__(self) -> str:
         return f"{self.title} ({self.module})"
 
+    def save(self, *args, **kwargs):
+        moved = _inherit_ownership(self, ("module",), kwargs)
+        super().save(*args, **kwargs)
+        if moved:
+            _push_ownership(
+                [
+                    Topic.objects.filter(lesson_id=self.pk),
+                    *(
+                        model.objects.filter(Q(lesson_id=self.pk) | Q(topic__lesson_id=self.pk))
+                        for model in (KeyTakeaway, Exercise, Resource)
+                    ),
+                ],
+                self.course_id,
+                self.owner_teacher_id,
+            )
+
 
 class Topic(models.Model):
     """Hierarchical topic tree attached to a lesson."""
@@ -155,6 +340,10 @@ class Topic(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the parent chain so ownership checks and course-wide
+    # filters need no joins; kept in sync by save() on this row and its parents.
+    course = models.ForeignKey(Course, related_name="+", on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "title"]
@@ -162,6 +351,16 @@ class Topic(models.Model):
     def __str__(self) -> str:
         return f"{self.title} ({self.lesson})"
 
+    def save(self, *args, **kwargs):
+        moved = _inherit_ownership(self, ("lesson",), kwargs)
+        super().save(*args, **kwargs)
+        if moved:
+            _push_ownership(
+                [model.objects.filter(topic_id=self.pk) for model in (KeyTakeaway, Exercise, Resource)],
+                self.course_id,
+                self.owner_teacher_id,
+            )
+
 
 class KeyTakeaway(models.Model):
     """Key takeaways/summary points for a lesson or topic."""
@@ -173,6 +372,10 @@ class KeyTakeaway(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the parent chain so ownership checks and course-wide
+    # filters need no joins; kept in sync by save() on this row and its parents.
+    course = models.ForeignKey(Course, related_name="+", on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order"]
@@ -182,6 +385,10 @@ class KeyTakeaway(models.Model):
             return f"Takeaway for {self.lesson}"
         return f"Takeaway for {self.topic}"
 
+    def save(self, *args, **kwargs):
+        _inherit_ownership(self, ("lesson", "topic"), kwargs)
+        super().save(*args, **kwargs)
+
 
 class Exercise(models.Model):
     """Practice exercises for a lesson or topic."""
@@ -194,6 +401,10 @@ class Exercise(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the parent chain so ownership checks and course-wide
+    # filters need no joins; kept in sync by save() on this row and its parents.
+    course = models.ForeignKey(Course, related_name="+", on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order"]
@@ -203,6 +414,10 @@ class Exercise(models.Model):
             return f"Exercise for {self.lesson}"
         return f"Exercise for {self.topic}"
 
+    def save(self, *args, **kwargs):
+        _inherit_ownership(self, ("lesson", "topic"), kwargs)
+        super().save(*args, **kwargs)
+
 
 class Resource(models.Model):
     """Helpful resources/links for a lesson or topic."""
@@ -216,6 +431,10 @@ class Resource(models.Model):
     order = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the parent chain so ownership checks and course-wide
+    # filters need no joins; kept in sync by save() on this row and its parents.
+    course = models.ForeignKey(Course, related_name="+", on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    owner_teacher = models.ForeignKey(User, related_name="+", on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order"]
@@ -225,6 +444,10 @@ class Resource(models.Model):
             return f"Resource for {self.lesson}"
         return f"Resource for {self.topic}"
 
+    def save(self, *args, **kwargs):
+        _inherit_ownership(self, ("lesson", "topic"), kwargs)
+        super().save(*args, **kwargs)
+
 
 class CourseCompletionCertificate(models.Model):
     """Persisted record of course completion with a unique certificate number."""
@@ -234,10 +457,21 @@ class CourseCompletionCertificate(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="certificates")
     certificate_number = models.CharField(max_length=32, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
+    # Stored PDF (see courses.certificates); empty until first rendered.
+    pdf_file = models.CharField(max_length=255, blank=True, default="")
+    pdf_sha256 = models.CharField(max_length=64, blank=True, default="")
+    pdf_rendered_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ["student", "course"]
         ordering = ["-issued_at"]
+        # Covers the revocation list loaded by courses.verification.
+        indexes = [
+            models.Index(
+                fields=["certificate_number"], condition=Q(revoked_at__isnull=False), name="certificate_revoked_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.certificate_number} - {self.student.username} - {self.course.title}"
@@ -267,3 +501,49 @@ class CourseProgress(models.Model):
 
     def __str__(self) -> str:
         return f"{self.student.username} - {self.course.title}: {self.obtained_score}/{self.total_score}"
+
+
+class JobStatus:
+    """Lifecycle states of a background job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+
+class Job(models.Model):
+    """A unit of background work, picked up by the ``run_jobs`` worker (see courses.jobs)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=64)
+    queue = models.CharField(max_length=32, default="default")
+    # Identifies the work for de-duplication: one pending job per key.
+    key = models.CharField(max_length=128, blank=True, default="", db_index=True)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=16, choices=JobStatus.CHOICES, default=JobStatus.QUEUED)
+    priority = models.IntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=128, blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "queue", "priority", "run_after"], name="job_claim_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.kind} ({self.status})"
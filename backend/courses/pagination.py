@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """Keyset pagination that clients opt into with `?page_size=` or `?cursor=`.
+
+    Requests without either parameter keep receiving the plain, unpaginated
+    list. Views choose a stable ordering with a `cursor_ordering` attribute.
+    The cursor only records the first field (plus an offset among rows that
+    share its value), so that field must be unique, or nearly so, and never
+    change: with many ties, inserts shift the offset and rows are skipped or
+    repeated.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "cursor_ordering", self.ordering))
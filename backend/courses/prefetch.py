@@ -0,0 +1,55 @@
+"""Prefetch plan for the nested course serializers.
+
+Every relation that `CourseSerializer`, `ModuleSerializer`, `LessonSerializer`
+and `TopicSerializer` render is described once in `RELATIONS`, so the viewsets
+and the course tree cache prefetch exactly what will be serialized: one query
+per relation, whatever the size or depth of the tree.
+"""
+
+# Serializer level -> {relation field: level it leads to (None for leaves)}.
+RELATIONS = {
+    "course": {"modules": "module"},
+    "module": {"lessons": "lesson"},
+    "lesson": {"topics": "topic", "takeaways": None, "exercises": None, "resources": None},
+    "topic": {"children": "topic", "takeaways": None, "exercises": None, "resources": None},
+}
+
+
+def expand_all(level, prefix="", in_children=False):
+    """Every dotted relation path rendered by the full serializer at `level`."""
+    paths = []
+    for name, target in RELATIONS[level].items():
+        # Topic children render with the rules of their topic; one level covers them.
+        if name == "children" and in_children:
+            continue
+        path = f"{prefix}{name}"
+        paths.append(path)
+        if target is not None:
+            paths.extend(expand_all(target, f"{path}.", in_children or name == "children"))
+    return paths
+
+
+def prefetch_lookups(level, expand=None):
+    """ORM prefetch lookups for the relation paths in `expand` (default: everything).
+
+    Topic children are never fetched through `Topic.children`: the serializers
+    build the tree from the lesson's topics (see `build_topic_children`), so a
+    `children` step maps to `lesson__topics` for a topic at the root and to
+    nothing below a lesson, whose `topics` already hold every node.
+    """
+    if expand is None:
+        expand = expand_all(level)
+    lookups = set()
+    for path in expand:
+        parts = []
+        in_lesson_topics = False
+        for name in path.split("."):
+            if name == "children":
+                if not in_lesson_topics:
+                    parts += ["lesson", "topics"]
+                    in_lesson_topics = True
+                continue
+            parts.append(name)
+            in_lesson_topics = in_lesson_topics or name == "topics"
+        lookups.add("__".join(parts))
+    return sorted(lookups)
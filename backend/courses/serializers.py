@@ -1,7 +1,9 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 
-from .models import Course, Lesson, Module, Topic, KeyTakeaway, Exercise, Resource, TeacherClass, ClassEnrollment, UserProfile
+from .models import Course, Lesson, Module, Topic, KeyTakeaway, Exercise, Resource, TeacherClass, ClassEnrollment, UserProfile, Job
 
 
 class KeyTakeawaySerializer(serializers.ModelSerializer):
@@ -37,7 +39,100 @@ class ResourceSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "description", "url", "order", "lessonId", "topicId", "createdAt", "updatedAt"]
 
 
-class TopicSerializer(serializers.ModelSerializer):
+class SparseFieldset:
+    """Parsed `?fields=` / `?expand=` selection for the nested course serializers.
+
+    `fields` lists the fields to keep per nesting level (`id,title,modules.title`);
+    levels without an entry keep all their plain fields. Relations are rendered
+    only when their dotted path appears in `expand` (`modules.lessons`) or is
+    implied by a dotted field. Topic children share the rules of their topic.
+    """
+
+    def __init__(self, fields, expand):
+        self.fields = defaultdict(set)
+        self.expand = set()
+        for name in fields:
+            path, _, field = name.rpartition(".")
+            self.fields[path].add(field)
+            if path:
+                self._expand(path)
+        for path in expand:
+            self._expand(path)
+
+    def _expand(self, path):
+        parts = path.split(".")
+        for depth in range(1, len(parts) + 1):
+            self.expand.add(".".join(parts[:depth]))
+
+    @classmethod
+    def from_query_params(cls, params):
+        """Return a fieldset, or None when the request asked for the full shape."""
+        if "fields" not in params and "expand" not in params:
+            return None
+
+        def split(value):
+            return [item.strip() for item in value.split(",") if item.strip()]
+
+        return cls(split(params.get("fields", "")), split(params.get("expand", "")))
+
+
+class SparseFieldsMixin:
+    """Apply the request's SparseFieldset (GET only) to a nested course serializer."""
+
+    relation_fields = ()
+
+    def __init__(self, *args, sparse_path=None, **kwargs):
+        self._sparse_path = sparse_path
+        super().__init__(*args, **kwargs)
+
+    @property
+    def sparse_path(self):
+        if self._sparse_path is not None:
+            return self._sparse_path
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return ".".join(reversed(names))
+
+    def get_sparse_fieldset(self):
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return None
+        if "sparse_fieldset" not in self.context:
+            self.context["sparse_fieldset"] = SparseFieldset.from_query_params(request.query_params)
+        return self.context["sparse_fieldset"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.get_sparse_fieldset()
+        if sparse is None:
+            return fields
+        path = self.sparse_path
+        prefix = f"{path}." if path else ""
+        wanted = sparse.fields.get(path)
+        for name in list(fields):
+            if name in self.relation_fields:
+                keep = f"{prefix}{name}" in sparse.expand
+            else:
+                keep = wanted is None or name in wanted
+            if not keep:
+                del fields[name]
+        return fields
+
+
+def build_topic_children(topics):
+    """Group a lesson's topics by parent id, keeping the queryset ordering."""
+    children = defaultdict(list)
+    for topic in topics:
+        if topic.parent_id is not None:
+            children[topic.parent_id].append(topic)
+    return children
+
+
+class TopicSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lessonId = serializers.PrimaryKeyRelatedField(source="lesson", queryset=Lesson.objects.all())
     parentId = serializers.PrimaryKeyRelatedField(
         source="parent",
@@ -73,12 +168,20 @@ class TopicSerializer(serializers.ModelSerializer):
             "updatedAt",
         ]
 
+    relation_fields = ("children", "takeaways", "exercises", "resources")
+
     def get_children(self, obj: Topic):
-        # Serialize nested children to support arbitrarily deep trees.
-        return TopicSerializer(obj.children.all(), many=True, context=self.context).data
+        # Serialize nested children to support arbitrarily deep trees. The whole
+        # tree of a lesson is built once from `lesson.topics` (a single query, or
+        # none when prefetched) and shared through the context for every node.
+        trees = self.context.setdefault("topic_trees", {})
+        tree = trees.get(obj.lesson_id)
+        if tree is None:
+            tree = trees[obj.lesson_id] = build_topic_children(obj.lesson.topics.all())
+        return TopicSerializer(tree.get(obj.id, []), many=True, context=self.context, sparse_path=self.sparse_path).data
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     moduleId = serializers.PrimaryKeyRelatedField(source="module", queryset=Module.objects.all())
     heroMediaType = serializers.CharField(source="hero_media_type", required=False, allow_blank=True, allow_null=True)
     heroMediaUrl = serializers.URLField(source="hero_media_url", required=False, allow_blank=True, allow_null=True)
@@ -107,8 +210,10 @@ class LessonSerializer(serializers.ModelSerializer):
             "updatedAt",
         ]
 
+    relation_fields = ("topics", "takeaways", "exercises", "resources")
+
 
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
     courseId = serializers.PrimaryKeyRelatedField(source="course", queryset=Course.objects.all())
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
@@ -127,8 +232,10 @@ class ModuleSerializer(serializers.ModelSerializer):
             "updatedAt",
         ]
 
+    relation_fields = ("lessons",)
 
-class CourseSerializer(serializers.ModelSerializer):
+
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     modules = ModuleSerializer(many=True, read_only=True)
     teacherClassId = serializers.PrimaryKeyRelatedField(source="teacher_class", queryset=TeacherClass.objects.all(), allow_null=True, required=False)
     createdAt = serializers.DateField(source="created_at", read_only=True)
@@ -138,6 +245,60 @@ class CourseSerializer(serializers.ModelSerializer):
         model = Course
         fields = ["id", "title", "description", "teacherClassId", "createdAt", "updatedAt", "modules"]
 
+    relation_fields = ("modules",)
+
+
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    topicCount = serializers.SerializerMethodField()
+    topicIds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lesson
+        fields = ["id", "title", "order", "topicCount", "topicIds"]
+
+    def get_topicCount(self, obj):
+        return len(obj.topics.all())
+
+    def get_topicIds(self, obj):
+        return [topic.id for topic in obj.topics.all()]
+
+
+class ModuleOutlineSerializer(serializers.ModelSerializer):
+    lessonCount = serializers.SerializerMethodField()
+    lessons = LessonOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Module
+        fields = ["id", "title", "order", "lessonCount", "lessons"]
+
+    def get_lessonCount(self, obj):
+        return len(obj.lessons.all())
+
+
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    """Course metadata with module/lesson/topic counts and ids, but no content bodies."""
+
+    teacherClassId = serializers.PrimaryKeyRelatedField(source="teacher_class", read_only=True)
+    moduleCount = serializers.SerializerMethodField()
+    lessonCount = serializers.SerializerMethodField()
+    topicCount = serializers.SerializerMethodField()
+    modules = ModuleOutlineSerializer(many=True, read_only=True)
+    createdAt = serializers.DateField(source="created_at", read_only=True)
+    updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ["id", "title", "description", "teacherClassId", "createdAt", "updatedAt", "moduleCount", "lessonCount", "topicCount", "modules"]
+
+    def get_moduleCount(self, obj):
+        return len(obj.modules.all())
+
+    def get_lessonCount(self, obj):
+        return sum(len(module.lessons.all()) for module in obj.modules.all())
+
+    def get_topicCount(self, obj):
+        return sum(len(lesson.topics.all()) for module in obj.modules.all() for lesson in module.lessons.all())
+
 
 class UserProfileSerializer(serializers.ModelSerializer):
     userId = serializers.IntegerField(source="user.id", read_only=True)
@@ -182,10 +343,13 @@ class TeacherClassSerializer(serializers.ModelSerializer):
         return None
 
     def get_coursesCount(self, obj):
-        return obj.courses.count()
+        # Annotated by TeacherClassViewSet.get_queryset; counted for fresh instances.
+        count = getattr(obj, "courses_count", None)
+        return obj.courses.count() if count is None else count
 
     def get_studentsCount(self, obj):
-        return obj.enrollments.count()
+        count = getattr(obj, "students_count", None)
+        return obj.enrollments.count() if count is None else count
 
 
 class ClassEnrollmentSerializer(serializers.ModelSerializer):
@@ -202,3 +366,17 @@ class ClassEnrollmentSerializer(serializers.ModelSerializer):
         model = ClassEnrollment
         fields = ["id", "studentId", "studentFirstName", "studentLastName", "className", "classCode", "teacherFirstName", "teacherLastName", "enrolledAt"]
         read_only_fields = ["id", "studentId", "studentFirstName", "studentLastName", "className", "classCode", "teacherFirstName", "teacherLastName", "enrolledAt"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    maxAttempts = serializers.IntegerField(source="max_attempts", read_only=True)
+    error = serializers.CharField(source="last_error", read_only=True)
+    runAfter = serializers.DateTimeField(source="run_after", read_only=True)
+    startedAt = serializers.DateTimeField(source="started_at", read_only=True)
+    finishedAt = serializers.DateTimeField(source="finished_at", read_only=True)
+    createdAt = serializers.DateTimeField(source="created_at", read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ["id", "kind", "status", "priority", "attempts", "maxAttempts", "result", "error", "runAfter", "startedAt", "finishedAt", "createdAt"]
+        read_only_fields = fields
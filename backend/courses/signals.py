@@ -0,0 +1,83 @@
+"""Signal handlers that keep the cached course trees, session users and certificate verifications in sync with writes."""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .backends import forget_user
+from .certificates import discard_certificate_pdfs
+from .models import Course, CourseCompletionCertificate, Exercise, KeyTakeaway, Lesson, Module, Resource, Topic, UserProfile
+from .tree_cache import invalidate_course_tree
+from .verification import forget_verification, record_issued
+
+
+def course_id_for(instance):
+    """The course a content row belongs to (content rows carry it denormalized)."""
+    if isinstance(instance, Course):
+        return instance.pk
+    return instance.course_id
+
+
+@receiver(pre_save, sender=Module)
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Topic)
+@receiver(pre_save, sender=KeyTakeaway)
+@receiver(pre_save, sender=Exercise)
+@receiver(pre_save, sender=Resource)
+def invalidate_previous_course_tree(sender, instance, **kwargs):
+    # A row moved to another parent must also drop the tree it left; save()
+    # records which one that was, so no lookup is needed here.
+    previous = getattr(instance, "_previous_course_id", None)
+    if previous is not None and previous != instance.course_id:
+        invalidate_course_tree(previous)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=KeyTakeaway)
+@receiver(post_save, sender=Exercise)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Module)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=KeyTakeaway)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=Resource)
+def invalidate_course_tree_on_write(sender, instance, signal, update_fields=None, **kwargs):
+    # A saved course stamps itself (auto_now) unless update_fields leaves the
+    # stamp out; a deleted one needs no stamp.
+    stamped = sender is Course and (
+        signal is post_delete or update_fields is None or "tree_updated_at" in update_fields
+    )
+    invalidate_course_tree(course_id_for(instance), touch=not stamped)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile(sender, instance, **kwargs):
+    # A role change must reach the next request of that user.
+    forget_user(instance.user_id)
+
+
+@receiver(post_save, sender=CourseCompletionCertificate)
+@receiver(post_delete, sender=CourseCompletionCertificate)
+def forget_certificate_verification(sender, instance, created=False, **kwargs):
+    # Covers revocation and a number that was looked up before it was issued.
+    if created:
+        record_issued(instance.certificate_number)
+    else:
+        forget_verification(instance.certificate_number)
+
+
+@receiver(post_delete, sender=CourseCompletionCertificate)
+def discard_certificate_pdf(sender, instance, **kwargs):
+    # Also reached through the cascade of a deleted student or course.
+    discard_certificate_pdfs(instance.pdf_file)
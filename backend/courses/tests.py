@@ -1,6 +1,1137 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import certificates, jobs, verification
+from .benchmark import ENDPOINTS, ROLES, Scale, build_dataset, compare_reports, run_benchmark
+from .deletion import prune_course
+from .flat_serializers import flat_course
+from .management.commands.benchmark_certificates import page_text
+from .models import ClassEnrollment, Course, CourseCompletionCertificate, CourseProgress, Job, JobStatus, Exercise, KeyTakeaway, Lesson, Module, Resource, Role, TeacherClass, Topic, UserProfile
+from .renderers import FastJSONRenderer
+from .serializers import CourseSerializer
+from .tree_cache import COURSE_TREE_PREFETCH, require_shared_cache
+from .urls import urlpatterns
+from .views import generate_class_code
 
 
 class PlaceholderTest(TestCase):
     def test_placeholder(self) -> None:
         self.assertTrue(True)
+
+
+def make_user(username: str, role: str) -> User:
+    user = User.objects.create_user(username=username, password="Passw0rd!x", is_staff=role == Role.ADMIN)
+    UserProfile.objects.create(user=user, role=role)
+    return user
+
+
+def make_course(teacher: User, title: str = "Course") -> Course:
+    teacher_class = TeacherClass.objects.create(teacher=teacher, name=f"{title} class", class_code=generate_class_code())
+    return Course.objects.create(teacher_class=teacher_class, title=title)
+
+
+def make_topic_chain(lesson: Lesson, depth: int) -> Topic:
+    parent = None
+    for level in range(depth):
+        parent = Topic.objects.create(lesson=lesson, parent=parent, title=f"Level {level}", order=level)
+    return parent
+
+
+class TopicTreeTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        module = Module.objects.create(course=self.course, title="Module")
+        self.lesson = Lesson.objects.create(module=module, title="Lesson")
+        self.client = APIClient()
+
+    def count_topic_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/courses/")
+        self.assertEqual(response.status_code, 200)
+        return sum('FROM "courses_topic"' in q["sql"] for q in ctx.captured_queries)
+
+    def test_nested_children_are_serialized_to_any_depth(self) -> None:
+        make_topic_chain(self.lesson, 4)
+        response = self.client.get("/api/courses/")
+        topics = response.json()[0]["modules"][0]["lessons"][0]["topics"]
+        root = next(t for t in topics if t["parentId"] is None)
+        depth = 1
+        while root["children"]:
+            self.assertEqual(len(root["children"]), 1)
+            root = root["children"][0]
+            depth += 1
+        self.assertEqual(depth, 4)
+
+    def test_topic_tree_is_loaded_in_one_query(self) -> None:
+        make_topic_chain(self.lesson, 2)
+        self.assertEqual(self.count_topic_queries(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_topic_chain(self.lesson, 6)
+        self.assertEqual(self.count_topic_queries(), 1)
+
+
+class CourseTreeCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = make_course(self.teacher)
+            self.other = make_course(self.teacher, "Other")
+            self.module = Module.objects.create(course=self.course, title="Module")
+            self.lesson = Lesson.objects.create(module=self.module, title="Lesson")
+        self.client = APIClient()
+
+    def list_courses(self):
+        response = self.client.get("/api/courses/")
+        self.assertEqual(response.status_code, 200)
+        return {course["title"]: course for course in response.json()}
+
+    def test_cached_list_skips_tree_queries(self) -> None:
+        self.list_courses()
+        with CaptureQueriesContext(connection) as ctx:
+            self.list_courses()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_write_invalidates_only_affected_course(self) -> None:
+        self.list_courses()
+        with self.captureOnCommitCallbacks(execute=True):
+            Topic.objects.create(lesson=self.lesson, title="New topic")
+        with CaptureQueriesContext(connection) as ctx:
+            courses = self.list_courses()
+        self.assertEqual(courses["Course"]["modules"][0]["lessons"][0]["topics"][0]["title"], "New topic")
+        course_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "courses_course"' in q["sql"]]
+        self.assertEqual(len(course_queries), 2)
+        self.assertNotIn(self.other.id.hex, course_queries[1])
+
+    def test_moving_a_module_invalidates_both_courses(self) -> None:
+        self.list_courses()
+        self.module.course = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.save()
+        courses = self.list_courses()
+        self.assertEqual(courses["Course"]["modules"], [])
+        self.assertEqual(len(courses["Other"]["modules"]), 1)
+
+    def test_writes_stamp_each_course_once_per_transaction(self) -> None:
+        stamped = 'UPDATE "courses_course" SET "tree_updated_at"'
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(3):
+                    Topic.objects.create(lesson=self.lesson, title=f"Topic {i}")
+                Lesson.objects.create(module=self.module, title="Second lesson")
+        self.assertEqual(sum(stamped in q["sql"] for q in ctx.captured_queries), 1)
+        # A course saved without its stamp gets one on commit.
+        self.course.title = "Renamed"
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.course.save(update_fields=["title"])
+        self.assertEqual(sum(stamped in q["sql"] for q in ctx.captured_queries), 1)
+        # A cascading delete does not stamp the course it deletes.
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertEqual(sum(stamped in q["sql"] for q in ctx.captured_queries), 0)
+
+    def test_several_processes_need_a_shared_cache(self) -> None:
+        require_shared_cache()
+        with override_settings(SERVER_PROCESSES=2):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared_cache()
+        shared = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp"}
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(SERVER_PROCESSES=2, CACHES={"default": shared, "sessions": local}):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared_cache()
+        with override_settings(SERVER_PROCESSES=2, CACHES={"default": shared, "sessions": shared}):
+            require_shared_cache()
+        with override_settings(
+            SERVER_PROCESSES=2,
+            CACHES={"default": shared, "sessions": local},
+            SESSION_ENGINE="django.contrib.sessions.backends.db",
+        ):
+            require_shared_cache()
+
+
+class OwnershipKeysTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.other_teacher = make_user("other", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        self.module = Module.objects.create(course=self.course, title="Module")
+        self.lesson = Lesson.objects.create(module=self.module, title="Lesson")
+        self.topic = make_topic_chain(self.lesson, 2)
+        self.exercise = Exercise.objects.create(topic=self.topic, title="Exercise", description="Do it")
+
+    def assert_owned_by(self, teacher: User, course: Course) -> None:
+        for row in (self.module, self.lesson, self.topic, self.exercise):
+            row.refresh_from_db()
+            self.assertEqual((row.course_id, row.owner_teacher_id), (course.id, teacher.id), row)
+
+    def test_keys_are_copied_from_the_parent_chain(self) -> None:
+        self.assert_owned_by(self.teacher, self.course)
+
+    def test_reassigning_the_course_moves_ownership_of_the_tree(self) -> None:
+        self.course.teacher_class = make_course(self.other_teacher, "Other").teacher_class
+        self.course.save()
+        self.assert_owned_by(self.other_teacher, self.course)
+
+    def test_moving_a_module_updates_its_descendants(self) -> None:
+        other = make_course(self.other_teacher, "Other")
+        self.module.course = other
+        self.module.save()
+        self.assert_owned_by(self.other_teacher, other)
+
+    def test_saves_take_keys_from_loaded_parents_without_lookups(self) -> None:
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            Topic.objects.create(lesson=self.lesson, title="Sibling")
+            self.lesson.title = "Renamed"
+            self.lesson.save(update_fields=["title"])
+        # The row writes, then one stamp of the course's tree_updated_at on commit.
+        self.assertEqual([q["sql"].split()[0] for q in ctx.captured_queries], ["INSERT", "UPDATE", "UPDATE"])
+
+    def test_saving_a_loaded_course_or_class_looks_nothing_up(self) -> None:
+        course = Course.objects.select_related("teacher_class").get(pk=self.course.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            course.title = "Renamed"
+            course.save()
+            course.teacher_class.name = "Renamed"
+            course.teacher_class.save(update_fields=["name"])
+        self.assertEqual([q["sql"].split()[0] for q in ctx.captured_queries], ["UPDATE", "UPDATE"])
+        # The key recorded at load time still tells a change of teacher.
+        course.teacher_class.teacher = self.other_teacher
+        course.teacher_class.save()
+        self.assert_owned_by(self.other_teacher, self.course)
+
+    def test_teacher_cannot_update_rows_of_another_teacher(self) -> None:
+        client = APIClient()
+        client.force_authenticate(self.other_teacher)
+        response = client.patch(f"/api/lessons/{self.lesson.id}/", {"title": "Hijacked"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        client.force_authenticate(self.teacher)
+        response = client.patch(f"/api/lessons/{self.lesson.id}/", {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+
+class SetBasedBulkDeleteTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        self.other = make_course(self.teacher, "Other")
+        for course in (self.course, self.other):
+            module = Module.objects.create(course=course, title="Module")
+            for i in range(3):
+                lesson = Lesson.objects.create(module=module, title=f"Lesson {i}")
+                KeyTakeaway.objects.create(lesson=lesson, content="Takeaway")
+                Exercise.objects.create(topic=make_topic_chain(lesson, 3), title="Exercise", description="Do it")
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_course_delete_removes_the_whole_subtree_in_constant_queries(self) -> None:
+        self.client.get("/api/courses/")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/courses/bulk-delete/", {"ids": [str(self.course.id)]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # course + module + 3 lessons + 9 topics + 3 takeaways + 3 exercises
+        self.assertEqual(response.json()["deleted"], 20)
+        self.assertLess(len(ctx.captured_queries), 20)
+        self.assertEqual(Lesson.objects.count(), 3)
+        self.assertEqual(Topic.objects.count(), 9)
+        self.assertEqual([course["title"] for course in self.client.get("/api/courses/").json()], ["Other"])
+
+    def test_rows_with_missing_or_stale_course_keys_are_deleted_with_their_parents(self) -> None:
+        Lesson.objects.filter(course=self.course).update(course=None)
+        Topic.objects.filter(course=self.course, parent=None).update(course=self.other)
+        response = self.client.post("/api/courses/bulk-delete/", {"ids": [str(self.course.id)]}, format="json")
+        self.assertEqual(response.json()["deleted"], 20)
+        connection.check_constraints()
+        self.assertEqual((Lesson.objects.count(), Topic.objects.count()), (3, 9))
+
+    def test_prune_matches_rows_by_their_parents(self) -> None:
+        kept_lesson = Lesson.objects.filter(course=self.course).first()
+        Lesson.objects.filter(course=self.course).update(course=None)
+        Topic.objects.filter(course=self.course).update(course=None)
+        keep = {Module: list(Module.objects.filter(course=self.course).values_list("id", flat=True)), Lesson: [kept_lesson.id]}
+        with transaction.atomic():
+            # 2 lessons, all 9 topics, 3 takeaways and 3 exercises.
+            self.assertEqual(prune_course(self.course.id, keep), 17)
+            connection.check_constraints()
+        self.assertEqual(Lesson.objects.filter(module__course=self.course).count(), 1)
+        self.assertEqual(Lesson.objects.filter(module__course=self.other).count(), 3)
+
+    def test_import_recognises_rows_with_missing_course_keys(self) -> None:
+        export = self.client.get(f"/api/courses/{self.course.id}/export/")
+        document = json.loads(b"".join(export.streaming_content))
+        del document["modules"][0]["lessons"][1:]
+        Lesson.objects.filter(course=self.course).update(course=None)
+        Topic.objects.filter(course=self.course).update(course=None)
+        response = self.client.post("/api/courses/import/", document, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        connection.check_constraints()
+        self.assertEqual(Lesson.objects.filter(module__course=self.course).count(), 1)
+        self.assertEqual(Topic.objects.filter(lesson__module__course=self.course).count(), 3)
+        # The import wrote the keys back.
+        self.assertFalse(Lesson.objects.filter(course=None).exists())
+
+    def test_topic_delete_takes_descendants_along(self) -> None:
+        root = Topic.objects.filter(parent=None, course=self.course).first()
+        response = self.client.post("/api/topics/bulk-delete/", {"ids": [str(root.id)]}, format="json")
+        self.assertEqual(response.json()["deleted"], 4)
+        self.assertEqual(Topic.objects.filter(course=self.course).count(), 6)
+
+    def test_deleting_unknown_ids_deletes_nothing(self) -> None:
+        for url in ("/api/courses/bulk-delete/", "/api/modules/bulk-delete/", "/api/topics/bulk-delete/"):
+            response = self.client.post(url, {"ids": [str(uuid.uuid4())]}, format="json")
+            self.assertEqual(response.json(), {"deleted": 0}, url)
+
+    def test_any_foreign_id_rejects_the_whole_batch(self) -> None:
+        self.client.force_authenticate(make_user("intruder", Role.TEACHER))
+        ids = [str(lesson.id) for lesson in Lesson.objects.all()]
+        response = self.client.post("/api/lessons/bulk-delete/", {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Lesson.objects.count(), 6)
+
+
+class NestedCreateTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.module = Module.objects.create(course=make_course(self.teacher), title="Module")
+        self.lesson = Lesson.objects.create(module=self.module, title="Lesson")
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def nested_items(self, count: int) -> dict:
+        return {
+            "keyTakeaways": [f"Takeaway {i}" for i in range(count)],
+            "exercises": [{"title": f"Exercise {i}", "description": "Do it"} for i in range(count)],
+            "resources": [{"title": f"Resource {i}", "url": "https://example.com/"} for i in range(count)],
+        }
+
+    def test_lesson_create_cost_does_not_grow_with_items(self) -> None:
+        payload = {"title": "Big lesson", "moduleId": str(self.module.id), **self.nested_items(10)}
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/lessons/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        # Includes stamping Course.tree_updated_at for the ETag of the course.
+        self.assertLessEqual(len(ctx.captured_queries), 9)
+        data = response.json()
+        self.assertEqual([t["content"] for t in data["takeaways"]], [f"Takeaway {i}" for i in range(10)])
+        self.assertEqual(len(data["exercises"]), 10)
+        self.assertEqual(data["topics"], [])
+        lesson = Lesson.objects.get(id=data["id"])
+        self.assertEqual(self.client.get(f"/api/lessons/{lesson.id}/").json(), data)
+        self.assertEqual(set(Resource.objects.values_list("owner_teacher_id", flat=True)), {self.teacher.id})
+
+    def test_topic_create_returns_its_items(self) -> None:
+        payload = {"title": "Topic", "lessonId": str(self.lesson.id), **self.nested_items(3)}
+        response = self.client.post("/api/topics/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(self.client.get(f"/api/topics/{data['id']}/").json(), data)
+
+
+class CourseImportExportTest(TestCase):
+    document = {
+        "title": "Imported",
+        "modules": [
+            {
+                "title": "Module",
+                "lessons": [
+                    {
+                        "title": "Lesson",
+                        "takeaways": [{"content": "Remember this"}],
+                        "topics": [
+                            {
+                                "title": "Root",
+                                "children": [{"title": "Child", "resources": [{"title": "Docs", "url": "https://example.com/"}]}],
+                            }
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.teacher_class = make_course(self.teacher).teacher_class
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def import_document(self, document: dict):
+        return self.client.post("/api/courses/import/", document, format="json")
+
+    def export(self, course_id) -> dict:
+        response = self.client.get(f"/api/courses/{course_id}/export/")
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_import_is_idempotent(self) -> None:
+        document = {**self.document, "teacherClassId": str(self.teacher_class.id)}
+        first = self.import_document(document)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((first.json()["topics"], first.json()["resources"]), (2, 1))
+        second = self.import_document(document)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["id"], first.json()["id"])
+        self.assertEqual(second.json()["deleted"], 0)
+        self.assertEqual(Topic.objects.count(), 2)
+        child = Topic.objects.get(title="Child")
+        self.assertEqual(child.parent.title, "Root")
+        self.assertEqual(child.owner_teacher_id, self.teacher.id)
+
+    def test_export_matches_detail_and_round_trips(self) -> None:
+        course_id = self.import_document({**self.document, "teacherClassId": str(self.teacher_class.id)}).json()["id"]
+        exported = self.export(course_id)
+        self.assertEqual(exported, self.client.get(f"/api/courses/{course_id}/").json())
+
+        exported["modules"][0]["lessons"][0]["topics"] = [
+            topic for topic in exported["modules"][0]["lessons"][0]["topics"] if topic["parentId"] is None
+        ]
+        exported["modules"][0]["lessons"][0]["topics"][0]["children"] = []
+        response = self.import_document(exported)
+        self.assertEqual(response.json()["deleted"], 2)
+        self.assertEqual(list(Topic.objects.values_list("title", flat=True)), ["Root"])
+
+    def test_students_cannot_import(self) -> None:
+        self.client.force_authenticate(make_user("student", Role.STUDENT))
+        response = self.import_document({**self.document, "teacherClassId": str(self.teacher_class.id)})
+        self.assertEqual(response.status_code, 403)
+
+
+class TeacherClassCountsTest(TestCase):
+    def test_counts_come_from_the_list_query(self) -> None:
+        admin = make_user("admin", Role.ADMIN)
+        teacher = make_user("teacher", Role.TEACHER)
+        students = [make_user(f"student{i}", Role.STUDENT) for i in range(3)]
+        for i in range(4):
+            course = make_course(teacher, f"Course {i}")
+            Course.objects.create(teacher_class=course.teacher_class, title=f"Extra {i}")
+            for student in students[:i]:
+                ClassEnrollment.objects.create(student=student, teacher_class=course.teacher_class)
+        client = APIClient()
+        client.force_authenticate(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/classes/")
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+        counts = sorted((c["coursesCount"], c["studentsCount"]) for c in response.json())
+        self.assertEqual(counts, [(2, 0), (2, 1), (2, 2), (2, 3)])
+
+
+class CachedSessionUserTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = make_user("student", Role.STUDENT)
+        self.client = APIClient()
+        self.client.login(username="student", password="Passw0rd!x")
+
+    def check_auth(self) -> dict:
+        return self.client.get("/api/auth/check/").json()["user"]
+
+    def test_role_checks_cost_no_queries_once_cached(self) -> None:
+        self.check_auth()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.check_auth()["role"], Role.STUDENT)
+        # Session (cached_db engine) and user both come from caches.
+        self.assertEqual([q["sql"] for q in ctx.captured_queries], [])
+
+    def test_expired_sessions_are_purged(self) -> None:
+        expired = Session.objects.create(
+            session_key="expired", session_data="", expire_date=timezone.now() - timedelta(days=1)
+        )
+        cache.delete(jobs.PURGE_LOCK_KEY)
+        # Requests leave the housekeeping to the worker.
+        self.check_auth()
+        self.assertTrue(Session.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(jobs.schedule_periodic(), 1)
+        self.assertEqual(jobs.schedule_periodic(), 0)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertFalse(Session.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_role_change_is_seen_on_the_next_request(self) -> None:
+        self.check_auth()
+        admin_client = APIClient()
+        admin_client.force_authenticate(make_user("admin", Role.ADMIN))
+        admin_client.patch(f"/api/auth/users/{self.user.id}/", {"role": Role.TEACHER}, format="json")
+        self.assertEqual(self.check_auth()["role"], Role.TEACHER)
+
+    def test_registration_logs_the_new_user_in(self) -> None:
+        client = APIClient()
+        response = client.post(
+            "/api/auth/register/", {"username": "newcomer", "password": "Passw0rd!x"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        checked = client.get("/api/auth/check/").json()["user"]
+        self.assertEqual((checked["username"], checked["role"]), ("newcomer", Role.STUDENT))
+
+
+class BearerTokenTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = make_user("teacher", Role.TEACHER)
+        self.client = APIClient()
+        self.tokens = self.client.post(
+            "/api/auth/token/", {"username": "teacher", "password": "Passw0rd!x"}, format="json"
+        ).json()
+
+    def check_auth(self, access: str):
+        return self.client.get("/api/auth/check/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_access_token_authenticates_without_queries(self) -> None:
+        self.check_auth(self.tokens["access"])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.check_auth(self.tokens["access"])
+        self.assertEqual(response.json()["user"]["role"], Role.TEACHER)
+        self.assertEqual(ctx.captured_queries, [])
+        self.assertEqual(self.check_auth(self.tokens["access"][:-2] + "xx").status_code, 403)
+
+    def test_refresh_and_revocation(self) -> None:
+        refreshed = self.client.post("/api/auth/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(refreshed.status_code, 200)
+        logout = self.client.post("/api/auth/logout/", HTTP_AUTHORIZATION=f"Bearer {refreshed.json()['access']}")
+        self.assertEqual(logout.status_code, 200)
+        self.assertEqual(self.check_auth(self.tokens["access"]).status_code, 403)
+        again = self.client.post("/api/auth/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(again.status_code, 401)
+
+
+class StoredCertificatePdfTest(TestCase):
+    def setUp(self) -> None:
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(CERTIFICATE_STORAGE={"OPTIONS": {"location": media.name}})
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.course = make_course(make_user("teacher", Role.TEACHER))
+        student = make_user("student", Role.STUDENT)
+        ClassEnrollment.objects.create(student=student, teacher_class=self.course.teacher_class)
+        self.client = APIClient()
+        self.client.force_authenticate(student)
+
+    def download(self, **headers):
+        return self.client.get(f"/api/courses/{self.course.id}/certificate-pdf/", **headers)
+
+    def generate(self):
+        return self.client.post(f"/api/courses/{self.course.id}/generate-certificate/")
+
+    def generate_rendered(self) -> bytes:
+        """Request the certificate, let the worker render it and return the PDF."""
+        if self.generate().status_code == 202:
+            jobs.run_pending()
+        return b"".join(self.generate().streaming_content)
+
+    def test_pdf_is_rendered_once_in_the_background(self) -> None:
+        rendered = []
+        original = certificates.render_certificate_pdf
+
+        def counting_render(cert, progress):
+            rendered.append(cert.pk)
+            return original(cert, progress)
+
+        certificates.render_certificate_pdf = counting_render
+        self.addCleanup(setattr, certificates, "render_certificate_pdf", original)
+        accepted = self.generate()
+        self.assertEqual(accepted.status_code, 202)
+        # Asking again while it is queued does not queue a second render.
+        self.assertEqual(self.generate().json()["job"]["id"], accepted.json()["job"]["id"])
+        self.assertEqual(self.download().status_code, 202)
+        self.assertEqual(rendered, [])
+
+        self.assertEqual(jobs.run_pending(), 1)
+        job = self.client.get(accepted.json()["pollUrl"]).json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["downloadUrl"], f"/api/courses/{self.course.id}/certificate-pdf/")
+
+        body = b"".join(self.generate().streaming_content)
+        download = self.download()
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertEqual(b"".join(download.streaming_content), body)
+        self.assertEqual(len(rendered), 1)
+        cert = CourseCompletionCertificate.objects.get()
+        self.assertEqual(download["ETag"], f'"{cert.pdf_sha256}"')
+        self.assertIn("private", download["Cache-Control"])
+
+    def test_background_form_draws_the_same_page(self) -> None:
+        self.generate()
+        cert = CourseCompletionCertificate.objects.select_related("student", "course__teacher_class__teacher").get()
+        with_form = certificates.render_certificate_pdf(cert, None)
+        self.assertIn(f"/FormXob.{certificates.BACKGROUND_FORM}".encode(), with_form)
+        self.assertEqual(page_text(with_form), page_text(certificates.render_certificate_pdf_direct(cert, None)))
+        self.assertIn(cert.certificate_number, " ".join(page_text(with_form)))
+
+    def test_stored_pdf_goes_with_its_certificate(self) -> None:
+        storage = certificates.certificate_storage()
+        self.generate_rendered()
+        cert = CourseCompletionCertificate.objects.get()
+        name = cert.pdf_file
+        with self.captureOnCommitCallbacks(execute=True):
+            verification.revoke_certificate(cert)
+        self.assertFalse(storage.exists(name))
+        self.assertEqual(CourseCompletionCertificate.objects.get().pdf_file, "")
+
+        # Removed through the cascade of a deleted student, but not by a rollback.
+        certificates.ensure_certificate_pdf(cert, None, storage)
+        students = User.objects.filter(pk=cert.student_id)
+        with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            students.delete()
+            raise RuntimeError
+        self.assertTrue(storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            students.delete()
+        self.assertFalse(storage.exists(name))
+
+        # And by the set-based delete of its course.
+        cert = CourseCompletionCertificate.objects.create(
+            student=make_user("other", Role.STUDENT), course=self.course, certificate_number="CH-20260101-DELETE"
+        )
+        certificates.ensure_certificate_pdf(cert, None, storage)
+        self.client.force_authenticate(self.course.teacher_class.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/courses/bulk-delete/", {"ids": [str(self.course.id)]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(storage.exists(cert.pdf_file))
+
+    def test_conditional_and_range_requests(self) -> None:
+        self.assertEqual(self.download().status_code, 404)
+        body = self.generate_rendered()
+        etag = self.download()["ETag"]
+        self.assertEqual(self.download(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        partial = self.download(HTTP_RANGE="bytes=0-99")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial["Content-Range"], f"bytes 0-99/{len(body)}")
+        self.assertEqual(b"".join(partial.streaming_content), body[:100])
+        tail = self.download(HTTP_RANGE="bytes=-10", HTTP_IF_RANGE=etag)
+        self.assertEqual(b"".join(tail.streaming_content), body[-10:])
+        self.assertEqual(self.download(HTTP_RANGE=f"bytes={len(body)}-").status_code, 416)
+        # A stale If-Range falls back to the whole file.
+        self.assertEqual(self.download(HTTP_RANGE="bytes=0-99", HTTP_IF_RANGE='"old"').status_code, 200)
+
+
+class ClassCertificateIssueTest(TestCase):
+    def setUp(self) -> None:
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(CERTIFICATE_STORAGE={"OPTIONS": {"location": media.name}})
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher, "Algebra")
+        for name, completed, enrolled in (("ann", True, True), ("bob", True, True), ("cy", False, True), ("dee", True, False)):
+            student = make_user(name, Role.STUDENT)
+            if enrolled:
+                ClassEnrollment.objects.create(student=student, teacher_class=self.course.teacher_class)
+            CourseProgress.objects.create(student=student, course=self.course, is_completed=completed)
+        CourseCompletionCertificate.objects.create(
+            student=User.objects.get(username="ann"), course=self.course, certificate_number="CH-20260101-AAAAAA"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def issue(self):
+        return self.client.post(f"/api/classes/{self.course.teacher_class_id}/issue-certificates/")
+
+    def test_issues_missing_certificates_and_streams_a_zip(self) -> None:
+        response = self.issue()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response["X-Certificates-Count"], response["X-Certificates-Created"]), ("2", "1"))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        # Entries are written as their renders complete, in no fixed order.
+        names = sorted(archive.namelist())
+        self.assertEqual([name.split("-")[0] for name in names], ["Algebra/ann", "Algebra/bob"])
+        self.assertTrue(all(archive.read(name).startswith(b"%PDF") for name in names))
+        # The PDFs were stored, so a repeat is served from storage without new rows.
+        self.assertEqual(CourseCompletionCertificate.objects.exclude(pdf_sha256="").count(), 2)
+        again = self.issue()
+        self.assertEqual(again["X-Certificates-Created"], "0")
+        self.assertEqual(sorted(zipfile.ZipFile(io.BytesIO(b"".join(again.streaming_content))).namelist()), names)
+
+    def test_issued_numbers_verify_at_once(self) -> None:
+        cache.clear()
+        verification.issued_numbers.invalidate()
+        number = "CH-20260101-BBBBBB"
+        self.assertEqual(verification.verify_number(number)[0], 404)
+        with mock.patch("courses.bulk_certificates.new_certificate_number", return_value=number):
+            self.assertEqual(self.issue()["X-Certificates-Created"], "1")
+        self.assertEqual(verification.verify_number(number)[0], 200)
+
+    def test_only_the_class_teacher_or_an_admin_can_issue(self) -> None:
+        self.client.force_authenticate(make_user("other", Role.TEACHER))
+        self.assertEqual(self.issue().status_code, 403)
+        self.assertEqual(CourseCompletionCertificate.objects.count(), 1)
+
+
+class CertificateVerificationTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches["local"].clear()
+        verification.revoked_numbers.invalidate()
+        verification.issued_numbers.invalidate()
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher, "Algebra")
+        student = make_user("student", Role.STUDENT)
+        CourseProgress.objects.create(student=student, course=self.course, obtained_score=8, total_score=10, is_completed=True)
+        self.cert = CourseCompletionCertificate.objects.create(
+            student=student, course=self.course, certificate_number="CH-20260101-VERIFY"
+        )
+        client = APIClient()
+        client.force_authenticate(student)
+        self.info = client.get(f"/api/courses/{self.course.id}/certificate-info/").json()
+        self.anonymous = APIClient()
+
+    def verify(self, **params):
+        return self.anonymous.get("/api/courses/verify-certificate/", params)
+
+    def test_token_is_verified_without_queries(self) -> None:
+        token = self.info["verificationToken"]
+        self.assertIn("/verify-certificate?token=", self.info["verificationUrl"])
+        self.verify(token=token)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.verify(token=token)
+        self.assertEqual(ctx.captured_queries, [])
+        data = response.json()
+        self.assertEqual(
+            (data["certificateNumber"], data["studentName"], data["courseTitle"], data["percentage"]),
+            ("CH-20260101-VERIFY", "student", "Algebra", 80.0),
+        )
+        self.assertEqual(self.verify(token=token[:-3] + "abc").status_code, 400)
+
+    def test_number_lookups_are_cached_and_unknown_numbers_filtered(self) -> None:
+        self.assertEqual(self.verify(certificate_number="CH-20260101-VERIFY").status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.verify(certificate_number="CH-20260101-VERIFY").json()["studentName"], "student")
+            for garbage in ("CH-20200101-ZZZZZZ", "CH-29990101-AAAAAA", "' OR 1=1 --"):
+                self.assertEqual(self.verify(certificate_number=garbage).status_code, 404)
+        self.assertEqual(ctx.captured_queries, [])
+
+    @override_settings(TOKEN_BUCKETS={"certificate_verification": (2, 0.01)})
+    def test_verification_is_throttled_per_client(self) -> None:
+        for _ in range(2):
+            self.assertEqual(self.verify(certificate_number="CH-20260101-VERIFY").status_code, 200)
+        throttled = self.verify(certificate_number="CH-20260101-VERIFY")
+        self.assertEqual(throttled.status_code, 429)
+        self.assertIn("Retry-After", throttled)
+        other_client = self.anonymous.get(
+            "/api/courses/verify-certificate/", {"certificate_number": "CH-20260101-VERIFY"}, REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertEqual(other_client.status_code, 200)
+
+    @override_settings(TOKEN_BUCKETS={"certificate_verification": (2, 0.01)})
+    def test_forwarded_for_header_cannot_refill_the_bucket(self) -> None:
+        def verify_as(forwarded_for):
+            return self.anonymous.get(
+                "/api/courses/verify-certificate/",
+                {"certificate_number": "CH-20260101-VERIFY"},
+                HTTP_X_FORWARDED_FOR=forwarded_for,
+            )
+
+        statuses = [verify_as(f"198.51.100.{n}").status_code for n in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        # Behind one proxy, only the address it appended identifies the client.
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            statuses = [verify_as(f"198.51.100.{n}, 203.0.113.7").status_code for n in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_revoked_certificates_fail_verification(self) -> None:
+        self.assertEqual(self.verify(certificate_number="CH-20260101-VERIFY").json()["percentage"], 80.0)
+        teacher = APIClient()
+        teacher.force_authenticate(self.teacher)
+        revoke = teacher.post(
+            f"/api/courses/{self.course.id}/revoke-certificate/", {"certificateNumber": "CH-20260101-VERIFY"}, format="json"
+        )
+        self.assertEqual(revoke.status_code, 200)
+        self.assertEqual(self.verify(token=self.info["verificationToken"]).status_code, 410)
+        self.assertEqual(self.verify(certificate_number="CH-20260101-VERIFY").status_code, 410)
+
+
+class ProgressUpsertTest(TestCase):
+    def setUp(self) -> None:
+        self.course = make_course(make_user("teacher", Role.TEACHER))
+        self.student = make_user("student", Role.STUDENT)
+        ClassEnrollment.objects.create(student=self.student, teacher_class=self.course.teacher_class)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def post(self, course_id, **payload):
+        return self.client.post(f"/api/courses/{course_id}/progress/", payload, format="json")
+
+    def test_progress_is_upserted_in_one_statement(self) -> None:
+        self.post(self.course.id, obtained_score=2, total_score=10)
+        first = CourseProgress.objects.get()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(self.course.id, obtained_score=12, total_score=10, is_completed=True)
+        self.assertEqual(
+            response.json(), {"obtained_score": 10.0, "total_score": 10.0, "percentage": 100.0, "is_completed": True}
+        )
+        statements = [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith(("BEGIN", "SAVEPOINT", "RELEASE"))]
+        self.assertEqual(len(statements), 2)
+        self.assertIn("ON CONFLICT", statements[1])
+        progress = CourseProgress.objects.get()
+        self.assertEqual((progress.id, progress.obtained_score, progress.is_completed), (first.id, 10.0, True))
+        self.assertGreater(progress.updated_at, first.updated_at)
+
+    def test_enrollment_and_course_are_checked(self) -> None:
+        other = make_course(make_user("other", Role.TEACHER), "Other")
+        self.assertEqual(self.post(other.id, obtained_score=1, total_score=2).status_code, 403)
+        self.assertEqual(self.post(uuid.uuid4(), obtained_score=1, total_score=2).status_code, 404)
+        self.assertFalse(CourseProgress.objects.exists())
+
+
+class JobQueueTest(TestCase):
+    def setUp(self) -> None:
+        self.admin = make_user("admin", Role.ADMIN)
+        self.handled = []
+        jobs.job_handler("test.record", queue="test")(self.record)
+        self.addCleanup(jobs.HANDLERS.pop, "test.record")
+
+    def record(self, payload):
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+        self.handled.append(payload["n"])
+        return {"n": payload["n"]}
+
+    def test_priority_order_and_concurrency_limit(self) -> None:
+        for n, priority in ((1, 0), (2, 5), (3, 0)):
+            jobs.enqueue("test.record", {"n": n}, priority=priority)
+        with override_settings(JOB_CONCURRENCY={"default": 1, "test": 1}):
+            running = jobs.claim_next("worker-a")
+            self.assertEqual(running.payload, {"n": 2})
+            # The only slot of the queue is taken.
+            self.assertIsNone(jobs.claim_next("worker-b"))
+            jobs.run_job(running)
+            self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(self.handled, [2, 1, 3])
+
+    def test_failures_are_retried_with_backoff_then_fail(self) -> None:
+        job = jobs.enqueue("test.record", {"fail": True})
+        with self.assertLogs("courses.jobs", "WARNING"):
+            jobs.run_pending()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (JobStatus.QUEUED, 1))
+            self.assertGreater(job.run_after, timezone.now())
+            for _ in range(job.max_attempts - 1):
+                Job.objects.filter(id=job.id).update(run_after=timezone.now())
+                jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 3))
+        self.assertIn("boom", job.last_error)
+
+    def test_outcome_of_a_requeued_job_is_discarded(self) -> None:
+        jobs.enqueue("test.record", {"n": 1})
+        first = jobs.claim_next("worker-a")
+        # worker-a looked dead: the job was requeued and claimed again.
+        Job.objects.filter(id=first.id).update(status=JobStatus.QUEUED, started_at=timezone.now() - timedelta(hours=1))
+        second = jobs.claim_next("worker-b")
+        with self.assertLogs("courses.jobs", "WARNING"):
+            jobs.run_job(first)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.locked_by), (JobStatus.RUNNING, "worker-b"))
+        self.assertEqual(jobs.run_job(second).status, JobStatus.SUCCEEDED)
+
+    def test_background_course_delete(self) -> None:
+        course = make_course(make_user("teacher", Role.TEACHER))
+        Module.objects.create(course=course, title="Module")
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post("/api/courses/bulk-delete/?background=true", {"ids": [str(course.id)]}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Course.objects.filter(id=course.id).exists())
+        jobs.run_pending()
+        job = client.get(response["Location"]).json()
+        self.assertEqual((job["status"], job["result"]), ("succeeded", {"deleted": 2}))
+        self.assertFalse(Module.objects.exists())
+        # Jobs are only visible to the user who started them (and admins).
+        other = APIClient()
+        other.force_authenticate(make_user("student", Role.STUDENT))
+        self.assertEqual(other.get(response["Location"]).status_code, 404)
+
+
+class CourseOutlineTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        module = Module.objects.create(course=self.course, title="Module")
+        self.lesson = Lesson.objects.create(module=module, title="Lesson", content="<p>Body</p>")
+        make_topic_chain(self.lesson, 3)
+        self.client = APIClient()
+
+    def test_outline_has_counts_and_ids_without_content(self) -> None:
+        response = self.client.get("/api/courses/?view=outline")
+        self.assertEqual(response.status_code, 200)
+        course = response.json()[0]
+        self.assertEqual((course["moduleCount"], course["lessonCount"], course["topicCount"]), (1, 1, 3))
+        lesson = course["modules"][0]["lessons"][0]
+        self.assertEqual(len(lesson["topicIds"]), 3)
+        self.assertNotIn("content", lesson)
+        self.assertNotIn("Body", response.content.decode())
+
+    def test_lesson_endpoint_returns_full_content(self) -> None:
+        response = self.client.get(f"/api/courses/{self.course.id}/lessons/{self.lesson.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["content"], "<p>Body</p>")
+        self.assertEqual(len(response.json()["topics"]), 3)
+
+    def test_lesson_endpoint_rejects_lessons_of_other_courses(self) -> None:
+        other = make_course(self.teacher, "Other")
+        response = self.client.get(f"/api/courses/{other.id}/lessons/{self.lesson.id}/")
+        self.assertEqual(response.status_code, 404)
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.admin = make_user("admin", Role.ADMIN)
+        self.teacher = make_user("teacher", Role.TEACHER)
+        for i in range(5):
+            make_course(self.teacher, f"Course {i}")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def collect(self, url: str) -> list:
+        items = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            items.extend(response.json()["results"])
+            url = response.json()["next"]
+        return items
+
+    def test_unpaginated_by_default(self) -> None:
+        self.assertIsInstance(self.client.get("/api/courses/").json(), list)
+        self.assertIsInstance(self.client.get("/api/auth/users/").json(), list)
+
+    def test_courses_walk_all_pages_once(self) -> None:
+        courses = self.collect("/api/courses/?page_size=2")
+        self.assertEqual([course["id"] for course in courses], sorted(course["id"] for course in courses))
+        self.assertEqual(sorted(course["title"] for course in courses), [f"Course {i}" for i in range(5)])
+
+    def test_duplicate_titles_are_neither_skipped_nor_repeated(self) -> None:
+        for _ in range(4):
+            make_course(self.teacher, "Course 0")
+        first = self.client.get("/api/courses/?page_size=3").json()
+        # A course inserted mid-walk, before the cursor, must not shift the rows still to come.
+        Course.objects.create(id=uuid.UUID(int=0), teacher_class=TeacherClass.objects.first(), title="Course 0")
+        ids = [course["id"] for course in first["results"] + self.collect(first["next"])]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 9)
+
+    def test_users_walk_all_pages(self) -> None:
+        users = self.collect("/api/auth/users/?page_size=1")
+        self.assertEqual([u["username"] for u in users], ["admin", "teacher"])
+
+
+class UserListingTest(TestCase):
+    def setUp(self) -> None:
+        self.admin = make_user("admin", Role.ADMIN)
+        for name in ("alice", "albert", "bob"):
+            make_user(name, Role.STUDENT)
+        User.objects.filter(username="bob").update(email="Alfa@example.com")
+        make_user("alvin", Role.TEACHER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def usernames(self, query: str) -> list:
+        response = self.client.get(f"/api/auth/users/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [u["username"] for u in response.json()]
+
+    def test_prefix_search_matches_any_name_column(self) -> None:
+        self.assertEqual(self.usernames("search=AL&ordering=username"), ["albert", "alice", "alvin", "bob"])
+
+    def test_filters_and_ordering(self) -> None:
+        self.assertEqual(self.usernames("role=student&ordering=-username"), ["bob", "alice", "albert"])
+        self.assertEqual(self.usernames("is_staff=true"), ["admin"])
+        self.assertEqual(self.usernames("joined_before=2000-01-01"), [])
+        self.assertEqual(len(self.usernames("joined_after=2000-01-01")), 5)
+
+    def test_profiles_are_joined_and_bad_params_rejected(self) -> None:
+        with CaptureQueriesContext(connection) as ctx:
+            self.usernames("role=student,teacher")
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(self.client.get("/api/auth/users/?ordering=email").status_code, 400)
+        self.assertEqual(self.client.get("/api/auth/users/?role=owner").status_code, 400)
+
+
+class ConditionalCourseGetTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        self.module = Module.objects.create(course=self.course, title="Module")
+        self.client = APIClient()
+
+    def test_list_answers_304_for_matching_etag(self) -> None:
+        first = self.client.get("/api/courses/")
+        self.assertIn("Last-Modified", first)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get("/api/courses/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_write_changes_the_etag(self) -> None:
+        etag = self.client.get(f"/api/courses/{self.course.id}/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(module=self.module, title="Lesson")
+        response = self.client.get(f"/api/courses/{self.course.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["modules"][0]["lessons"][0]["title"], "Lesson")
+
+    def test_etag_follows_the_database_not_this_process_cache(self) -> None:
+        first = self.client.get(f"/api/courses/{self.course.id}/")
+        # A write made in another process: the local cache never sees its invalidation.
+        Course.objects.filter(pk=self.course.pk).update(tree_updated_at=timezone.now() + timedelta(seconds=5))
+        response = self.client.get(f"/api/courses/{self.course.id}/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertNotEqual(response["Last-Modified"], first["Last-Modified"])
+
+    def test_outline_and_full_tree_have_different_etags(self) -> None:
+        full = self.client.get("/api/courses/")["ETag"]
+        outline = self.client.get("/api/courses/?view=outline")["ETag"]
+        self.assertNotEqual(full, outline)
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self) -> None:
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.course = make_course(self.teacher)
+        self.module = Module.objects.create(course=self.course, title="Module")
+        self.lesson = Lesson.objects.create(module=self.module, title="Lesson", content="Body")
+        make_topic_chain(self.lesson, 2)
+        self.client = APIClient()
+
+    def test_fields_and_expand_shape_the_course_tree(self) -> None:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/courses/?fields=id,title&expand=modules.lessons")
+        course = response.json()[0]
+        self.assertEqual(set(course), {"id", "title", "modules"})
+        lesson = course["modules"][0]["lessons"][0]
+        self.assertEqual(lesson["content"], "Body")
+        self.assertFalse({"topics", "takeaways", "exercises", "resources"} & set(lesson))
+        self.assertFalse(any('FROM "courses_topic"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_dotted_fields_restrict_nested_levels(self) -> None:
+        response = self.client.get("/api/courses/?fields=id,modules.title")
+        self.assertEqual(response.json()[0]["modules"], [{"title": "Module"}])
+
+    def test_topic_children_follow_topic_rules(self) -> None:
+        self.client.force_authenticate(self.teacher)
+        response = self.client.get(f"/api/lessons/{self.lesson.id}/?fields=id,topics.id&expand=topics.children")
+        topics = response.json()["topics"]
+        root = next(t for t in topics if t["children"])
+        self.assertEqual(set(root), {"id", "children"})
+        self.assertEqual(set(root["children"][0]), {"id", "children"})
+
+
+class FlatSerializerTest(TestCase):
+    def test_flat_course_renders_identical_bytes(self) -> None:
+        teacher = make_user("teacher", Role.TEACHER)
+        course = make_course(teacher, "Coursé\u2028line")
+        module = Module.objects.create(course=course, title="Module", description="<p>About</p>")
+        lesson = Lesson.objects.create(module=module, title="Lesson", hero_media_type="image", hero_media_url="https://example.com/a.png")
+        leaf = make_topic_chain(lesson, 3)
+        KeyTakeaway.objects.create(lesson=lesson, content="Remember")
+        Exercise.objects.create(topic=leaf, title="Try", description="it")
+        Resource.objects.create(topic=leaf, title="Docs", url="https://example.com")
+
+        course = Course.objects.prefetch_related(*COURSE_TREE_PREFETCH).get(id=course.id)
+        expected = JSONRenderer().render(CourseSerializer(course).data)
+        self.assertEqual(FastJSONRenderer().render(flat_course(course)), expected)
+
+
+class ConstantQueryCountTest(TestCase):
+    endpoints = ["/api/courses/", "/api/modules/", "/api/lessons/", "/api/topics/"]
+
+    def setUp(self) -> None:
+        self.admin = make_user("admin", Role.ADMIN)
+        self.teacher = make_user("teacher", Role.TEACHER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def build_tree(self, size: int) -> None:
+        for c in range(size):
+            course = make_course(self.teacher, f"Course {size}-{c}")
+            for m in range(size):
+                module = Module.objects.create(course=course, title=f"Module {m}")
+                for l in range(size):
+                    lesson = Lesson.objects.create(module=module, title=f"Lesson {l}")
+                    KeyTakeaway.objects.create(lesson=lesson, content="Takeaway")
+                    Exercise.objects.create(lesson=lesson, title="Exercise", description="Do it")
+                    Resource.objects.create(lesson=lesson, title="Resource", url="https://example.com")
+                    for topic in (Topic.objects.create(lesson=lesson, title="Root"), make_topic_chain(lesson, size + 1)):
+                        KeyTakeaway.objects.create(topic=topic, content="Topic takeaway")
+                        Exercise.objects.create(topic=topic, title="Topic exercise", description="Do it")
+                        Resource.objects.create(topic=topic, title="Topic resource", url="https://example.com")
+
+    def query_counts(self) -> dict:
+        counts = {}
+        for url in self.endpoints:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts[url] = len(ctx.captured_queries)
+        return counts
+
+    def test_query_count_does_not_grow_with_tree_size(self) -> None:
+        self.build_tree(1)
+        small = self.query_counts()
+        Course.objects.all().delete()
+        self.build_tree(3)
+        self.assertEqual(self.query_counts(), small)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def setUp(self) -> None:
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(CERTIFICATE_STORAGE={"OPTIONS": {"location": media.name}})
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def test_report_rows_for_each_role(self) -> None:
+        scale = Scale(classes=1, students=2, courses=1, modules=1, lessons=1, topic_depth=2, topic_fanout=1, takeaways=1)
+        dataset = build_dataset(scale)
+        self.assertEqual(dataset["counts"]["topics"], 2)
+        results = run_benchmark(dataset, repeat=2, endpoints=["courses.list", "enrollments.list"])
+        self.assertEqual(len(results), 2 * len(ROLES))
+        row = next(r for r in results if r["endpoint"] == "courses.list" and r["role"] == "student")
+        self.assertEqual(row["status"], 200)
+        self.assertGreater(row["queries"], 0)
+        self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+        self.assertEqual(compare_reports({"results": results}, {"results": results}), [])
+
+    def test_every_route_and_method_is_benchmarked(self) -> None:
+        ids = {**build_dataset(Scale(1, 1, 1, 1, 1, 1, 1, 1))["ids"], "disposable": 1}
+        covered = {(resolve(urlsplit(path.format(seq=1, **ids)).path).url_name, method) for _, method, path, _ in ENDPOINTS}
+        expected = set()
+        for pattern in urlpatterns:
+            if pattern.name == "api-root" or "<format>" in str(pattern.pattern):
+                continue
+            methods = getattr(pattern.callback, "actions", None) or pattern.callback.cls.http_method_names
+            # PUT runs the same update() as PATCH.
+            expected |= {(pattern.name, method) for method in methods if method not in ("options", "head", "put")}
+        self.assertEqual(expected - covered, set())
+
+    def test_full_run_has_no_server_errors(self) -> None:
+        dataset = build_dataset(Scale(1, 2, 1, 1, 1, 1, 1, 1))
+        counts = {model: model.objects.count() for model in (Course, Module, Lesson, Topic, KeyTakeaway, Exercise, Resource, TeacherClass)}
+        # The import keeps the course it creates; every other write is undone.
+        names = [name for name, _, _, _ in ENDPOINTS if name != "courses.import"]
+        results = run_benchmark(dataset, repeat=1, endpoints=names)
+        self.assertEqual(len(results), len(names) * len(ROLES))
+        self.assertEqual([row for row in results if row["status"] >= 500], [])
+        self.assertEqual({model: model.objects.count() for model in counts}, counts)
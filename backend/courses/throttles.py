@@ -0,0 +1,43 @@
+"""Request throttling for public endpoints."""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-client token bucket kept in the process-local ``local`` cache.
+
+    Each client (by IP; X-Forwarded-For only as far as NUM_PROXIES trusts
+    it, see settings.REST_FRAMEWORK) may burst ``capacity``
+    requests, refilled at ``rate`` requests per second. Subclasses set
+    ``scope``; capacity and rate come from settings.TOKEN_BUCKETS[scope].
+    """
+
+    scope = None
+    cache_alias = "local"
+
+    def __init__(self):
+        self.capacity, self.rate = settings.TOKEN_BUCKETS[self.scope]
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        cache = caches[self.cache_alias]
+        key = f"throttle:{self.scope}:{self.get_ident(request)}"
+        now = time.monotonic()
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / self.rate
+            cache.set(key, (tokens, now), timeout=int(self.capacity / self.rate) + 1)
+            return False
+        cache.set(key, (tokens - 1, now), timeout=int(self.capacity / self.rate) + 1)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class CertificateVerificationThrottle(TokenBucketThrottle):
+    scope = "certificate_verification"
@@ -0,0 +1,73 @@
+"""Signed bearer tokens for API clients that do not keep a session.
+
+Tokens are ``django.core.signing`` payloads (HMAC-SHA256 with SECRET_KEY and
+a per-kind salt), so any node sharing the secret can verify them:
+
+- access tokens carry the user id, role and token generation and live for
+  ACCESS_TOKEN_LIFETIME seconds; ``SignedTokenAuthentication`` accepts them
+  without a database query (the user comes from ``CachedProfileBackend``);
+- refresh tokens carry the user id and generation and live for
+  REFRESH_TOKEN_LIFETIME seconds; ``auth/token/refresh/`` checks their
+  generation against the database before issuing a new access token.
+
+Bumping ``UserProfile.token_generation`` revokes every token of a user.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+
+from .backends import forget_user
+from .models import UserProfile
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+def _lifetime(kind):
+    if kind == ACCESS:
+        return getattr(settings, "ACCESS_TOKEN_LIFETIME", 300)
+    return getattr(settings, "REFRESH_TOKEN_LIFETIME", 86400)
+
+
+def _salt(kind):
+    return f"courses.tokens.{kind}"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def make_token(kind, profile):
+    payload = {"uid": profile.user_id, "gen": profile.token_generation}
+    if kind == ACCESS:
+        payload["role"] = profile.role
+    return signing.dumps(payload, salt=_salt(kind), compress=True)
+
+
+def issue_tokens(profile):
+    """Access and refresh token pair for ``profile``'s user, in the response shape of the token views."""
+    return {
+        "access": make_token(ACCESS, profile),
+        "refresh": make_token(REFRESH, profile),
+        "token_type": "Bearer",
+        "expires_in": _lifetime(ACCESS),
+    }
+
+
+def read_token(kind, token):
+    """Verified payload of ``token``; raises InvalidToken if forged, malformed or expired."""
+    try:
+        payload = signing.loads(token, salt=_salt(kind), max_age=_lifetime(kind))
+    except signing.SignatureExpired:
+        raise InvalidToken("Token has expired.")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token.")
+    if not isinstance(payload, dict) or not {"uid", "gen"} <= payload.keys():
+        raise InvalidToken("Invalid token.")
+    return payload
+
+
+def revoke_tokens(user):
+    """Invalidate every access and refresh token issued to ``user`` so far."""
+    UserProfile.objects.filter(user=user).update(token_generation=F("token_generation") + 1)
+    forget_user(user.pk)
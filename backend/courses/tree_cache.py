@@ -0,0 +1,188 @@
+"""Per-course cache of the serialized course tree.
+
+Each course's full ``CourseSerializer`` document (built by the equivalent
+``flat_course``) is stored under a key that embeds a per-course version token. Writes anywhere in the course tree bump
+the token (see ``courses.signals``), so stale documents are simply never read
+again and expire on their own.
+
+The same writes stamp ``Course.tree_updated_at`` in the database, and the
+views' ETag/Last-Modified validators come from those stamps: they hold in
+every process whatever the cache backend.
+
+Tokens only reach other processes through the cache itself, so a deployment
+running more than one process (SERVER_PROCESSES) must use a shared cache
+backend; ``require_shared_cache`` refuses to start otherwise (and checks the
+session cache the same way).
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .flat_serializers import flat_course
+from .models import Course
+from .prefetch import prefetch_lookups
+
+# Bump when the serialized shape of CourseSerializer / flat_course changes.
+SCHEMA_VERSION = 1
+
+COURSE_TREE_PREFETCH = tuple(prefetch_lookups("course"))
+
+
+def _timeout():
+    return getattr(settings, "COURSE_TREE_CACHE_TIMEOUT", 3600)
+
+
+def _version_timeout():
+    # Outlives the documents stored under a token; an expired token is simply
+    # re-minted, leaving the documents built under it unreachable.
+    return 2 * _timeout()
+
+
+LOCMEM = "django.core.cache.backends.locmem.LocMemCache"
+
+# Session engines that read sessions from SESSION_CACHE_ALIAS.
+CACHED_SESSION_ENGINES = (
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+)
+
+
+def require_shared_cache():
+    """Raise ImproperlyConfigured if several processes would each keep their own tree or session cache."""
+    if getattr(settings, "SERVER_PROCESSES", 1) <= 1:
+        return
+    if settings.CACHES["default"]["BACKEND"] == LOCMEM:
+        raise ImproperlyConfigured(
+            "SERVER_PROCESSES > 1 needs a shared default cache (DJANGO_CACHE_BACKEND): "
+            "with LocMemCache, course tree invalidations never reach the other processes."
+        )
+    sessions = settings.CACHES.get(getattr(settings, "SESSION_CACHE_ALIAS", "default"), {})
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and sessions.get("BACKEND") == LOCMEM:
+        raise ImproperlyConfigured(
+            "SERVER_PROCESSES > 1 needs a shared session cache (DJANGO_SESSION_CACHE_BACKEND): "
+            "with LocMemCache, a session ended in one process stays valid in the others."
+        )
+
+
+def _version_key(course_id):
+    return f"course-tree-version:{course_id}"
+
+
+def _document_key(course_id, version):
+    return f"course-tree:v{SCHEMA_VERSION}:{course_id}:{version}"
+
+
+def _new_version():
+    # "<minted at, ns>-<random>": unique per bump and never older than the write.
+    return f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+
+def get_course_versions(course_ids):
+    """Return ``{course_id: version token}``, minting tokens for unseen courses."""
+    keys = {_version_key(course_id): course_id for course_id in course_ids}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in found.items()}
+    missing = {key: _new_version() for key, course_id in keys.items() if course_id not in versions}
+    if missing:
+        # add() keeps a token another worker may have set in the meantime.
+        for key, token in missing.items():
+            cache.add(key, token, _version_timeout())
+        for key, value in cache.get_many(list(missing)).items():
+            versions[keys[key]] = value
+    return versions
+
+
+def course_tree_validators(stamps, variant=""):
+    """Return ``(etag, last_modified)`` for a response built from ``stamps``.
+
+    ``stamps`` are the ordered ``(course_id, tree_updated_at)`` pairs of the
+    visible courses. The ETag covers them and a ``variant`` string describing
+    the response shape (e.g. the request's query string). ``last_modified`` is
+    a Unix timestamp, or None when there are no courses.
+    """
+    digest = hashlib.sha256(f"{SCHEMA_VERSION}|{variant}".encode())
+    for course_id, updated_at in stamps:
+        digest.update(f"|{course_id}:{updated_at.isoformat()}".encode())
+    last_modified = int(max(updated_at for _, updated_at in stamps).timestamp()) if stamps else None
+    return f'"{digest.hexdigest()[:32]}"', last_modified
+
+
+def get_course_documents(course_ids, versions=None):
+    """Return serialized course trees for ``course_ids``, in the same order.
+
+    Cached documents are reused; missing ones are built in a single prefetched
+    queryset and stored for the next request.
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return []
+    if versions is None:
+        versions = get_course_versions(course_ids)
+    doc_keys = {course_id: _document_key(course_id, versions.get(course_id, "")) for course_id in course_ids}
+    cached = cache.get_many(list(doc_keys.values()))
+    documents = {course_id: cached[key] for course_id, key in doc_keys.items() if key in cached}
+
+    missing = [course_id for course_id in course_ids if course_id not in documents]
+    if missing:
+        courses = Course.objects.filter(id__in=missing).prefetch_related(*COURSE_TREE_PREFETCH)
+        built = {course.id: flat_course(course) for course in courses}
+        # Documents are stored under the version read *before* building, so a
+        # write that lands while we serialize leaves this copy unreachable.
+        cache.set_many({doc_keys[course_id]: data for course_id, data in built.items()}, _timeout())
+        documents.update(built)
+
+    return [documents[course_id] for course_id in course_ids if course_id in documents]
+
+
+class _PendingCourses(threading.local):
+    """Courses written by this thread since the last flush."""
+
+    def __init__(self):
+        self.ids = set()
+        self.touch = set()
+
+
+_pending = _PendingCourses()
+
+
+def invalidate_course_tree(course_id, touch=True):
+    """Drop the cached tree of one course and stamp its ``tree_updated_at`` once the transaction commits.
+
+    ``touch`` is False when the course row itself was saved, which stamps it
+    already, or deleted; either way the writes collected for it before need no
+    stamp either.
+
+    Writes are collected per thread, and the first commit callback handles all
+    of them: one UPDATE of the stamps and one version bump per course, however
+    many rows the transaction wrote (a cascading course delete writes none).
+    Outside a transaction this happens at once.
+    """
+    if course_id is None:
+        return
+    _pending.ids.add(course_id)
+    if touch:
+        _pending.touch.add(course_id)
+    else:
+        _pending.touch.discard(course_id)
+    # Registering is cheap; callbacks after the first find nothing left to do.
+    # One per write (rather than per transaction) also keeps ids collected in
+    # a rolled-back transaction from waiting forever: the next commit flushes them.
+    transaction.on_commit(flush_course_trees)
+
+
+def flush_course_trees():
+    """Stamp and invalidate the courses collected by ``invalidate_course_tree``."""
+    course_ids, touch = _pending.ids, _pending.touch
+    if not course_ids:
+        return
+    _pending.ids, _pending.touch = set(), set()
+    if touch:
+        Course.objects.filter(pk__in=touch).update(tree_updated_at=timezone.now())
+    cache.set_many({_version_key(course_id): _new_version() for course_id in course_ids}, _version_timeout())
@@ -1,8 +1,8 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import CourseViewSet, LessonViewSet, ModuleViewSet, TopicViewSet, KeyTakeawayViewSet, ExerciseViewSet, ResourceViewSet, TeacherClassViewSet, ClassEnrollmentViewSet
-from .auth_views import register_view, login_view, logout_view, check_auth, csrf_token, users_view, users_bulk_delete, user_detail_view
+from .views import CourseViewSet, LessonViewSet, ModuleViewSet, TopicViewSet, KeyTakeawayViewSet, ExerciseViewSet, ResourceViewSet, TeacherClassViewSet, ClassEnrollmentViewSet, JobViewSet
+from .auth_views import register_view, login_view, logout_view, token_obtain_view, token_refresh_view, check_auth, csrf_token, users_view, users_bulk_delete, user_detail_view
 
 router = DefaultRouter()
 router.register(r"courses", CourseViewSet, basename="course")
@@ -14,10 +14,13 @@ router.register(r"exercises", ExerciseViewSet)
 router.register(r"resources", ResourceViewSet)
 router.register(r"classes", TeacherClassViewSet, basename="teacher-class")
 router.register(r"enrollments", ClassEnrollmentViewSet, basename="enrollment")
+router.register(r"jobs", JobViewSet, basename="job")
 
 urlpatterns = [
     path('auth/register/', register_view, name='register'),
     path('auth/login/', login_view, name='login'),
+    path('auth/token/', token_obtain_view, name='token_obtain'),
+    path('auth/token/refresh/', token_refresh_view, name='token_refresh'),
     path('auth/logout/', logout_view, name='logout'),
     path('auth/check/', check_auth, name='check_auth'),
     path('auth/csrf/', csrf_token, name='csrf_token'),
@@ -0,0 +1,255 @@
+"""Certificate verification tokens that can be checked without the database.
+
+A verification token is a ``django.core.signing`` payload (HMAC-SHA256 with
+SECRET_KEY and its own salt) carrying what a verifier is shown: the
+certificate number, the student, the course, the instructor, the issue date
+and the score at signing time. ``read_verification_token`` proves that the
+claims were issued by this server, so ``verify-certificate?token=...`` only
+has to know whether the certificate was revoked since.
+
+Revoked numbers are kept in a per-process set, reloaded with one indexed
+query at most every CERTIFICATE_REVOCATION_REFRESH seconds (and at once in
+the process that revokes). Another process may therefore accept a revoked
+certificate for up to that long.
+
+Lookups by certificate number go through ``verify_number``: well-formed
+numbers that the Bloom filter of issued numbers rules out are rejected
+without a query, and every answer (found, revoked or not found) is cached
+per number for CERTIFICATE_VERIFY_CACHE_TIMEOUT seconds. Revoking or
+deleting a certificate drops its entry; names, titles and scores shown for
+a found certificate may lag behind edits by up to the timeout.
+"""
+import hashlib
+import math
+import re
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from .certificates import PDF_FIELDS, discard_certificate_pdfs, person_name
+from .models import CourseCompletionCertificate, CourseProgress
+
+SALT = "courses.verification"
+
+# Numbers made by certificates.new_certificate_number.
+NUMBER_RE = re.compile(r"^CH-(\d{8})-[A-Z0-9]{6}$")
+
+
+class InvalidVerificationToken(Exception):
+    pass
+
+
+def certificate_claims(cert, progress):
+    """The signed facts of ``cert`` (student, course and instructor loaded)."""
+    course = cert.course
+    teacher = course.teacher_class.teacher if course.teacher_class_id else None
+    return {
+        "n": cert.certificate_number,
+        "sid": cert.student_id,
+        "s": person_name(cert.student),
+        "cid": str(course.id),
+        "c": course.title,
+        "i": person_name(teacher) if teacher else "",
+        "d": cert.issued_at.isoformat(),
+        "o": progress.obtained_score if progress else 0,
+        "t": progress.total_score if progress else 0,
+    }
+
+
+def make_verification_token(cert, progress):
+    return signing.dumps(certificate_claims(cert, progress), salt=SALT, compress=True)
+
+
+def verification_url(token):
+    return f"{settings.FRONTEND_URL}/verify-certificate?{urlencode({'token': token})}"
+
+
+def read_verification_token(token):
+    """Claims of ``token``; raises InvalidVerificationToken if forged or malformed."""
+    try:
+        claims = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidVerificationToken("Invalid verification token.")
+    if not isinstance(claims, dict) or not {"n", "s", "c", "i", "d", "o", "t"} <= claims.keys():
+        raise InvalidVerificationToken("Invalid verification token.")
+    return claims
+
+
+def verification_result(claims):
+    """Response of ``verify-certificate`` for verified ``claims``."""
+    total = claims["t"]
+    return {
+        "valid": True,
+        "certificateNumber": claims["n"],
+        "issuedAt": claims["d"],
+        "courseTitle": claims["c"],
+        # Not signed: descriptions would make shared links too long.
+        "courseDescription": "",
+        "studentName": claims["s"],
+        "instructorName": claims["i"],
+        "obtainedScore": claims["o"],
+        "totalScore": total,
+        "percentage": (claims["o"] / total) * 100.0 if total > 0 else 0.0,
+        "verifiedAt": timezone.now().isoformat(),
+        "certificateStatus": "Valid and Active",
+    }
+
+
+class RevocationSet:
+    """Revoked certificate numbers of the whole table, reloaded periodically."""
+
+    def __init__(self):
+        self.numbers = frozenset()
+        self.loaded_at = None
+
+    def __contains__(self, number):
+        refresh = getattr(settings, "CERTIFICATE_REVOCATION_REFRESH", 60)
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > refresh:
+            self.numbers = frozenset(
+                CourseCompletionCertificate.objects.filter(revoked_at__isnull=False).values_list(
+                    "certificate_number", flat=True
+                )
+            )
+            self.loaded_at = time.monotonic()
+        return number in self.numbers
+
+    def invalidate(self):
+        self.loaded_at = None
+
+
+revoked_numbers = RevocationSet()
+
+
+def revoke_certificate(cert):
+    """Revoke ``cert`` and drop its stored PDF."""
+    pdf_file = cert.pdf_file
+    cert.revoked_at = timezone.now()
+    cert.pdf_file, cert.pdf_sha256, cert.pdf_rendered_at = "", "", None
+    cert.save(update_fields=["revoked_at", *PDF_FIELDS])
+    discard_certificate_pdfs(pdf_file)
+    revoked_numbers.invalidate()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class IssuedNumbers:
+    """Per-process Bloom filter of the certificate numbers issued so far.
+
+    Numbers issued by other processes after the filter was built are not in
+    it, but they carry their issue date. The filter is therefore only trusted
+    for numbers dated at least a day before it was built; newer ones fall
+    through to the database (and the negative cache).
+    """
+
+    def __init__(self):
+        self.filter = None
+        self.built_at = None
+
+    def _build(self):
+        numbers = CourseCompletionCertificate.objects.values_list("certificate_number", flat=True)
+        bloom = BloomFilter(int(numbers.count() * 1.25) + 1024)
+        for number in numbers.iterator(chunk_size=2000):
+            bloom.add(number)
+        self.filter, self.built_at = bloom, timezone.now()
+
+    def may_exist(self, number):
+        """False when ``number`` was certainly never issued."""
+        match = NUMBER_RE.match(number)
+        if not match:
+            return False
+        try:
+            issued_on = datetime.strptime(match.group(1), "%Y%m%d").date()
+        except ValueError:
+            return False
+        refresh = timedelta(seconds=getattr(settings, "CERTIFICATE_FILTER_REFRESH", 21600))
+        if self.built_at is None or timezone.now() - self.built_at > refresh:
+            self._build()
+        if issued_on > timezone.now().date():
+            return False
+        if issued_on >= (self.built_at - timedelta(days=1)).date():
+            return True
+        return number in self.filter
+
+    def add(self, number):
+        if self.filter is not None:
+            self.filter.add(number)
+
+    def invalidate(self):
+        self.built_at = None
+
+
+issued_numbers = IssuedNumbers()
+
+
+def _verification_key(number):
+    return f"certificate-verification:{number}"
+
+
+def forget_verification(*numbers):
+    cache.delete_many([_verification_key(number) for number in numbers])
+
+
+def record_issued(*numbers):
+    """Make freshly issued ``numbers`` verifiable: drop cached misses, add them to the filter."""
+    forget_verification(*numbers)
+    for number in numbers:
+        issued_numbers.add(number)
+
+
+NOT_FOUND = (404, {"error": "Certificate not found or invalid certificate number"})
+REVOKED = (410, {"error": "This certificate has been revoked"})
+
+
+def _lookup_number(number):
+    cert = CourseCompletionCertificate.objects.select_related(
+        "student", "course", "course__teacher_class", "course__teacher_class__teacher"
+    ).filter(certificate_number=number).first()
+    if cert is None:
+        return NOT_FOUND
+    if cert.revoked_at:
+        return REVOKED
+    progress = CourseProgress.objects.filter(student_id=cert.student_id, course_id=cert.course_id).first()
+    result = verification_result(certificate_claims(cert, progress))
+    result["courseDescription"] = cert.course.description
+    return 200, result
+
+
+def verify_number(number):
+    """``(status, body)`` of verifying ``number``, served from the cache when possible."""
+    if not issued_numbers.may_exist(number):
+        # Not cached: garbage lookups must not fill the cache.
+        return NOT_FOUND
+    key = _verification_key(number)
+    cached = cache.get(key)
+    if cached is None:
+        cached = _lookup_number(number)
+        cache.set(key, cached, getattr(settings, "CERTIFICATE_VERIFY_CACHE_TIMEOUT", 300))
+    code, body = cached
+    if code == 200:
+        body = {**body, "verifiedAt": timezone.now().isoformat()}
+    return code, body
@@ -1,13 +1,53 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, BasePermission
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 import secrets
 import string
+import uuid
+
+from .models import Course, Lesson, Module, Topic, KeyTakeaway, Exercise, Resource, TeacherClass, ClassEnrollment, UserProfile, Role, CourseCompletionCertificate, CourseProgress, Job
+from .prefetch import prefetch_lookups
+from .bulk_certificates import certificate_zip_chunks, issue_class_certificates
+from .certificates import certificate_file_response, certificate_storage, new_certificate_number, pdf_is_stale
+from .course_io import CourseImportSerializer, export_course_chunks, save_course_import
+from .deletion import delete_subtrees
+from .jobs import enqueue, job_url
+from .verification import InvalidVerificationToken, make_verification_token, read_verification_token, revoke_certificate, revoked_numbers, verification_result, verification_url, verify_number
+from .throttles import CertificateVerificationThrottle
+from .tree_cache import COURSE_TREE_PREFETCH, course_tree_validators, get_course_documents
+from .serializers import build_topic_children, SparseFieldset, CourseSerializer, CourseOutlineSerializer, LessonSerializer, ModuleSerializer, TopicSerializer, KeyTakeawaySerializer, ExerciseSerializer, ResourceSerializer, TeacherClassSerializer, ClassEnrollmentSerializer, UserProfileSerializer, JobSerializer
+
+
+def job_accepted(job, **extra):
+    """202 response pointing the client at the status endpoint of ``job``."""
+    url = job_url(job)
+    return Response(
+        {"job": JobSerializer(job).data, "pollUrl": url, **extra},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url},
+    )
+
+
+def background_requested(request):
+    return request.query_params.get("background", "").lower() in ("1", "true", "yes")
 
-from .models import Course, Lesson, Module, Topic, KeyTakeaway, Exercise, Resource, TeacherClass, ClassEnrollment, UserProfile, Role, CourseCompletionCertificate, CourseProgress
-from .serializers import CourseSerializer, LessonSerializer, ModuleSerializer, TopicSerializer, KeyTakeawaySerializer, ExerciseSerializer, ResourceSerializer, TeacherClassSerializer, ClassEnrollmentSerializer, UserProfileSerializer
+
+def serve_or_render_certificate(request, cert, progress):
+    """Stream the stored PDF of ``cert``, or queue its rendering and answer 202."""
+    storage = certificate_storage()
+    if not pdf_is_stale(cert, progress, storage):
+        return certificate_file_response(request, cert, storage)
+    job = enqueue("certificate.render", {"certificate_id": str(cert.id)}, user=request.user, key=f"certificate:{cert.id}")
+    return job_accepted(job, certificateNumber=cert.certificate_number)
 
 
 class IsAdminOrTeacherOfCourse(BasePermission):
@@ -21,22 +61,81 @@ class IsAdminOrTeacherOfCourse(BasePermission):
         if profile and profile.role == Role.ADMIN:
             return True
         
-        # Get the course (obj might be a course or have a course relationship)
+        # Content rows carry their owner; courses resolve it through their class
         if isinstance(obj, Course):
-            course = obj
-        elif hasattr(obj, 'lesson') and hasattr(obj.lesson, 'module') and hasattr(obj.lesson.module, 'course'):
-            course = obj.lesson.module.course
-        elif hasattr(obj, 'module') and hasattr(obj.module, 'course'):
-            course = obj.module.course
+            owner_id = obj.teacher_class.teacher_id if obj.teacher_class_id else None
         else:
-            return False
-        
-        # Check if teacher owns the course's teacher class
-        if course.teacher_class and course.teacher_class.teacher == user:
-            return True
-        
-        return False
+            owner_id = getattr(obj, 'owner_teacher_id', None)
+        
+        return owner_id is not None and owner_id == user.id
+
+
+
+def create_nested_items(parent_field, parent, takeaways_data, exercises_data, resources_data):
+    """Insert a lesson's or topic's takeaways, exercises and resources, one INSERT per type.
+
+    Returns the created rows by relation name, in their display order. The
+    denormalized ownership keys are copied from ``parent`` since bulk_create
+    skips ``save()``.
+    """
+    keys = {parent_field: parent, 'course_id': parent.course_id, 'owner_teacher_id': parent.owner_teacher_id}
+    takeaways = [
+        KeyTakeaway(content=content, order=index, **keys)
+        for index, content in enumerate(takeaways_data)
+        if isinstance(content, str)
+    ]
+    exercises = [
+        Exercise(title=exercise.get('title', ''), description=exercise.get('description', ''), order=index, **keys)
+        for index, exercise in enumerate(exercises_data)
+        if isinstance(exercise, dict)
+    ]
+    resources = [
+        Resource(
+            title=resource.get('title', ''),
+            description=resource.get('description', ''),
+            url=resource.get('url', ''),
+            order=index,
+            **keys
+        )
+        for index, resource in enumerate(resources_data)
+        if isinstance(resource, dict)
+    ]
+    return {
+        'takeaways': KeyTakeaway.objects.bulk_create(takeaways),
+        'exercises': Exercise.objects.bulk_create(exercises),
+        'resources': Resource.objects.bulk_create(resources),
+    }
+
+
+def set_prefetched(instance, name, objects):
+    """Seed ``instance.<name>.all()`` with rows already in memory, as prefetch_related would."""
+    queryset = getattr(instance, name).get_queryset()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+class SparseFieldsViewMixin:
+    """Trim a viewset's prefetches to the relations `?fields=` / `?expand=` will render.
 
+    Views set `prefetch_level` to the serializer level of their objects.
+    """
+
+    prefetch_level = None
+
+    def get_sparse_fieldset(self):
+        if self.request.method != "GET":
+            return None
+        return SparseFieldset.from_query_params(self.request.query_params)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sparse = self.get_sparse_fieldset()
+        if sparse is None:
+            return queryset
+        return queryset.prefetch_related(None).prefetch_related(*prefetch_lookups(self.prefetch_level, sparse.expand))
 
 
 def generate_class_code():
@@ -47,19 +146,39 @@ def generate_class_code():
             return code
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # Titles repeat and change, and created_at is only a date; the UUID is
+    # the only unique, immutable key of a course.
+    cursor_ordering = ("id",)
+    prefetch_level = "course"
+
+    def is_outline(self):
+        """Whether the client asked for the lightweight outline (`?view=outline`)."""
+        return self.request.method == "GET" and self.request.query_params.get("view") == "outline"
+
+    def get_serializer_class(self):
+        if self.is_outline():
+            return CourseOutlineSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         user = self.request.user
         profile = getattr(user, 'profile', None)
         
-        queryset = Course.objects.all().prefetch_related(
-            "modules__lessons__topics__children",
-            "modules__lessons__takeaways",
-            "modules__lessons",
-        )
+        sparse = self.get_sparse_fieldset()
+        if self.is_outline():
+            # Only the columns the outline renders; content bodies are never loaded.
+            queryset = Course.objects.all().prefetch_related(
+                Prefetch("modules", queryset=Module.objects.only("id", "course_id", "title", "order")),
+                Prefetch("modules__lessons", queryset=Lesson.objects.only("id", "module_id", "title", "order")),
+                Prefetch("modules__lessons__topics", queryset=Topic.objects.only("id", "lesson_id", "title", "order")),
+            )
+        elif sparse is not None:
+            queryset = Course.objects.all().prefetch_related(*prefetch_lookups(self.prefetch_level, sparse.expand))
+        else:
+            queryset = Course.objects.all().prefetch_related(*COURSE_TREE_PREFETCH)
         
         # Admin can see all courses
         if profile and profile.role == Role.ADMIN:
@@ -78,6 +197,73 @@ class CourseViewSet(viewsets.ModelViewSet):
         # Anonymous users: allow read-only access to all courses for landing page
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """List visible courses, assembled from the per-course tree cache."""
+        queryset = self.filter_queryset(self.get_queryset())
+        ids_queryset = queryset.prefetch_related(None)
+        page = self.paginate_queryset(ids_queryset.only("id", "title", "tree_updated_at"))
+        if page is not None:
+            stamps = [(course.id, course.tree_updated_at) for course in page]
+        else:
+            stamps = list(ids_queryset.values_list("id", "tree_updated_at"))
+        return self.course_tree_response(queryset, stamps, paginated=page is not None)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve one visible course from the per-course tree cache."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        course = get_object_or_404(queryset.prefetch_related(None).only("id", "tree_updated_at"), **lookup)
+        self.check_object_permissions(request, course)
+        return self.course_tree_response(queryset, [(course.id, course.tree_updated_at)], many=False)
+
+    def course_tree_response(self, queryset, stamps, many=True, paginated=False):
+        """Render the courses of `stamps` with ETag/Last-Modified validators.
+
+        `stamps` are `(course_id, tree_updated_at)` pairs read along with the
+        visible ids, so conditional requests are answered with 304 before
+        anything is loaded or serialized.
+        """
+        etag, last_modified = course_tree_validators(stamps, self.request.get_full_path())
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        course_ids = [course_id for course_id, _ in stamps]
+
+        if self.is_outline() or self.get_sparse_fieldset() is not None:
+            courses = {course.id: course for course in queryset.filter(id__in=course_ids)}
+            data = self.get_serializer([courses[course_id] for course_id in course_ids if course_id in courses], many=True).data
+        else:
+            data = get_course_documents(course_ids)
+
+        if not many:
+            response = Response(data[0])
+        elif paginated:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # Always revalidate: the body depends on the requester's visible courses.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(detail=True, methods=["get"], url_path=r"lessons/(?P<lesson_id>[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12})")
+    def lesson(self, request, pk=None, lesson_id=None):
+        """Full content of one lesson of a visible course, for clients using the outline."""
+        # Visibility check only; the course tree itself is not needed here.
+        course = get_object_or_404(self.filter_queryset(self.get_queryset()).prefetch_related(None), pk=pk)
+        self.check_object_permissions(request, course)
+        lesson = (
+            Lesson.objects.filter(id=lesson_id, module__course=course)
+            .prefetch_related(*prefetch_lookups("lesson"))
+            .first()
+        )
+        if lesson is None:
+            return Response({"error": "Lesson not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(LessonSerializer(lesson, context=self.get_serializer_context()).data)
+
     def create(self, request, *args, **kwargs):
         """Create a course with permission checks."""
         user = request.user
@@ -135,7 +321,7 @@ class CourseViewSet(viewsets.ModelViewSet):
         profile = getattr(user, 'profile', None)
         
         # Permission check: Only admin or the teacher of the class can delete
-        if profile and profile.role == Role.TEACHER and instance.teacher_class.teacher != user:
+        if profile and profile.role == Role.TEACHER and (not instance.teacher_class_id or instance.teacher_class.teacher_id != user.id):
             return Response(
                 {'error': 'You can only delete courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -185,99 +371,36 @@ class CourseViewSet(viewsets.ModelViewSet):
         # Create or get existing certificate record
         cert = CourseCompletionCertificate.objects.filter(student=user, course=course).first()
         if not cert:
-            # Unique cert number pattern: CH-YYYYMMDD-XXXXXX (random)
-            import datetime, secrets, string
-            date_part = datetime.datetime.utcnow().strftime("%Y%m%d")
-            rand_part = "".join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
-            cert_number = f"CH-{date_part}-{rand_part}"
             cert = CourseCompletionCertificate.objects.create(
                 student=user,
                 course=course,
-                certificate_number=cert_number,
+                certificate_number=new_certificate_number(),
             )
 
-        # Generate PDF using reportlab
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from io import BytesIO
-
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-
-        # Border
-        margin = 36
-        c.setStrokeColor(colors.HexColor("#6B46C1"))  # purple
-        c.setLineWidth(3)
-        c.rect(margin, margin, width - 2 * margin, height - 2 * margin)
-
-        # Title
-        c.setFont("Helvetica-Bold", 28)
-        c.setFillColor(colors.HexColor("#1F2937"))
-        c.drawCentredString(width / 2, height - 150, "Certificate of Completion")
-
-        # Subtitle
-        c.setFont("Helvetica", 14)
-        c.setFillColor(colors.HexColor("#374151"))
-        c.drawCentredString(width / 2, height - 180, "This certifies that")
-
-        # Student Name
-        full_name = (user.first_name + " " + user.last_name).strip() or user.username
-        c.setFont("Helvetica-Bold", 22)
-        c.setFillColor(colors.HexColor("#111827"))
-        c.drawCentredString(width / 2, height - 220, full_name)
+        # Rendered once by a background worker; later calls stream the stored file.
+        return serve_or_render_certificate(request, cert, progress)
 
-        # Course title line
-        c.setFont("Helvetica", 14)
-        c.setFillColor(colors.HexColor("#374151"))
-        c.drawCentredString(width / 2, height - 260, "has successfully completed the course")
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated], url_path="certificate-pdf")
+    def certificate_pdf(self, request, pk=None):
+        """Download the stored PDF of the student's certificate for this course.
 
-        c.setFont("Helvetica-Bold", 18)
-        c.setFillColor(colors.HexColor("#111827"))
-        c.drawCentredString(width / 2, height - 290, course.title)
+        Supports conditional requests (ETag/Last-Modified) and single byte
+        ranges. Answers 202 with a job to poll while the PDF is being rendered.
+        """
+        user = request.user
+        profile = getattr(user, "profile", None)
 
-        # Additional details
-        teacher_name = ""
-        if course.teacher_class and course.teacher_class.teacher:
-            t = course.teacher_class.teacher
-            teacher_name = (t.first_name + " " + t.last_name).strip() or t.username
+        if not profile or profile.role != Role.STUDENT:
+            return Response({"error": "Only students can download certificates"}, status=status.HTTP_403_FORBIDDEN)
 
-        c.setFont("Helvetica", 12)
-        c.setFillColor(colors.HexColor("#6B7280"))
-        y = height - 340
-        if teacher_name:
-            c.drawCentredString(width / 2, y, f"Instructor: {teacher_name}")
-            y -= 20
-
-        c.drawCentredString(width / 2, y, f"Issued on: {cert.issued_at.strftime('%Y-%m-%d')}")
-        y -= 20
-        c.drawCentredString(width / 2, y, f"Certificate No: {cert.certificate_number}")
-        y -= 20
-        
-        # Show score only if progress has been tracked
-        if progress and progress.total_score > 0:
-            c.drawCentredString(width / 2, y, f"Score: {progress.obtained_score:.1f} / {progress.total_score:.1f} ({progress.percentage:.1f}%)")
-            y -= 20
-
-        # Signature line
-        c.setStrokeColor(colors.HexColor("#9CA3AF"))
-        c.setLineWidth(1)
-        c.line(width / 2 - 150, 120, width / 2 + 150, 120)
-        c.setFont("Helvetica", 10)
-        c.setFillColor(colors.HexColor("#6B7280"))
-        c.drawCentredString(width / 2, 100, "Authorized Signature")
-
-        c.showPage()
-        c.save()
-
-        buffer.seek(0)
-        from django.http import HttpResponse
-        response = HttpResponse(buffer.read(), content_type="application/pdf")
-        filename = f"certificate_{cert.certificate_number}.pdf"
-        response["Content-Disposition"] = f"attachment; filename=\"{filename}\""
-        return response
+        cert = CourseCompletionCertificate.objects.select_related("student", "course__teacher_class__teacher").filter(
+            student=user, course_id=pk
+        ).first()
+        if not cert:
+            return Response({"error": "Certificate not found. Generate certificate first."}, status=status.HTTP_404_NOT_FOUND)
+
+        progress = CourseProgress.objects.filter(student=user, course_id=pk).first()
+        return serve_or_render_certificate(request, cert, progress)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated], url_path="certificate-info")
     def get_certificate_info(self, request, pk=None):
@@ -304,6 +427,11 @@ class CourseViewSet(viewsets.ModelViewSet):
         # Get progress info
         progress = CourseProgress.objects.filter(student=user, course=course).first()
 
+        # Signed claims that verify-certificate can check without a lookup
+        cert.student = user
+        cert.course = course
+        token = make_verification_token(cert, progress)
+
         full_name = (user.first_name + " " + user.last_name).strip() or user.username
         teacher_name = ""
         if course.teacher_class and course.teacher_class.teacher:
@@ -322,6 +450,8 @@ class CourseViewSet(viewsets.ModelViewSet):
             "percentage": progress.percentage if progress else 0,
             "userName": user.username,
             "userEmail": user.email,
+            "verificationToken": token,
+            "verificationUrl": verification_url(token),
         })
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated], url_path="progress")
@@ -330,21 +460,21 @@ class CourseViewSet(viewsets.ModelViewSet):
 
         Expected payload: { obtained_score: number, total_score: number, is_completed: bool }
         Only students, and they must be enrolled in the class (if class-bound).
+        Costs two statements: the course/enrollment check and the upsert.
         """
-        try:
-            course = Course.objects.get(pk=pk)
-        except Course.DoesNotExist:
-            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
-
         user = request.user
         profile = getattr(user, "profile", None)
         if not profile or profile.role != Role.STUDENT:
             return Response({"error": "Only students can update progress"}, status=status.HTTP_403_FORBIDDEN)
 
-        if course.teacher_class:
-            enrolled = ClassEnrollment.objects.filter(student=user, teacher_class=course.teacher_class).exists()
-            if not enrolled:
-                return Response({"error": "You must be enrolled in this course's class."}, status=status.HTTP_403_FORBIDDEN)
+        # Course existence and enrollment in its class, in one query
+        course = Course.objects.filter(pk=pk).annotate(
+            enrolled=Exists(ClassEnrollment.objects.filter(student=user, teacher_class=OuterRef("teacher_class")))
+        ).values("id", "teacher_class_id", "enrolled").first()
+        if course is None:
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        if course["teacher_class_id"] and not course["enrolled"]:
+            return Response({"error": "You must be enrolled in this course's class."}, status=status.HTTP_403_FORBIDDEN)
 
         data = request.data or {}
         try:
@@ -362,14 +492,20 @@ class CourseViewSet(viewsets.ModelViewSet):
 
         is_completed = bool(data.get("is_completed", False))
 
-        progress, _ = CourseProgress.objects.update_or_create(
+        # INSERT ... ON CONFLICT (student, course) DO UPDATE: atomic under
+        # concurrent posts, and the response is built from what was written.
+        progress = CourseProgress(
             student=user,
-            course=course,
-            defaults={
-                "obtained_score": obtained,
-                "total_score": total,
-                "is_completed": is_completed,
-            },
+            course_id=course["id"],
+            obtained_score=obtained,
+            total_score=total,
+            is_completed=is_completed,
+        )
+        CourseProgress.objects.bulk_create(
+            [progress],
+            update_conflicts=True,
+            unique_fields=["student", "course"],
+            update_fields=["obtained_score", "total_score", "is_completed", "updated_at"],
         )
 
         return Response(
@@ -381,6 +517,84 @@ class CourseViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='import')
+    def bulk_import(self, request):
+        """Create or update a whole course tree from one document.
+
+        The document has the shape of a course detail response. Nodes are
+        matched on their ids (or on ids derived from their position when they
+        have none), so re-importing a document creates no duplicates. Rows of
+        the course missing from the document are deleted.
+        """
+        user = request.user
+        profile = getattr(user, 'profile', None)
+        if not profile or profile.role not in (Role.ADMIN, Role.TEACHER):
+            return Response({'error': 'Only teachers and admins can import courses.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = CourseImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        course = Course.objects.select_related('teacher_class').filter(id=data['id']).first() if data.get('id') else None
+        teacher_class_id = data.get('teacherClassId') or (course.teacher_class_id if course else None)
+        if not teacher_class_id:
+            return Response(
+                {'error': 'teacherClassId is required. Course must be assigned to a teacher class.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        teacher_class = TeacherClass.objects.filter(id=teacher_class_id).first()
+        if teacher_class is None:
+            return Response({'error': 'Teacher class not found'}, status=status.HTTP_404_NOT_FOUND)
+        if course is None and not data.get('id'):
+            # Without an id, the course is keyed by its title within the class
+            course = Course.objects.select_related('teacher_class').filter(teacher_class=teacher_class, title=data['title']).first()
+        
+        # Permission check: teachers import into their own classes and courses only
+        if profile.role == Role.TEACHER:
+            owns_course = course is None or (course.teacher_class_id and course.teacher_class.teacher_id == user.id)
+            if teacher_class.teacher_id != user.id or not owns_course:
+                return Response(
+                    {'error': 'You can only import courses into your own teacher classes.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        
+        if background_requested(request):
+            job = enqueue(
+                "course.import",
+                {
+                    "document": request.data,
+                    "course_id": str(course.id) if course else None,
+                    "teacher_class_id": str(teacher_class.id),
+                },
+                user=user,
+            )
+            return job_accepted(job)
+        
+        course, created, counts = save_course_import(data, course, teacher_class)
+        return Response(
+            {'id': course.id, 'created': created, **counts},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated], url_path='export')
+    def export(self, request, pk=None):
+        """Stream the whole course tree as a JSON document accepted by the import."""
+        course = get_object_or_404(Course.objects.select_related('teacher_class'), pk=pk)
+        user = request.user
+        profile = getattr(user, 'profile', None)
+        
+        is_admin = profile and profile.role == Role.ADMIN
+        is_owner = profile and profile.role == Role.TEACHER and course.teacher_class_id and course.teacher_class.teacher_id == user.id
+        if not (is_admin or is_owner):
+            return Response(
+                {'error': 'Only admins and the teacher of the course can export it.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        response = StreamingHttpResponse(export_course_chunks(course), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="course-{course.id}.json"'
+        return response
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='bulk-delete')
     def bulk_delete(self, request):
         user = request.user
@@ -390,29 +604,46 @@ class CourseViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # One query for the ids that exist and whose class they belong to
+        rows = list(Course.objects.filter(id__in=ids).values_list('id', 'teacher_class_id', 'teacher_class__teacher_id'))
+        
         # For teachers, only allow deleting own courses
         if profile and profile.role == Role.TEACHER:
-            courses = Course.objects.filter(id__in=ids)
-            for course in courses:
-                if course.teacher_class and course.teacher_class.teacher != user:
-                    return Response(
-                        {'error': f'You can only delete courses in your own teacher classes.'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
+            if any(class_id and teacher_id != user.id for _, class_id, teacher_id in rows):
+                return Response(
+                    {'error': f'You can only delete courses in your own teacher classes.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
-        deleted_count, _ = Course.objects.filter(id__in=ids).delete()
+        course_ids = [course_id for course_id, _, _ in rows]
+        if background_requested(request):
+            ids = [str(course_id) for course_id in course_ids]
+            job = enqueue("content.delete", {"level": "course", "ids": ids, "course_ids": ids}, user=user)
+            return job_accepted(job)
+        deleted_count = delete_subtrees('course', course_ids, course_ids)
         return Response({'deleted': deleted_count}, status=status.HTTP_200_OK)
 
-    @action(detail=False, methods=['get'], permission_classes=[], url_path='verify-certificate')
+    @action(detail=False, methods=['get'], permission_classes=[], throttle_classes=[CertificateVerificationThrottle], url_path='verify-certificate')
     def verify_certificate(self, request):
-        """Public endpoint to verify a certificate by certificate number.
+        """Public endpoint to verify a certificate by verification token or certificate number.
         
         Query params:
-        - certificate_number: The certificate number to verify (required)
-        - include_student: Include student name in response (optional, default: True)
+        - token: A verification token (see courses.verification); checked
+          without database access apart from the cached revocation list
+        - certificate_number: The certificate number to verify (when no token is given)
         
         Returns certificate details if valid, error otherwise.
         """
+        token = request.query_params.get('token', '').strip()
+        if token:
+            try:
+                claims = read_verification_token(token)
+            except InvalidVerificationToken as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            if claims["n"] in revoked_numbers:
+                return Response({"error": "This certificate has been revoked"}, status=status.HTTP_410_GONE)
+            return Response(verification_result(claims))
+        
         cert_number = request.query_params.get('certificate_number', '').strip()
         
         if not cert_number:
@@ -421,54 +652,40 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            cert = CourseCompletionCertificate.objects.select_related(
-                'student', 'course', 'course__teacher_class', 'course__teacher_class__teacher'
-            ).get(certificate_number=cert_number)
-        except CourseCompletionCertificate.DoesNotExist:
+        # Cached per number; numbers that were never issued rarely reach the database
+        code, body = verify_number(cert_number)
+        return Response(body, status=code)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], url_path='revoke-certificate')
+    def revoke_certificate(self, request, pk=None):
+        """Revoke a certificate of this course; body: ``certificateNumber``."""
+        course = get_object_or_404(Course.objects.select_related('teacher_class'), pk=pk)
+        user = request.user
+        profile = getattr(user, 'profile', None)
+        
+        is_admin = profile and profile.role == Role.ADMIN
+        is_owner = profile and profile.role == Role.TEACHER and course.teacher_class_id and course.teacher_class.teacher_id == user.id
+        if not (is_admin or is_owner):
             return Response(
-                {"error": "Certificate not found or invalid certificate number"},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'Only admins and the teacher of the course can revoke its certificates.'},
+                status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get progress for score info
-        progress = CourseProgress.objects.filter(
-            student=cert.student, 
-            course=cert.course
+        cert = CourseCompletionCertificate.objects.filter(
+            course=course, certificate_number=request.data.get('certificateNumber', '')
         ).first()
+        if cert is None:
+            return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        student_name = (cert.student.first_name + " " + cert.student.last_name).strip() or cert.student.username
-        teacher_name = ""
-        if cert.course.teacher_class and cert.course.teacher_class.teacher:
-            t = cert.course.teacher_class.teacher
-            teacher_name = (t.first_name + " " + t.last_name).strip() or t.username
-        
-        response_data = {
-            "valid": True,
-            "certificateNumber": cert.certificate_number,
-            "issuedAt": cert.issued_at.isoformat(),
-            "courseTitle": cert.course.title,
-            "courseDescription": cert.course.description,
-            "studentName": student_name,
-            "instructorName": teacher_name,
-            "obtainedScore": progress.obtained_score if progress else 0,
-            "totalScore": progress.total_score if progress else 0,
-            "percentage": progress.percentage if progress else 0,
-            "verifiedAt": "2025-12-30T00:00:00Z",  # Current verification timestamp
-            "certificateStatus": "Valid and Active",
-        }
-        
-        return Response(response_data)
+        revoke_certificate(cert)
+        return Response({'certificateNumber': cert.certificate_number, 'revokedAt': cert.revoked_at.isoformat()})
 
 
-
-class ModuleViewSet(viewsets.ModelViewSet):
-    queryset = Module.objects.all().select_related("course").prefetch_related(
-        "lessons__topics__children",
-        "lessons__takeaways",
-        "lessons",
-    )
+class ModuleViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Module.objects.all().select_related("course").prefetch_related(*prefetch_lookups("module"))
     serializer_class = ModuleSerializer
+    cursor_ordering = ("id",)
+    prefetch_level = "module"
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
@@ -499,10 +716,9 @@ class ModuleViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.course
         
         # Permission check: Only admin or the teacher of the course can update
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only update modules in courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -515,10 +731,9 @@ class ModuleViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.course
         
         # Permission check: Only admin or the teacher of the course can delete
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only delete modules from courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -535,29 +750,26 @@ class ModuleViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # One query for the ids that exist, their courses and their owners
+        rows = list(Module.objects.filter(id__in=ids).values_list('id', 'course_id', 'owner_teacher_id'))
+        
         # For teachers, check they own the course
         if profile and profile.role == Role.TEACHER:
-            modules = Module.objects.filter(id__in=ids)
-            for module in modules:
-                course = module.course
-                if not course.teacher_class or course.teacher_class.teacher != user:
-                    return Response(
-                        {'error': 'You can only delete modules from courses in your own teacher classes.'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
+            if any(owner_id != user.id for _, _, owner_id in rows):
+                return Response(
+                    {'error': 'You can only delete modules from courses in your own teacher classes.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
-        deleted_count, _ = Module.objects.filter(id__in=ids).delete()
+        deleted_count = delete_subtrees('module', [row[0] for row in rows], [row[1] for row in rows])
         return Response({'deleted': deleted_count}, status=status.HTTP_200_OK)
 
 
-class LessonViewSet(viewsets.ModelViewSet):
-    queryset = Lesson.objects.all().select_related("module", "module__course").prefetch_related(
-        "topics__children",
-        "takeaways",
-        "exercises",
-        "resources",
-    )
+class LessonViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Lesson.objects.all().select_related("module", "module__course").prefetch_related(*prefetch_lookups("lesson"))
     serializer_class = LessonSerializer
+    cursor_ordering = ("id",)
+    prefetch_level = "lesson"
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
@@ -575,39 +787,17 @@ class LessonViewSet(viewsets.ModelViewSet):
         if not isinstance(resources_data, list):
             resources_data = [resources_data]
 
-        # Create lesson
+        # Create lesson and its nested items atomically, one INSERT per item type
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        lesson = serializer.save()
-
-        # Create key takeaways
-        for index, content in enumerate(takeaways_data):
-            if isinstance(content, str):
-                KeyTakeaway.objects.create(lesson=lesson, content=content, order=index)
-
-        # Create exercises
-        for index, exercise in enumerate(exercises_data):
-            if isinstance(exercise, dict):
-                Exercise.objects.create(
-                    lesson=lesson,
-                    title=exercise.get('title', ''),
-                    description=exercise.get('description', ''),
-                    order=index
-                )
-
-        # Create resources
-        for index, resource in enumerate(resources_data):
-            if isinstance(resource, dict):
-                Resource.objects.create(
-                    lesson=lesson,
-                    title=resource.get('title', ''),
-                    description=resource.get('description', ''),
-                    url=resource.get('url', ''),
-                    order=index
-                )
-
-        # Return complete lesson with nested data
-        lesson.refresh_from_db()
+        with transaction.atomic():
+            lesson = serializer.save()
+            items = create_nested_items('lesson', lesson, takeaways_data, exercises_data, resources_data)
+
+        # Return complete lesson with nested data, built from the rows in memory
+        for relation, objects in items.items():
+            set_prefetched(lesson, relation, objects)
+        set_prefetched(lesson, 'topics', [])
         output_serializer = self.get_serializer(lesson)
         headers = self.get_success_headers(output_serializer.data)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -617,10 +807,9 @@ class LessonViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.module.course
         
         # Permission check: Only admin or the teacher of the course can update
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only update lessons in courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -633,10 +822,9 @@ class LessonViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.module.course
         
         # Permission check: Only admin or the teacher of the course can delete
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only delete lessons from courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -653,28 +841,26 @@ class LessonViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # One query for the ids that exist, their courses and their owners
+        rows = list(Lesson.objects.filter(id__in=ids).values_list('id', 'course_id', 'owner_teacher_id'))
+        
         # For teachers, check they own the course
         if profile and profile.role == Role.TEACHER:
-            lessons = Lesson.objects.filter(id__in=ids)
-            for lesson in lessons:
-                course = lesson.module.course
-                if not course.teacher_class or course.teacher_class.teacher != user:
-                    return Response(
-                        {'error': 'You can only delete lessons from courses in your own teacher classes.'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
+            if any(owner_id != user.id for _, _, owner_id in rows):
+                return Response(
+                    {'error': 'You can only delete lessons from courses in your own teacher classes.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
-        deleted_count, _ = Lesson.objects.filter(id__in=ids).delete()
+        deleted_count = delete_subtrees('lesson', [row[0] for row in rows], [row[1] for row in rows])
         return Response({'deleted': deleted_count}, status=status.HTTP_200_OK)
 
 
-class TopicViewSet(viewsets.ModelViewSet):
-    queryset = Topic.objects.all().select_related("lesson", "parent", "lesson__module").prefetch_related(
-        "takeaways",
-        "exercises",
-        "resources",
-    )
+class TopicViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Topic.objects.all().select_related("lesson", "parent", "lesson__module").prefetch_related(*prefetch_lookups("topic"))
     serializer_class = TopicSerializer
+    cursor_ordering = ("id",)
+    prefetch_level = "topic"
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
@@ -691,40 +877,19 @@ class TopicViewSet(viewsets.ModelViewSet):
         if not isinstance(resources_data, list):
             resources_data = [resources_data]
 
-        # Create topic
+        # Create topic and its nested items atomically, one INSERT per item type
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        topic = serializer.save()
-
-        # Create key takeaways
-        for index, content in enumerate(takeaways_data):
-            if isinstance(content, str):
-                KeyTakeaway.objects.create(topic=topic, content=content, order=index)
-
-        # Create exercises
-        for index, exercise in enumerate(exercises_data):
-            if isinstance(exercise, dict):
-                Exercise.objects.create(
-                    topic=topic,
-                    title=exercise.get('title', ''),
-                    description=exercise.get('description', ''),
-                    order=index
-                )
-
-        # Create resources
-        for index, resource in enumerate(resources_data):
-            if isinstance(resource, dict):
-                Resource.objects.create(
-                    topic=topic,
-                    title=resource.get('title', ''),
-                    description=resource.get('description', ''),
-                    url=resource.get('url', ''),
-                    order=index
-                )
-
-        # Return complete topic with nested data
-        topic.refresh_from_db()
+        with transaction.atomic():
+            topic = serializer.save()
+            items = create_nested_items('topic', topic, takeaways_data, exercises_data, resources_data)
+
+        # Return complete topic with nested data, built from the rows in memory
+        for relation, objects in items.items():
+            set_prefetched(topic, relation, objects)
+        # A new topic has no children; skip loading its lesson's topic tree
         output_serializer = self.get_serializer(topic)
+        output_serializer.context['topic_trees'] = {topic.lesson_id: build_topic_children([])}
         headers = self.get_success_headers(output_serializer.data)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
@@ -733,10 +898,9 @@ class TopicViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.lesson.module.course
         
         # Permission check: Only admin or the teacher of the course can update
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only update topics in courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -749,10 +913,9 @@ class TopicViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
         profile = getattr(user, 'profile', None)
-        course = instance.lesson.module.course
         
         # Permission check: Only admin or the teacher of the course can delete
-        if profile and profile.role == Role.TEACHER and (not course.teacher_class or course.teacher_class.teacher != user):
+        if profile and profile.role == Role.TEACHER and instance.owner_teacher_id != user.id:
             return Response(
                 {'error': 'You can only delete topics from courses in your own teacher classes.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -769,56 +932,81 @@ class TopicViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # One query for the ids that exist, their courses and their owners
+        rows = list(Topic.objects.filter(id__in=ids).values_list('id', 'course_id', 'owner_teacher_id'))
+        
         # For teachers, check they own the course
         if profile and profile.role == Role.TEACHER:
-            topics = Topic.objects.filter(id__in=ids)
-            for topic in topics:
-                course = topic.lesson.module.course
-                if not course.teacher_class or course.teacher_class.teacher != user:
-                    return Response(
-                        {'error': 'You can only delete topics from courses in your own teacher classes.'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
+            if any(owner_id != user.id for _, _, owner_id in rows):
+                return Response(
+                    {'error': 'You can only delete topics from courses in your own teacher classes.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
-        deleted_count, _ = Topic.objects.filter(id__in=ids).delete()
+        deleted_count = delete_subtrees('topic', [row[0] for row in rows], [row[1] for row in rows])
         return Response({'deleted': deleted_count}, status=status.HTTP_200_OK)
 
 
 class KeyTakeawayViewSet(viewsets.ModelViewSet):
     queryset = KeyTakeaway.objects.all().select_related("lesson")
     serializer_class = KeyTakeawaySerializer
+    cursor_ordering = ("id",)
 
 
 class ExerciseViewSet(viewsets.ModelViewSet):
     queryset = Exercise.objects.all().select_related("lesson", "topic")
     serializer_class = ExerciseSerializer
+    cursor_ordering = ("id",)
 
 
 class ResourceViewSet(viewsets.ModelViewSet):
     queryset = Resource.objects.all().select_related("lesson", "topic")
     serializer_class = ResourceSerializer
+    cursor_ordering = ("id",)
+
+
+def count_subquery(model, field):
+    """Number of `model` rows whose `field` points at the outer row, as a correlated subquery.
+
+    Unlike Count() over joins, several of these can be annotated on one
+    queryset without multiplying each other's rows.
+    """
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
 
 
 class TeacherClassViewSet(viewsets.ModelViewSet):
     serializer_class = TeacherClassSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-created_at", "id")
 
     def get_queryset(self):
         user = self.request.user
         profile = getattr(user, 'profile', None)
         
+        queryset = TeacherClass.objects.select_related('teacher').annotate(
+            courses_count=count_subquery(Course, 'teacher_class'),
+            students_count=count_subquery(ClassEnrollment, 'teacher_class'),
+        )
+        
         # Admin can see all classes
         if profile and profile.role == Role.ADMIN:
-            return TeacherClass.objects.all().select_related('teacher')
+            return queryset
         
         # Teacher can see only their classes
         if profile and profile.role == Role.TEACHER:
-            return TeacherClass.objects.filter(teacher=user).select_related('teacher')
+            return queryset.filter(teacher=user)
         
         # Students can see classes they're enrolled in
         if profile and profile.role == Role.STUDENT:
             enrolled_class_ids = ClassEnrollment.objects.filter(student=user).values_list('teacher_class_id', flat=True)
-            return TeacherClass.objects.filter(id__in=enrolled_class_ids).select_related('teacher')
+            return queryset.filter(id__in=enrolled_class_ids)
         
         return TeacherClass.objects.none()
 
@@ -826,6 +1014,45 @@ class TeacherClassViewSet(viewsets.ModelViewSet):
         # Auto-generate class code and set teacher
         serializer.save(teacher=self.request.user, class_code=generate_class_code())
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], url_path='issue-certificates')
+    def issue_certificates(self, request, pk=None):
+        """Issue the certificates of every enrolled student who completed a course of this class.
+
+        Optional body: ``courseId`` to limit issuance to one course. Responds
+        with a ZIP of all the PDFs, streamed while they are being rendered.
+        """
+        user = request.user
+        profile = getattr(user, 'profile', None)
+        teacher_class = get_object_or_404(TeacherClass, pk=pk)
+        
+        is_admin = profile and profile.role == Role.ADMIN
+        is_owner = profile and profile.role == Role.TEACHER and teacher_class.teacher_id == user.id
+        if not (is_admin or is_owner):
+            return Response(
+                {'error': 'Only admins and the teacher of the class can issue its certificates.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        course_id = request.data.get('courseId')
+        if course_id:
+            try:
+                course_id = uuid.UUID(str(course_id))
+            except ValueError:
+                return Response({'error': 'courseId must be a course id.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pairs, created = issue_class_certificates(teacher_class, course_id)
+        if not pairs:
+            return Response(
+                {'error': 'No enrolled student has completed a course of this class yet.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(certificate_zip_chunks(pairs), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="certificates-{teacher_class.class_code}.zip"'
+        response['X-Certificates-Count'] = str(len(pairs))
+        response['X-Certificates-Created'] = str(created)
+        return response
+
     def update(self, request, *args, **kwargs):
         """Update a teacher class with permission check."""
         instance = self.get_object()
@@ -882,6 +1109,7 @@ class TeacherClassViewSet(viewsets.ModelViewSet):
 class ClassEnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ClassEnrollmentSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-enrolled_at", "id")
 
     def get_queryset(self):
         user = self.request.user
@@ -901,3 +1129,19 @@ class ClassEnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
             return ClassEnrollment.objects.filter(student=user).select_related('student', 'teacher_class__teacher')
         
         return ClassEnrollment.objects.none()
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of background jobs; users see the jobs they started, admins see all."""
+
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-created_at", "id")
+
+    def get_queryset(self):
+        user = self.request.user
+        profile = getattr(user, 'profile', None)
+        
+        if profile and profile.role == Role.ADMIN:
+            return Job.objects.all()
+        return Job.objects.filter(created_by=user)
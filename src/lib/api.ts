@@ -250,9 +250,95 @@ export async function getCsrfTokenFromServer(): Promise<string> {
   return response.data.csrfToken;
 }
 
+// Background jobs
+export interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  priority: number;
+  attempts: number;
+  maxAttempts: number;
+  result: Record<string, unknown> | null;
+  error: string;
+  runAfter: string;
+  startedAt: string | null;
+  finishedAt: string | null;
+  createdAt: string;
+}
+
+export interface JobAccepted {
+  job: Job;
+  pollUrl: string;
+}
+
+export async function getJob(jobId: string): Promise<Job> {
+  const response = await api.get<Job>(`/jobs/${jobId}/`);
+  return response.data;
+}
+
+export interface WaitForJobOptions {
+  intervalMs?: number;
+  // Give up after this long; the job keeps running on the server.
+  timeoutMs?: number;
+  signal?: AbortSignal;
+}
+
+function sleep(ms: number, signal?: AbortSignal): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const onAbort = () => {
+      clearTimeout(timer);
+      reject(signal?.reason);
+    };
+    const timer = setTimeout(() => {
+      signal?.removeEventListener('abort', onAbort);
+      resolve();
+    }, ms);
+    signal?.addEventListener('abort', onAbort, { once: true });
+  });
+}
+
+// Poll a job until it succeeds; rejects when it fails, when timeoutMs elapses
+// (e.g. no run_jobs worker is running) or when signal is aborted.
+export async function waitForJob(
+  jobId: string,
+  { intervalMs = 1000, timeoutMs = 120000, signal }: WaitForJobOptions = {}
+): Promise<Job> {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    signal?.throwIfAborted();
+    const job = (await api.get<Job>(`/jobs/${jobId}/`, { signal })).data;
+    if (job.status === 'succeeded') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'Background job failed');
+    if (Date.now() + intervalMs > deadline) {
+      throw new Error(
+        `Background job is still ${job.status} after ${Math.round(timeoutMs / 1000)}s; ` +
+          'the job worker may not be running. Please try again later.'
+      );
+    }
+    await sleep(intervalMs, signal);
+  }
+}
+
 // Certificates
-export async function generateCourseCertificate(courseId: string): Promise<Blob> {
-  const response = await api.post(`/courses/${courseId}/generate-certificate/`, {}, { responseType: 'blob' });
+export async function generateCourseCertificate(courseId: string, signal?: AbortSignal): Promise<Blob> {
+  const response = await api.post(`/courses/${courseId}/generate-certificate/`, {}, { responseType: 'blob', signal });
+  if (response.status !== 202) {
+    return response.data as Blob;
+  }
+  // The PDF is being rendered in the background: wait for it, then download it.
+  const accepted: JobAccepted = JSON.parse(await (response.data as Blob).text());
+  await waitForJob(accepted.job.id, { signal });
+  const pdf = await api.get(`/courses/${courseId}/certificate-pdf/`, { responseType: 'blob', signal });
+  return pdf.data as Blob;
+}
+
+// Issues every missing certificate of a class and downloads them as one ZIP.
+export async function issueClassCertificates(classId: string, courseId?: string): Promise<Blob> {
+  const response = await api.post(
+    `/classes/${classId}/issue-certificates/`,
+    courseId ? { courseId } : {},
+    { responseType: 'blob' }
+  );
   return response.data as Blob;
 }
 
@@ -268,6 +354,8 @@ export interface CertificateInfo {
   percentage: number;
   userName: string;
   userEmail: string;
+  verificationToken: string;
+  verificationUrl: string;
 }
 
 export async function getCertificateInfo(courseId: string): Promise<CertificateInfo> {
@@ -297,6 +385,14 @@ export async function verifyCertificate(certificateNumber: string): Promise<Cert
   return response.data;
 }
 
+// Verifies a signed verification token (from a shared credential URL).
+export async function verifyCertificateToken(token: string): Promise<CertificateVerificationResult> {
+  const response = await api.get<CertificateVerificationResult>(
+    `/courses/verify-certificate/?token=${encodeURIComponent(token)}`
+  );
+  return response.data;
+}
+
 export async function updateCourseProgress(courseId: string, payload: { obtained_score: number; total_score: number; is_completed?: boolean }) {
   const response = await api.post(`/courses/${courseId}/progress/`, payload);
   return response.data as { obtained_score: number; total_score: number; percentage: number; is_completed: boolean };
@@ -308,6 +404,29 @@ export async function fetchUsers(): Promise<User[]> {
   return response.data;
 }
 
+export interface UserListParams {
+  search?: string;
+  role?: string; // comma-separated roles
+  is_staff?: boolean;
+  joined_after?: string;
+  joined_before?: string;
+  ordering?: "id" | "-id" | "username" | "-username" | "date_joined" | "-date_joined";
+  page_size?: number;
+  cursor?: string;
+}
+
+export interface UserPage {
+  next: string | null;
+  previous: string | null;
+  results: User[];
+}
+
+// Server-side filtered, cursor-paginated listing; pass the `cursor` from `next` to continue.
+export async function fetchUsersPage(params: UserListParams = {}): Promise<UserPage> {
+  const response = await api.get<UserPage>("/auth/users/", { params: { page_size: 50, ...params } });
+  return response.data;
+}
+
 export async function createUserAdmin(data: NewUserInput): Promise<User> {
   const response = await api.post<User>("/auth/users/", data);
   return response.data;
@@ -344,6 +463,29 @@ export async function bulkDeleteTopics(ids: string[]): Promise<{ deleted: number
   return response.data;
 }
 
+// Whole-course import/export (same document shape as a course detail response)
+export interface CourseImportResult {
+  id: string;
+  created: boolean;
+  modules: number;
+  lessons: number;
+  topics: number;
+  takeaways: number;
+  exercises: number;
+  resources: number;
+  deleted: number;
+}
+
+export async function importCourse(document: Partial<Course>): Promise<CourseImportResult> {
+  const response = await api.post<CourseImportResult>("/courses/import/", document);
+  return response.data;
+}
+
+export async function exportCourse(courseId: string): Promise<Blob> {
+  const response = await api.get(`/courses/${courseId}/export/`, { responseType: 'blob' });
+  return response.data as Blob;
+}
+
 // Classes API
 export async function createClass(data: any): Promise<any> {
   const response = await api.post("/classes/", data);
@@ -4,7 +4,7 @@ import { ArrowLeft, Menu, X, Share2, Linkedin, Mail } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { CourseTableOfContents } from "@/components/courses/CourseTableOfContents";
 import { LessonViewer } from "@/components/courses/LessonViewer";
-import { useState, useMemo, useEffect } from "react";
+import { useState, useMemo, useEffect, useRef } from "react";
 import { Lesson, Module, Topic, Exercise, Resource, KeyTakeaway } from "@/types/course";
 import { useAuth } from "@/context/AuthContext";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription } from "@/components/ui/dialog";
@@ -43,6 +43,9 @@ const CourseDetail = () => {
   const [shareDialogOpen, setShareDialogOpen] = useState(false);
   const [certificateInfo, setCertificateInfo] = useState<api.CertificateInfo | null>(null);
   const [isLoadingCert, setIsLoadingCert] = useState(false);
+  // Stops waiting for a certificate being rendered when the page is left.
+  const certificateRequest = useRef<AbortController | null>(null);
+  useEffect(() => () => certificateRequest.current?.abort(), []);
 
   const rawCourse = getCourse(id || "");
   const course = useMemo(() => {
@@ -260,8 +263,11 @@ const CourseDetail = () => {
               variant="outline"
               size="sm"
               onClick={async () => {
+                certificateRequest.current?.abort();
+                const controller = new AbortController();
+                certificateRequest.current = controller;
                 try {
-                  const blob = await api.generateCourseCertificate(course.id);
+                  const blob = await api.generateCourseCertificate(course.id, controller.signal);
                   const url = URL.createObjectURL(blob);
                   const a = document.createElement('a');
                   a.href = url;
@@ -272,9 +278,11 @@ const CourseDetail = () => {
                   URL.revokeObjectURL(url);
                   toast({ title: "Certificate downloaded successfully" });
                 } catch (err: any) {
-                  toast({ 
-                    title: "Certificate generated", 
-                    description: "Your certificate is ready. You can download it anytime."
+                  if (controller.signal.aborted) return;
+                  toast({
+                    title: "Certificate not downloaded",
+                    description: err?.message || "Please try again later.",
+                    variant: "destructive"
                   });
                 }
               }}
@@ -565,7 +573,7 @@ const LinkedInShareButton = ({ certificateInfo }: { certificateInfo: api.Certifi
             <div className="flex items-center justify-between mb-2">
               <label className="font-medium text-gray-700">Credential URL</label>
               <button
-                onClick={() => copyToClipboard(window.location.href, "Credential URL")}
+                onClick={() => copyToClipboard(certificateInfo.verificationUrl, "Credential URL")}
                 className="text-xs px-2 py-1 bg-blue-100 hover:bg-blue-200 text-blue-700 rounded"
               >
                 Copy
@@ -574,7 +582,7 @@ const LinkedInShareButton = ({ certificateInfo }: { certificateInfo: api.Certifi
             <input
               type="text"
               readOnly
-              value={window.location.href}
+              value={certificateInfo.verificationUrl}
               className="w-full px-2 py-1 bg-gray-50 border border-gray-200 rounded text-xs truncate"
             />
           </div>
@@ -1,4 +1,5 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
+import { useSearchParams } from "react-router-dom";
 import { Header } from "@/components/layout/Header";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -14,21 +15,17 @@ export const VerifyCertificate = () => {
   const [result, setResult] = useState<api.CertificateVerificationResult | null>(null);
   const [error, setError] = useState<string | null>(null);
 
-  const handleVerify = async (e: React.FormEvent) => {
-    e.preventDefault();
-    
-    if (!certificateNumber.trim()) {
-      setError("Please enter a certificate number");
-      return;
-    }
+  const [searchParams] = useSearchParams();
 
+  const runVerification = async (verify: () => Promise<api.CertificateVerificationResult>) => {
     try {
       setLoading(true);
       setError(null);
       setResult(null);
 
-      const verification = await api.verifyCertificate(certificateNumber.trim());
+      const verification = await verify();
       setResult(verification);
+      setCertificateNumber(verification.certificateNumber);
       
       toast({
         title: "Certificate Verified",
@@ -49,6 +46,26 @@ export const VerifyCertificate = () => {
     }
   };
 
+  // Shared credential URLs carry a signed token: verify it on load.
+  useEffect(() => {
+    const token = searchParams.get("token");
+    if (token) {
+      runVerification(() => api.verifyCertificateToken(token));
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [searchParams]);
+
+  const handleVerify = async (e: React.FormEvent) => {
+    e.preventDefault();
+    
+    if (!certificateNumber.trim()) {
+      setError("Please enter a certificate number");
+      return;
+    }
+
+    await runVerification(() => api.verifyCertificate(certificateNumber.trim()));
+  };
+
   return (
     <div className="min-h-screen bg-background">
       <Header />